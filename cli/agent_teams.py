@@ -0,0 +1,221 @@
+# cli/agent_teams.py
+"""
+Agent teams: named groups of agent slugs, read from `agent_teams.txt`.
+
+The team file (`constants.TEAMS_FILENAME`) lists each team followed by its
+members, one slug per line:
+
+    defense:
+      - debug
+      - review
+
+Blank lines and `#` comment lines are ignored. A slug may belong to several
+teams. `parse_teams` turns the file into a team -> slugs index, which is what
+`rawr compile --team <name>` selects agents by.
+
+`write_team_partitions` writes one registry file per team next to the global
+registry (in `constants.TEAM_PARTITIONS_DIRNAME`), holding only that team's
+modes, so an editor profile can load the modes it needs instead of the whole
+registry.
+"""
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from . import config_loader
+from . import constants
+from . import registry_manager
+from .exceptions import TeamFileError
+
+logger = logging.getLogger(__name__)
+
+# Team names also name their partition files
+_TEAM_NAME = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9_.-]*")
+
+
+def get_teams_path(agent_config_dir: Path) -> Path:
+    """
+    Returns the team file for an agent config directory.
+
+    The file in the agent config directory takes precedence; otherwise the
+    one in the agent prompt directory (`constants.DEFAULT_AGENTS_DIR`) is used.
+    """
+    local_path = agent_config_dir / constants.TEAMS_FILENAME
+    if local_path.is_file():
+        return local_path
+    return config_loader.PROJECT_ROOT / constants.DEFAULT_AGENTS_DIR / constants.TEAMS_FILENAME
+
+
+def parse_teams(text: str, source: str = constants.TEAMS_FILENAME) -> Dict[str, List[str]]:
+    """
+    Parses team file content.
+
+    Args:
+        text: The content of a team file.
+        source: Name of the file, used in error messages.
+
+    Returns:
+        Team name -> member slugs, both in file order (duplicate members are dropped).
+
+    Raises:
+        TeamFileError: If a line is neither a team header nor a member of one,
+                       a team name is not a valid file name, or a team is
+                       listed twice.
+    """
+    teams: Dict[str, List[str]] = {}
+    team: Optional[str] = None
+    for line_number, raw_line in enumerate(text.splitlines(), start=1):
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("-"):
+            slug = line[1:].strip()
+            if team is None or not slug:
+                raise TeamFileError(f"{source}:{line_number}: Expected '<team>:' before '{line}'.")
+            if slug not in teams[team]:
+                teams[team].append(slug)
+        elif line.endswith(":") and not raw_line[0].isspace() and line[:-1].strip():
+            team = line[:-1].strip()
+            if not _TEAM_NAME.fullmatch(team):
+                raise TeamFileError(f"{source}:{line_number}: Invalid team name '{team}'.")
+            if team in teams:
+                raise TeamFileError(f"{source}:{line_number}: Team '{team}' is listed twice.")
+            teams[team] = []
+        else:
+            raise TeamFileError(f"{source}:{line_number}: Expected '<team>:' or '- <slug>', got '{line}'.")
+    return teams
+
+
+def read_teams(teams_path: Path) -> Dict[str, List[str]]:
+    """
+    Reads and parses a team file (see `parse_teams`).
+
+    Raises:
+        TeamFileError: If the file cannot be read or parsed.
+    """
+    try:
+        text = teams_path.read_text(encoding="utf-8")
+    except FileNotFoundError as e:
+        raise TeamFileError(f"Team file not found: {teams_path}") from e
+    except (OSError, UnicodeDecodeError) as e:
+        raise TeamFileError(f"Could not read team file {teams_path}: {e}") from e
+    return parse_teams(text, source=str(teams_path))
+
+
+def teams_by_slug(teams: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Returns the reverse index: slug -> the teams it belongs to, in file order."""
+    index: Dict[str, List[str]] = {}
+    for team, slugs in teams.items():
+        for slug in slugs:
+            index.setdefault(slug, []).append(team)
+    return index
+
+
+def team_members(teams: Dict[str, List[str]], team: str) -> Set[str]:
+    """
+    Returns the slugs of one team.
+
+    Raises:
+        TeamFileError: If the team is not in the index.
+    """
+    if team not in teams:
+        available = ", ".join(teams) or "(none)"
+        raise TeamFileError(f"Unknown team '{team}'. Available teams: {available}")
+    return set(teams[team])
+
+
+def config_slug(config_path: Path, base_dir: Path) -> str:
+    """
+    Returns the slug a config file is named for: its directory for nested
+    configs (`<slug>/config.yaml`), otherwise its file name (`<slug>.yaml`).
+    """
+    if config_path.parent != base_dir:
+        return config_path.parent.name
+    return config_path.stem
+
+
+def select_configs(
+    config_paths: Iterable[Path],
+    slugs: Set[str],
+    base_dir: Path,
+    known_slugs: Optional[Dict[Path, str]] = None
+) -> List[Path]:
+    """
+    Selects the configs of a set of agents.
+
+    Args:
+        config_paths: The candidate config files (e.g. from `config_scan.scan_configs`).
+        slugs: The agent slugs to select (e.g. from `team_members`).
+        base_dir: The agent config directory.
+        known_slugs: Slugs already known per config (e.g. from the compile
+                     manifest), which match in addition to the path's slug.
+
+    Returns:
+        The selected configs, in the order of `config_paths`.
+    """
+    known_slugs = known_slugs or {}
+    return [
+        config_path for config_path in config_paths
+        if config_slug(config_path, base_dir) in slugs or known_slugs.get(config_path) in slugs
+    ]
+
+
+def get_partitions_dir(registry_path: Path) -> Path:
+    """Returns the directory of the team partitions that belong to the given registry file."""
+    return registry_path.with_name(constants.TEAM_PARTITIONS_DIRNAME)
+
+
+def build_partition(registry_data: Dict[str, Any], slugs: Iterable[str]) -> Dict[str, Any]:
+    """
+    Returns the registry data restricted to the modes of the given slugs.
+
+    Modes keep their registry order; other top-level keys are kept as they are.
+    """
+    slugs = set(slugs)
+    modes = [
+        mode for mode in registry_data.get(constants.CUSTOM_MODES, [])
+        if isinstance(mode, dict) and mode.get(constants.SLUG) in slugs
+    ]
+    return {**registry_data, constants.CUSTOM_MODES: modes}
+
+
+def write_team_partitions(
+    registry_data: Dict[str, Any],
+    teams: Dict[str, List[str]],
+    registry_path: Path
+) -> List[Path]:
+    """
+    Writes one registry partition per team (`<partitions dir>/<team>.json`).
+
+    Partitions whose content is unchanged are not rewritten, so editor file
+    watchers don't reload them, and partitions of teams no longer in the
+    team file are removed.
+
+    Args:
+        registry_data: The full registry data.
+        teams: The team -> slugs index (see `parse_teams`).
+        registry_path: The global registry file the partitions belong to.
+
+    Returns:
+        The partition files that were written.
+    """
+    partitions_dir = get_partitions_dir(registry_path)
+    partitions_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for team, slugs in teams.items():
+        partition_path = partitions_dir / f"{team}.json"
+        payload = registry_manager.serialize_registry(build_partition(registry_data, slugs))
+        try:
+            if partition_path.read_bytes() == payload:
+                continue
+        except FileNotFoundError:
+            pass
+        registry_manager.atomic_write_bytes(partition_path, payload)
+        written.append(partition_path)
+
+    for stale_path in partitions_dir.glob("*.json"):
+        if stale_path.stem not in teams:
+            logger.info(f"Removing partition of a team no longer listed: {stale_path}")
+            stale_path.unlink()
+    return written
@@ -0,0 +1,180 @@
+# cli/compile_manifest.py
+"""
+Content-hash manifest used for incremental compilation.
+
+The manifest lives next to the global registry and maps every successfully
+compiled agent config (keyed by its path relative to the agent config
+directory) to the file's size, mtime and SHA-256 digest, plus the registry
+metadata that was extracted from it. A compile can then skip loading,
+parsing and validating any config whose fingerprint is unchanged.
+
+Entries of configs that include prompt fragments (see cli/prompt_includes.py)
+also record each fragment's source digest under 'includes'. Together they form
+the dependency graph from fragments to agents: a changed fragment invalidates
+exactly the entries that include it.
+"""
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import constants
+from . import registry_manager
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+# Files modified this close to the previous manifest write may have changed
+# again within the same mtime tick, so their stat data alone is not trusted.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def get_manifest_path(registry_path: Path) -> Path:
+    """Returns the manifest path that belongs to the given registry file."""
+    return registry_path.with_name(constants.COMPILE_MANIFEST_FILENAME)
+
+
+def new_manifest(agent_config_dir: Path) -> Dict[str, Any]:
+    """Returns an empty manifest for the given agent config directory."""
+    return {
+        "version": MANIFEST_VERSION,
+        "agent_config_dir": str(agent_config_dir),
+        "generated_ns": time.time_ns(),
+        "entries": {},
+    }
+
+
+def read_manifest(manifest_path: Path, agent_config_dir: Path) -> Dict[str, Any]:
+    """
+    Reads the compile manifest.
+
+    Args:
+        manifest_path: The path to the manifest JSON file.
+        agent_config_dir: The agent config directory the manifest must describe.
+
+    Returns:
+        The manifest dictionary. An empty manifest is returned if the file is
+        missing, unreadable, from another manifest version or was built for a
+        different agent config directory.
+    """
+    if not manifest_path.exists():
+        logger.info(f"No compile manifest found at {manifest_path}. All agents will be compiled.")
+        return new_manifest(agent_config_dir)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read compile manifest {manifest_path}: {e}. Ignoring it.")
+        return new_manifest(agent_config_dir)
+
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != MANIFEST_VERSION
+        or data.get("agent_config_dir") != str(agent_config_dir)
+        or not isinstance(data.get("entries"), dict)
+    ):
+        logger.info(f"Compile manifest {manifest_path} is stale or invalid. Ignoring it.")
+        return new_manifest(agent_config_dir)
+    return data
+
+
+def write_manifest(manifest_path: Path, manifest: Dict[str, Any]):
+    """
+    Writes the manifest to disk, stamping it with the current time.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    manifest["generated_ns"] = time.time_ns()
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+    registry_manager.atomic_write_bytes(manifest_path, payload)
+    logger.info(f"Wrote compile manifest with {len(manifest['entries'])} entries to {manifest_path}")
+
+
+def invalidate_slugs(manifest_path: Path, agent_config_dir: Path, slugs: Iterable[str]) -> List[str]:
+    """
+    Drops the entries whose recorded metadata has one of the given slugs, so
+    the next compile re-processes their configs instead of reusing the
+    metadata (e.g. after the registry entries were changed by `sync`).
+
+    Returns:
+        The keys of the dropped entries.
+
+    Raises:
+        OSError: If the manifest cannot be written.
+    """
+    slugs = set(slugs)
+    manifest = read_manifest(manifest_path, agent_config_dir)
+    dropped = [
+        key for key, entry in manifest["entries"].items()
+        if entry.get("metadata", {}).get(constants.SLUG) in slugs
+    ]
+    if dropped:
+        for key in dropped:
+            del manifest["entries"][key]
+        write_manifest(manifest_path, manifest)
+    return dropped
+
+
+def fingerprint(config_path: Path) -> Dict[str, Any]:
+    """Returns the size, mtime and SHA-256 digest of a config file."""
+    data = config_path.read_bytes()
+    stat = config_path.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+
+
+def lookup(
+    manifest: Dict[str, Any],
+    key: str,
+    config_path: Path,
+    fragment_digest: Optional[Callable[[str], Optional[str]]] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Checks whether a config file is unchanged since the manifest was written.
+
+    The file is only read and hashed when its size or mtime differ from the
+    recorded entry (or the entry is too recent to trust its mtime). A config
+    whose included fragments changed is reported as changed.
+
+    Args:
+        manifest: The manifest returned by `read_manifest`.
+        key: The manifest key for the config (its path relative to the config dir).
+        config_path: The full path to the config file.
+        fragment_digest: Returns the current source digest of a fragment by name
+                         (None if it is gone). Entries with includes are
+                         treated as changed without it.
+
+    Returns:
+        A tuple containing:
+            - cached_metadata: The recorded registry metadata if the file is unchanged, else None.
+            - file_fingerprint: The file's current fingerprint if it had to be computed, else None.
+    """
+    entry = manifest["entries"].get(key)
+    if entry is None:
+        return None, None
+    includes = entry.get("includes")
+    if includes and (
+        fragment_digest is None or any(fragment_digest(name) != digest for name, digest in includes.items())
+    ):
+        return None, None # An included fragment changed; the config must be rendered again
+
+    stat = config_path.stat()
+    racy = entry["mtime_ns"] >= manifest.get("generated_ns", 0) - RACY_WINDOW_NS
+    if not racy and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["metadata"], None
+
+    current = fingerprint(config_path)
+    if current["sha256"] == entry["sha256"]:
+        # Content is unchanged (e.g. the file was touched); refresh the stat data
+        entry.update(current)
+        return entry["metadata"], current
+    return None, current
+
@@ -0,0 +1,161 @@
+# cli/compile_report.py
+"""
+Console output of `rawr compile` in its different output modes.
+
+The compiler sends its progress messages, per-agent results and the final
+outcome through a CompileReporter instead of echoing directly:
+
+- `text` (default): the human-readable progress messages.
+- `ndjson`: one JSON record per agent (`"event": "agent"`) as results come
+  in, followed by one `"event": "summary"` record. No progress messages.
+- `quiet` (either format): only the summary, as one line of text or one
+  JSON record.
+
+With `--dry-run`, the registry diff is printed before the summary: as text
+lines, or as one `"event": "diff"` record.
+"""
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import typer
+
+from . import constants
+from . import profiling
+from . import registry_diff
+
+# Agent event statuses
+STATUS_COMPILED = "compiled"
+STATUS_UNCHANGED = "unchanged" # Reused from the compile manifest
+STATUS_FAILED = "failed"
+
+# Registry outcomes reported in the summary
+REGISTRY_WRITTEN = "written"
+REGISTRY_UNCHANGED = "unchanged"
+REGISTRY_JOURNALED = "journaled"
+REGISTRY_NOT_WRITTEN = "not_written"
+REGISTRY_DRY_RUN = "dry_run" # `--dry-run`: the diff was reported instead of written
+
+
+def agent_event(
+    config_path: Path,
+    slug: str,
+    status: str,
+    timings: Optional[Dict[str, float]] = None,
+    error: Optional[BaseException] = None
+) -> Dict[str, Any]:
+    """
+    Builds the record describing one agent's compile result.
+
+    Args:
+        config_path: The agent's config file.
+        slug: The agent's slug (the validated slug if compiled, else the file stem).
+        status: STATUS_COMPILED, STATUS_UNCHANGED or STATUS_FAILED.
+        timings: Stage name -> duration in seconds.
+        error: The exception that made the compile fail, if any.
+    """
+    return {
+        "event": "agent",
+        "slug": slug,
+        "path": str(config_path),
+        "status": status,
+        "timings_ms": {stage: round(seconds * 1000, 3) for stage, seconds in (timings or {}).items()},
+        "error": None if error is None else {"class": type(error).__name__, "message": str(error)},
+    }
+
+
+class CompileReporter:
+    """
+    Routes compile output according to the output format and `quiet`.
+
+    Also tallies the agent events it is given, so it can report the summary
+    at the end of the compile, and hands them to the profiler if there is one.
+    """
+
+    def __init__(
+        self,
+        output_format: str = constants.COMPILE_OUTPUT_TEXT,
+        quiet: bool = False,
+        profiler: Optional["profiling.CompileProfiler"] = None
+    ):
+        """
+        Raises:
+            ValueError: If the output format is not one of `constants.COMPILE_OUTPUT_FORMATS`.
+        """
+        if output_format not in constants.COMPILE_OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output format '{output_format}'. Expected one of: {', '.join(constants.COMPILE_OUTPUT_FORMATS)}"
+            )
+        self.output_format = output_format
+        self.quiet = quiet
+        self.profiler = profiler
+        self.counts = {STATUS_COMPILED: 0, STATUS_UNCHANGED: 0, STATUS_FAILED: 0}
+        self.registry_status = REGISTRY_NOT_WRITTEN
+        self.registry_path: Optional[Path] = None
+        self._started = time.perf_counter()
+
+    @property
+    def verbose(self) -> bool:
+        """True if human-readable progress messages are printed."""
+        return self.output_format == constants.COMPILE_OUTPUT_TEXT and not self.quiet
+
+    def echo(self, message: str, err: bool = False, nl: bool = True):
+        """Prints a progress message in verbose mode; otherwise does nothing."""
+        if self.verbose:
+            typer.echo(message, err=err, nl=nl)
+
+    def agent(self, event: Dict[str, Any]):
+        """
+        Records an agent event, printing it in (non-quiet) ndjson mode.
+
+        A 'trace' entry (see `profiling.trace_info`) is removed from the event
+        and passed to the profiler; it is never printed.
+        """
+        trace = event.pop("trace", None)
+        if self.profiler is not None:
+            self.profiler.record_agent(event, trace)
+        self.counts[event["status"]] += 1
+        if self.output_format == constants.COMPILE_OUTPUT_NDJSON and not self.quiet:
+            typer.echo(json.dumps(event, separators=(',', ':')))
+
+    def diff(self, registry_diff: "registry_diff.RegistryDiff"):
+        """Prints a registry diff unless quiet: as text lines, or as one JSON record in ndjson mode."""
+        if self.quiet:
+            return
+        if self.output_format == constants.COMPILE_OUTPUT_NDJSON:
+            typer.echo(json.dumps({"event": "diff", **registry_diff.to_dict()}, separators=(',', ':')))
+        else:
+            typer.echo("\n".join(registry_diff.format_lines()))
+
+    def summary(self, exit_code: int) -> Dict[str, Any]:
+        """Returns the summary record for the compile so far."""
+        return {
+            "event": "summary",
+            "exit_code": exit_code,
+            **self.counts,
+            "registry": self.registry_status,
+            "registry_path": None if self.registry_path is None else str(self.registry_path),
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+        }
+
+    def finish(self, exit_code: int):
+        """
+        Prints the summary.
+
+        In verbose text mode the compiler's own closing messages already
+        serve as the summary, so nothing more is printed.
+        """
+        if self.verbose:
+            return
+        summary = self.summary(exit_code)
+        if self.output_format == constants.COMPILE_OUTPUT_NDJSON:
+            typer.echo(json.dumps(summary, separators=(',', ':')))
+            return
+        icon = "❌" if exit_code else ("⚠️" if summary[STATUS_FAILED] else "✅")
+        typer.echo(
+            f"{icon} Compiled {summary[STATUS_COMPILED]}, unchanged {summary[STATUS_UNCHANGED]}, "
+            f"failed {summary[STATUS_FAILED]} in {summary['duration_ms'] / 1000:.2f}s. "
+            f"Registry {self.registry_status.replace('_', ' ')}.",
+            err=bool(exit_code)
+        )
@@ -4,22 +4,43 @@ into the global agent registry.
 """
 import typer
 import logging
+import contextlib
+import concurrent.futures
+import functools
+import io
+import os
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Iterator, List, Set, Tuple
 import yaml
 from pydantic import ValidationError as PydanticValidationError # Alias for clarity
 
 # Local imports
+from . import agent_teams
 from . import config_loader
+from . import config_scan
+from . import compile_manifest
+from . import compile_report
+from . import config_validation
+from . import profiling
+from . import constants
+from . import git_changes
+from . import prompt_includes
+from . import prompt_store
+from . import registry_diff
 from . import registry_manager
+from . import yaml_io
 from .models import GlobalAgentConfig
 from .exceptions import ( # Import new exceptions
+    ChangeDetectionError,
+    FragmentIncludeError,
     AgentProcessingError,
     AgentLoadError,
     AgentValidationError,
     AgentCompileError,
     RegistryReadError,
-    RegistryWriteError
+    RegistryWriteError,
+    TeamFileError
 )
 
 # --- Logging Setup ---
@@ -27,9 +48,25 @@ from .exceptions import ( # Import new exceptions
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
-# Load paths using the centralized config loader
-AGENT_CONFIG_DIR = config_loader.get_agent_config_dir()
-GLOBAL_REGISTRY_PATH = config_loader.get_global_registry_path()
+# AGENT_CONFIG_DIR and GLOBAL_REGISTRY_PATH are read-only views of the
+# process-wide config resolver (see __getattr__ below). Compiles take a
+# `config_loader.ConfigResolver`; to compile other paths, pass one with
+# overridden paths or install it with `config_loader.set_resolver`.
+_PATH_SETTINGS = {
+    "AGENT_CONFIG_DIR": "agent_config_dir",
+    "GLOBAL_REGISTRY_PATH": "global_registry_path",
+}
+
+
+def __getattr__(name):
+    if name in _PATH_SETTINGS:
+        return config_loader.get_resolver().get(_PATH_SETTINGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_config(config: Optional[config_loader.ConfigResolver] = None) -> config_loader.ConfigResolver:
+    """Returns the resolver to compile with: the given one, else the process-wide one."""
+    return config if config is not None else config_loader.get_resolver()
 
 # Custom exceptions are now defined in cli/exceptions.py
 
@@ -58,11 +95,15 @@ def extract_registry_metadata(config: GlobalAgentConfig) -> Dict[str, Any]:
         metadata = {
             "slug": config.slug,
             "name": config.name,
-            "description": config.description,
-            "version": config.version,
-            # Add other fields from GlobalAgentConfig as needed for the registry
-            # e.g., "author": config.author, "tags": config.tags
+            "roleDefinition": config.roleDefinition,
         }
+        # Nested models (GroupRestriction tuples, ApiConfig/HttpUrl) are dumped in
+        # JSON mode so the registry only ever holds plain JSON-compatible values.
+        # 'customInstructions' is never stored in the global registry.
+        dumped = config.model_dump(mode="json", include={"groups", "apiConfiguration"}, exclude_none=True)
+        metadata["groups"] = dumped["groups"]
+        if "apiConfiguration" in dumped:
+            metadata["apiConfiguration"] = dumped["apiConfiguration"]
         logger.debug(f"Successfully extracted metadata for {config.slug}")
         return metadata
     except AttributeError as e:
@@ -73,7 +114,11 @@ def extract_registry_metadata(config: GlobalAgentConfig) -> Dict[str, Any]:
 
 def _compile_specific_agent(
     config_path: Path, # Changed: Now accepts the full path
-    current_registry_data: Dict[str, Any]
+    current_registry_data: Dict[str, Any],
+    verbose: bool = True,
+    timings: Optional[Dict[str, float]] = None,
+    includes: Optional[Dict[str, str]] = None,
+    fragments_dir: Optional[Path] = None
 ) -> Tuple[Dict[str, Any], bool]: # Return metadata and success flag
     """
     Loads, validates, and extracts metadata for a single agent config using its full path.
@@ -81,6 +126,14 @@ def _compile_specific_agent(
     Args:
         config_path: The full path to the agent configuration file (e.g., 'agents/subdir/my_agent.yaml').
         current_registry_data: The current state of the global registry data (passed for context, not modified here).
+        verbose: Print progress and error messages. Failures are raised either way.
+        timings: Optional dictionary that receives the duration in seconds of
+                 each completed stage ('read', 'parse', 'validate', 'extract',
+                 plus 'render' for configs with include directives).
+        includes: Optional dictionary that receives the name and source digest
+                  of every prompt fragment the config includes (see `prompt_includes`).
+        fragments_dir: Fragment directory for include directives. Defaults to
+                       the `_fragments` directory of the configured agent config directory.
 
     Returns:
         A tuple containing:
@@ -98,19 +151,79 @@ def _compile_specific_agent(
     logger.info(f"Attempting to compile agent: {agent_slug} from path: {config_path}")
     # Path reconstruction removed, using config_path directly
 
+    timings = {} if timings is None else timings
+    includes = {} if includes is None else includes
+    if fragments_dir is None:
+        fragments_dir = prompt_includes.get_fragments_dir(_get_config().agent_config_dir)
+    echo = typer.echo if verbose else _no_echo
+
     # 1. Load and Validate Agent Config
-    typer.echo(f"Processing '{agent_slug}': Loading and validating config...")
+    echo(f"Processing '{agent_slug}': Loading and validating config...")
+    config_data, marks = _load_agent_config(config_path, agent_slug, timings, includes, fragments_dir, echo)
     try:
+        started = time.perf_counter()
+        # Assuming a validation function exists or using Pydantic directly
+        # Replace `validate_config` if it was a placeholder
+        agent_config = GlobalAgentConfig.model_validate(config_data)
+        timings["validate"] = time.perf_counter() - started
+        logger.info(f"Successfully loaded and validated config for {agent_slug} from {config_path}") # Use local agent_slug
+    except PydanticValidationError as e: # Catch Pydantic's specific error
+        logger.error(f"Config validation failed for {agent_slug} from {config_path}: {e}") # Use local agent_slug
+        # Locate each error in the source (file:line:col) through the marks kept from parsing
+        issues = config_validation.issues_from_errors(config_path, e.errors(include_url=False), marks)
+        error_details = "\n".join(f"  - {issue.format()}" for issue in issues)
+        msg = f"Config validation failed. Details:\n{error_details}"
+        echo(f"❌ Error validating {agent_slug}: {msg}", err=True) # Use local agent_slug
+        raise AgentValidationError(msg, agent_slug=agent_slug, original_exception=e) # Use local agent_slug
+    except Exception as e:
+        logger.exception(f"Unexpected error loading/validating config for {agent_slug} from {config_path}") # Use local agent_slug
+        msg = f"An unexpected error occurred loading/validating config for {agent_slug}. Details: {e}" # Use local agent_slug
+        echo(f"❌ Error: {msg}", err=True)
+        raise AgentProcessingError(msg, agent_slug=agent_slug, original_exception=e) # Use local agent_slug
+
+    # 2. Extract Metadata
+    registry_metadata = _extract_agent_metadata(agent_config, agent_slug, timings, echo)
+
+    # 3. Return Metadata and Success
+    # The registry update happens in the calling function (_compile_all_agents or compile_agents)
+    echo(f"✅ Successfully processed agent: '{agent_slug}' from {config_path}") # Use local agent_slug
+    return registry_metadata, True
+
+
+def _load_agent_config(
+    config_path: Path,
+    agent_slug: str,
+    timings: Dict[str, float],
+    includes: Dict[str, str],
+    fragments_dir: Path,
+    echo
+) -> Tuple[Dict[str, Any], yaml_io.SourceMarks]:
+    """
+    Reads and parses an agent config and renders its prompt includes (stage 1 before validation).
+
+    Returns:
+        A tuple of (parsed config data, source locations of its values).
+
+    Raises:
+        AgentLoadError: If the config file cannot be found, read, parsed or rendered.
+        AgentProcessingError: For other unexpected errors.
+    """
+    try:
+        started = time.perf_counter()
         if not config_path.exists(): # Use config_path
              raise FileNotFoundError(f"Agent config file not found at {config_path}")
         config_content = config_path.read_text() # Use config_path
-        config_data = yaml.safe_load(config_content)
+        timings["read"], started = time.perf_counter() - started, time.perf_counter()
+        # libyaml-backed when available; the marks locate validation errors without a second parse
+        config_data, marks = yaml_io.load_with_marks(config_content)
         if not isinstance(config_data, dict):
              raise ValueError(f"Config file {config_path} did not parse into a dictionary.") # Use config_path
-        # Assuming a validation function exists or using Pydantic directly
-        # Replace `validate_config` if it was a placeholder
-        agent_config = GlobalAgentConfig.model_validate(config_data)
-        logger.info(f"Successfully loaded and validated config for {agent_slug} from {config_path}") # Use local agent_slug
+        timings["parse"], started = time.perf_counter() - started, time.perf_counter()
+        dependencies = prompt_includes.render_config(config_data, fragments_dir)
+        if dependencies: # Only configs with include directives have a render stage
+            timings["render"] = time.perf_counter() - started
+        includes.update(dependencies)
+        return config_data, marks
     except FileNotFoundError as e:
         logger.error(f"Agent config file not found at {config_path}") # Use config_path
         msg = f"Config file not found at {config_path}" # Use config_path
@@ -118,214 +231,710 @@ def _compile_specific_agent(
     except yaml.YAMLError as e:
         logger.error(f"YAML parsing failed for {config_path}: {e}") # Use config_path
         msg = f"Failed to parse YAML for {config_path}. Details:\n{e}" # Use config_path
-        typer.echo(f"❌ Error: {msg}", err=True)
+        echo(f"❌ Error: {msg}", err=True)
         raise AgentLoadError(msg, agent_slug=agent_slug, original_exception=e) # Use local agent_slug
-    except PydanticValidationError as e: # Catch Pydantic's specific error
-        logger.error(f"Config validation failed for {agent_slug} from {config_path}: {e}") # Use local agent_slug
-        # Format Pydantic errors for better readability if desired
-        error_details = "\n".join([f"  - {err['loc']}: {err['msg']}" for err in e.errors()])
-        msg = f"Config validation failed. Details:\n{error_details}"
-        typer.echo(f"❌ Error validating {agent_slug}: {msg}", err=True) # Use local agent_slug
-        raise AgentValidationError(msg, agent_slug=agent_slug, original_exception=e) # Use local agent_slug
+    except FragmentIncludeError as e:
+        logger.error(f"Prompt includes failed to render for {config_path}: {e}")
+        msg = f"Failed to render prompt includes for {config_path}. Details: {e}"
+        echo(f"❌ Error: {msg}", err=True)
+        raise AgentLoadError(msg, agent_slug=agent_slug, original_exception=e)
     except Exception as e:
         logger.exception(f"Unexpected error loading/validating config for {agent_slug} from {config_path}") # Use local agent_slug
         msg = f"An unexpected error occurred loading/validating config for {agent_slug}. Details: {e}" # Use local agent_slug
-        typer.echo(f"❌ Error: {msg}", err=True)
+        echo(f"❌ Error: {msg}", err=True)
         raise AgentProcessingError(msg, agent_slug=agent_slug, original_exception=e) # Use local agent_slug
 
-    # 2. Extract Metadata
-    typer.echo(f"Processing '{agent_slug}': Extracting metadata...")
+
+def _extract_agent_metadata(
+    agent_config: GlobalAgentConfig,
+    agent_slug: str,
+    timings: Dict[str, float],
+    echo
+) -> Dict[str, Any]:
+    """
+    Extracts the registry metadata of a validated config (the last compile stage).
+
+    Raises:
+        AgentCompileError: If metadata extraction fails.
+    """
+    echo(f"Processing '{agent_slug}': Extracting metadata...")
     try:
+        started = time.perf_counter()
         # Call the actual (now defined) extraction function
         registry_metadata = extract_registry_metadata(agent_config)
+        timings["extract"] = time.perf_counter() - started
         logger.info(f"Successfully extracted metadata for {agent_slug}") # Use local agent_slug
+        return registry_metadata
     except Exception as e:
         # Catch AttributeError specifically from metadata extraction, or any other Exception
         logger.exception(f"Error extracting metadata for {agent_slug}") # Use local agent_slug
         msg = f"Failed to extract metadata for {agent_slug}. Details: {e}" # Use local agent_slug
-        typer.echo(f"❌ Error extracting metadata for {agent_slug}: {msg}", err=True) # Use local agent_slug
+        echo(f"❌ Error extracting metadata for {agent_slug}: {msg}", err=True) # Use local agent_slug
         # Raise AgentCompileError for issues during this phase
         raise AgentCompileError(msg, agent_slug=agent_slug, original_exception=e) # Use local agent_slug
 
-    # 3. Return Metadata and Success
-    # The registry update happens in the calling function (_compile_all_agents or compile_agents)
-    typer.echo(f"✅ Successfully processed agent: '{agent_slug}' from {config_path}") # Use local agent_slug
-    return registry_metadata, True
+
+def _no_echo(*args, **kwargs):
+    """Stands in for typer.echo when progress messages are turned off."""
+
+
+def _compile_agent(
+    config_path: Path,
+    current_registry_data: Dict[str, Any],
+    verbose: bool = True,
+    profile: bool = False,
+    fragments_dir: Optional[Path] = None
+) -> Tuple[Dict[str, Any], bool, Dict[str, Any]]:
+    """
+    Compiles one agent config, turning any failure into a failed result.
+
+    With `profile`, the event also carries a 'trace' entry (see
+    `profiling.trace_info`) that places the compile on the profile timeline.
+    If the config includes prompt fragments, the event carries an 'includes'
+    entry (fragment name -> source digest) for the compile manifest.
+
+    Returns:
+        A tuple containing:
+            - agent_metadata: Extracted metadata if successful, empty dict otherwise.
+            - success: Boolean indicating if the compilation was successful.
+            - event: The agent record for the compile report (see `compile_report.agent_event`).
+    """
+    slug_to_compile = config_path.stem  # Use filename stem as slug
+    timings: Dict[str, float] = {}
+    includes: Dict[str, str] = {}
+    error = None
+    started = time.perf_counter()
+    try:
+        agent_metadata, success = _compile_specific_agent(
+            config_path, current_registry_data, verbose=verbose, timings=timings,
+            includes=includes, fragments_dir=fragments_dir
+        )
+        if not success:
+            # _compile_specific_agent should raise an exception on failure now
+            # This branch might be redundant if exceptions are always raised on failure.
+            # However, keeping it handles the theoretical case where it returns False without exception.
+            logger.warning(f"Compilation reported as failed for agent '{slug_to_compile}' but no exception was caught.")
+    except AgentProcessingError as e:  # Catch specific processing errors from helper
+        # Error message already printed by _compile_specific_agent
+        logger.warning(f"Compilation failed for agent '{e.agent_slug}'. Skipping registry update for this agent.")
+        agent_metadata, success, error = {}, False, e
+    except Exception as e:  # Catch any other unexpected errors
+        logger.exception(f"Unexpected error processing file for agent '{slug_to_compile}'")
+        if verbose:
+            typer.echo(f"❌ Unexpected Error processing file for agent '{slug_to_compile}'. Details: {e}", err=True)
+        agent_metadata, success, error = {}, False, e # Count as failure
+
+    event = compile_report.agent_event(
+        config_path,
+        agent_metadata.get("slug", slug_to_compile) if success else slug_to_compile,
+        compile_report.STATUS_COMPILED if success else compile_report.STATUS_FAILED,
+        timings=timings,
+        error=error,
+    )
+    if profile:
+        event["trace"] = profiling.trace_info(started)
+    if includes and success:
+        event["includes"] = includes
+    return agent_metadata, success, event
+
+
+def _compile_agent_job(
+    config_path: Path,
+    verbose: bool = True,
+    profile: bool = False,
+    fragments_dir: Optional[Path] = None
+) -> Tuple[Dict[str, Any], bool, Dict[str, Any], str, str]:
+    """
+    Process-pool worker: compiles one agent config with its console output captured.
+
+    Runs `_compile_agent` in a worker process and returns everything the
+    parent needs to reproduce the serial behaviour. Exceptions are not returned
+    because AgentProcessingError (and the wrapped pydantic errors) do not pickle
+    reliably across process boundaries; the agent event carries their class
+    name and message instead.
+
+    Args:
+        config_path: The full path to the agent configuration file.
+        verbose: Print progress and error messages (into the captured output).
+        profile: Add profile timeline data to the event.
+        fragments_dir: Fragment directory for include directives.
+
+    Returns:
+        A tuple containing:
+            - agent_metadata: Extracted metadata if successful, empty dict otherwise.
+            - success: Boolean indicating if the compilation was successful.
+            - event: The agent record for the compile report.
+            - stdout: Captured standard output produced while compiling.
+            - stderr: Captured standard error produced while compiling.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        agent_metadata, success, event = _compile_agent(
+            config_path, {}, verbose=verbose, profile=profile, fragments_dir=fragments_dir
+        )
+    return agent_metadata, success, event, stdout.getvalue(), stderr.getvalue()
+
+
+def _compile_config_paths(
+    config_paths: List[Path],
+    initial_registry_data: Dict[str, Any],
+    jobs: int = 1,
+    verbose: bool = True,
+    profile: bool = False,
+    fragments_dir: Optional[Path] = None
+) -> Iterator[Tuple[Path, Dict[str, Any], bool, Dict[str, Any]]]:
+    """
+    Compiles the given config files, yielding results in the order of `config_paths`.
+
+    With `jobs > 1` the work is fanned out to a process pool and each worker's
+    console output is replayed in path order, so the output is identical to a
+    serial run.
+
+    Yields:
+        Tuples of (config_path, agent_metadata, success, event).
+    """
+    if jobs > 1 and len(config_paths) > 1:
+        workers = min(jobs, len(config_paths))
+        logger.info(f"Compiling {len(config_paths)} agent configuration(s) with {workers} worker process(es).")
+        # Hand out work in chunks to amortise IPC overhead on large fleets
+        chunksize = max(1, len(config_paths) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            # executor.map yields results in submission (i.e. path) order
+            results = executor.map(
+                functools.partial(_compile_agent_job, verbose=verbose, profile=profile, fragments_dir=fragments_dir),
+                config_paths, chunksize=chunksize
+            )
+            for config_path, (agent_metadata, success, event, out, err) in zip(config_paths, results):
+                # Replay the worker's console output so it matches the serial path
+                if out:
+                    typer.echo(out, nl=False)
+                if err:
+                    typer.echo(err, nl=False, err=True)
+                yield config_path, agent_metadata, success, event
+        return
+
+    for config_path in config_paths:
+        logger.debug(f"Found potential agent config: {config_path.name}, slug: {config_path.stem}")
+        # Pass the initial registry data for context, but don't expect modification
+        agent_metadata, success, event = _compile_agent(
+            config_path, initial_registry_data, verbose=verbose, profile=profile, fragments_dir=fragments_dir
+        )
+        yield config_path, agent_metadata, success, event
+
+
+def _compile_config_batch(
+    config_paths: List[Path],
+    verbose: bool = True,
+    profile: bool = False,
+    fragments_dir: Optional[Path] = None
+) -> Iterator[Tuple[Path, Dict[str, Any], bool, Dict[str, Any]]]:
+    """
+    Compiles the given config files with one batch validation pass (see `config_validation`).
+
+    Configs are loaded one by one, validated together, then extracted, all
+    in this process. Validation errors are printed as one consolidated
+    report (file, line and location of every error) instead of per agent.
+
+    Yields:
+        Tuples of (config_path, agent_metadata, success, event), in the order of `config_paths`.
+    """
+    echo = typer.echo if verbose else _no_echo
+    states: Dict[Path, Dict[str, Any]] = {}
+    loaded = []
+    for config_path in config_paths:
+        state = states[config_path] = {"timings": {}, "includes": {}, "started": time.perf_counter()}
+        echo(f"Processing '{config_path.stem}': Loading config...")
+        try:
+            config_data, marks = _load_agent_config(
+                config_path, config_path.stem, state["timings"], state["includes"], fragments_dir, echo
+            )
+            loaded.append((config_path, config_data, marks))
+        except AgentProcessingError as e:
+            logger.warning(f"Compilation failed for agent '{e.agent_slug}'. Skipping registry update for this agent.")
+            state["error"] = e
+
+    with profiling.stage("validate.batch", files=len(loaded)):
+        models, report = config_validation.validate_configs(loaded)
+    logger.info(f"Batch-validated {report.validated} config(s), {len(report.failed_paths)} failed.")
+    if not report.ok:
+        for line in report.format_lines():
+            echo(line, err=True)
+
+    for (config_path, _, _), agent_config in zip(loaded, models):
+        state, agent_slug = states[config_path], config_path.stem
+        try:
+            if agent_config is None:
+                details = "\n".join(f"  - {issue.format()}" for issue in report.issues_for(config_path))
+                raise AgentValidationError(f"Config validation failed. Details:\n{details}", agent_slug=agent_slug)
+            state["metadata"] = _extract_agent_metadata(agent_config, agent_slug, state["timings"], echo)
+            echo(f"✅ Successfully processed agent: '{agent_slug}' from {config_path}")
+        except AgentProcessingError as e:
+            logger.warning(f"Compilation failed for agent '{e.agent_slug}'. Skipping registry update for this agent.")
+            state["error"] = e
+
+    for config_path in config_paths:
+        state = states[config_path]
+        agent_metadata = state.get("metadata", {})
+        success = "metadata" in state
+        event = compile_report.agent_event(
+            config_path,
+            agent_metadata.get("slug", config_path.stem) if success else config_path.stem,
+            compile_report.STATUS_COMPILED if success else compile_report.STATUS_FAILED,
+            timings=state["timings"],
+            error=state.get("error"),
+        )
+        if profile:
+            event["trace"] = profiling.trace_info(state["started"])
+        if state["includes"] and success:
+            event["includes"] = state["includes"]
+        yield config_path, agent_metadata, success, event
 
 
 def _compile_all_agents(
     agent_config_base_dir: Path, # Renamed for clarity
-    initial_registry_data: Dict[str, Any] # Keep initial registry state
+    initial_registry_data: Dict[str, Any], # Keep initial registry state
+    jobs: int = 1,
+    manifest: Optional[Dict[str, Any]] = None,
+    reporter: Optional[compile_report.CompileReporter] = None,
+    batch_validate: bool = False,
+    include: str = constants.DEFAULT_CONFIG_GLOB,
+    scan_threads: int = 1,
+    changed: Optional[List[Path]] = None,
+    team_slugs: Optional[Set[str]] = None
 ) -> Tuple[Dict[str, Any], int, int]:
     """
     Scans the agent directory, compiles all valid agents, and accumulates results.
 
+    Config files are processed in sorted path order. With `jobs > 1` the
+    load/validate/extract work is fanned out to a process pool; results are
+    still merged (and their console output replayed) in path order, so the
+    registry and the success/failure counts are identical to a serial run.
+
+    When a compile manifest is given, configs whose size/mtime or content hash
+    match their manifest entry, and whose included prompt fragments are
+    unchanged, are not re-processed; their cached metadata is merged instead.
+    The manifest entries are updated in place to describe this run: changed
+    files are re-recorded, and deleted or failing files are dropped.
+
+    Config files are found by `config_scan.scan_configs`, which honours the
+    `.rawrignore` file of the directory. Files in the fragment directory
+    (`prompt_includes.get_fragments_dir`) are include sources, not agent
+    configs, and are not compiled.
+
     Args:
         agent_config_base_dir: The directory containing agent configurations (e.g., 'agents/').
         initial_registry_data: The starting state of the global registry (used as base).
+        jobs: Number of worker processes to use. 1 (the default) compiles serially.
+        manifest: Optional compile manifest (see `compile_manifest.read_manifest`).
+        reporter: Receives progress messages and one event per agent. Defaults
+                  to human-readable text output.
+        batch_validate: Validate all changed configs in one pass in this
+                        process (see `_compile_config_batch`) instead of
+                        compiling them file by file; `jobs` is not used.
+        include: Glob (relative to the base directory) of the config files to compile.
+        scan_threads: Number of threads walking the directory tree.
+        changed: If given, only the configs these changed files affect are
+                 compiled (see `git_changes.affected_configs`); the manifest
+                 entries of the other configs are kept as they are.
+        team_slugs: If given, only the configs of these agents are compiled
+                    (see `agent_teams.select_configs`), like `changed`.
 
     Returns:
         A tuple containing:
         - final_registry_data: The registry data after processing all agents.
-        - compiled_count: The number of successfully compiled agents.
+        - compiled_count: The number of successfully compiled (or reused) agents.
         - failed_count: The number of agents that failed to compile.
     """
+    reporter = reporter or compile_report.CompileReporter()
     logger.info(f"Scanning for agent configurations in: {agent_config_base_dir}")
-    typer.echo(f"Scanning for agent configurations in: {agent_config_base_dir}")
+    reporter.echo(f"Scanning for agent configurations in: {agent_config_base_dir}")
 
     compiled_count = 0
     failed_count = 0
-    final_registry_data = initial_registry_data.copy() # Start with initial data
+    # The slug index keeps merging O(1) per agent and copies the modes list,
+    # so the caller's registry data is never mutated
+    registry = registry_manager.SlugIndexedRegistry(initial_registry_data)
 
     if not agent_config_base_dir or not agent_config_base_dir.exists() or not agent_config_base_dir.is_dir():
          msg = f"Invalid base directory provided: {agent_config_base_dir}"
          logger.error(msg)
-         typer.echo(f"❌ Error: {msg}", err=True)
+         reporter.echo(f"❌ Error: {msg}", err=True)
          # Raise error instead of returning, let caller handle it
          raise AgentProcessingError(msg) # No specific agent slug here
 
+    # Find the config files matching the include glob, minus ignored paths and
+    # the fragment directory. Sorting gives a deterministic merge order
+    # independent of filesystem order.
+    fragments_dir = prompt_includes.get_fragments_dir(agent_config_base_dir)
+    with profiling.stage("scan", threads=scan_threads):
+        ignore = config_scan.IgnoreRules.from_dir(agent_config_base_dir, extra=[f"/{constants.FRAGMENTS_DIRNAME}/"])
+        config_paths = config_scan.scan_configs(agent_config_base_dir, include, ignore, threads=scan_threads)
 
-    # Iterate through .yaml files in the base directory
-    # Recursively find all .yaml files in the base directory and subdirectories
-    for config_path in agent_config_base_dir.rglob('*.yaml'):
-        slug_to_compile = config_path.stem  # Use filename stem as slug
-        logger.debug(f"Found potential agent config: {config_path.name}, slug: {slug_to_compile}")
-        try:
-            # Pass the initial registry data for context, but don't expect modification
-            # Pass the full config_path directly
-            agent_metadata, success = _compile_specific_agent(
-                config_path,
-                initial_registry_data
+    new_entries: Dict[str, Dict[str, Any]] = {}
+    all_config_paths = config_paths
+    if changed is not None:
+        with profiling.stage("changes"):
+            config_paths = git_changes.affected_configs(config_paths, changed, agent_config_base_dir)
+        reporter.echo(f"ℹ️ {len(config_paths)} of {len(all_config_paths)} agent configuration(s) affected by the changes.")
+    if team_slugs is not None:
+        # Configs not named for their slug are matched by the slug recorded in the manifest
+        known_slugs = {}
+        if manifest is not None:
+            for config_path in config_paths:
+                entry = manifest["entries"].get(config_path.relative_to(agent_config_base_dir).as_posix())
+                if entry is not None:
+                    known_slugs[config_path] = entry.get("metadata", {}).get(constants.SLUG)
+        config_paths = agent_teams.select_configs(config_paths, team_slugs, agent_config_base_dir, known_slugs)
+        reporter.echo(f"ℹ️ {len(config_paths)} of {len(all_config_paths)} agent configuration(s) in the selected team.")
+    if manifest is not None and config_paths is not all_config_paths:
+        # Configs outside the selection keep their entries
+        selected = {config_path.relative_to(agent_config_base_dir).as_posix() for config_path in config_paths}
+        new_entries = {key: entry for key, entry in manifest["entries"].items() if key not in selected}
+
+    # --- Consult the manifest for unchanged configs ---
+    cached_metadata: Dict[Path, Dict[str, Any]] = {}
+    fingerprints: Dict[Path, Dict[str, Any]] = {}
+    if manifest is not None:
+        with profiling.stage("manifest.lookup"):
+            for config_path in config_paths:
+                key = config_path.relative_to(agent_config_base_dir).as_posix()
+                metadata, current = compile_manifest.lookup(
+                    manifest, key, config_path, prompt_includes.get_renderer(fragments_dir).source_digest
+                )
+                if metadata is not None:
+                    cached_metadata[config_path] = metadata
+                    new_entries[key] = manifest["entries"][key]
+                    reporter.agent(compile_report.agent_event(
+                        config_path, metadata.get("slug", config_path.stem), compile_report.STATUS_UNCHANGED
+                    ))
+                else:
+                    # Fingerprint before compiling so a concurrent edit is picked up next time
+                    fingerprints[config_path] = current or compile_manifest.fingerprint(config_path)
+        if cached_metadata:
+            logger.info(f"Reusing cached metadata for {len(cached_metadata)} unchanged agent configuration(s).")
+            reporter.echo(f"ℹ️ Skipping {len(cached_metadata)} unchanged agent configuration(s).")
+
+    paths_to_compile = [p for p in config_paths if p not in cached_metadata]
+    results = {}
+    includes: Dict[Path, Dict[str, str]] = {}
+    with profiling.stage("compile", files=len(paths_to_compile), jobs=jobs):
+        if batch_validate:
+            compiled = _compile_config_batch(
+                paths_to_compile, verbose=reporter.verbose, profile=reporter.profiler is not None,
+                fragments_dir=fragments_dir
+            )
+        else:
+            compiled = _compile_config_paths(
+                paths_to_compile, initial_registry_data, jobs=jobs,
+                verbose=reporter.verbose, profile=reporter.profiler is not None, fragments_dir=fragments_dir
             )
+        for config_path, agent_metadata, success, event in compiled:
+            # The fragment dependencies are recorded in the manifest, not reported
+            includes[config_path] = event.pop("includes", None)
+            # Events stream out as results arrive; the registry merge waits for all of them
+            reporter.agent(event)
+            results[config_path] = (agent_metadata, success)
+
+    # --- Merge in path order ---
+    with profiling.stage("merge"):
+        for config_path in config_paths:
+            if config_path in cached_metadata:
+                agent_metadata, success = cached_metadata[config_path], True
+            else:
+                agent_metadata, success = results[config_path]
             if success:
-                # Update the final registry data directly here
-                final_registry_data['agents'][slug_to_compile] = agent_metadata
+                # Merge into the registry by the validated slug from the config itself
+                registry.upsert(agent_metadata)
                 compiled_count += 1
-                logger.info(f"Successfully compiled and added/updated '{slug_to_compile}' in registry data.")
+                if manifest is not None and config_path not in cached_metadata:
+                    key = config_path.relative_to(agent_config_base_dir).as_posix()
+                    new_entries[key] = dict(fingerprints[config_path], metadata=agent_metadata)
+                    if includes[config_path]:
+                        new_entries[key]["includes"] = includes[config_path]
             else:
-                # _compile_specific_agent should raise an exception on failure now
-                # This 'else' block might be redundant if exceptions are always raised on failure.
-                # However, keeping it handles the theoretical case where it returns False without exception.
-                logger.warning(f"Compilation reported as failed for agent '{slug_to_compile}' but no exception was caught.")
                 failed_count += 1
 
-        except AgentProcessingError as e:  # Catch specific processing errors from helper
-            # Error message already printed by _compile_specific_agent
-            logger.warning(f"Compilation failed for agent '{e.agent_slug}'. Skipping registry update for this agent.")
-            # typer.echo(f"ℹ️ Skipping registry update for failed agent: '{e.agent_slug}'") # Redundant? Helper prints error.
-            failed_count += 1
-        except Exception as e:  # Catch any other unexpected errors during the loop
-            logger.exception(f"Unexpected error processing file for agent '{slug_to_compile}'")
-            failed_count += 1
-            typer.echo(f"❌ Unexpected Error processing file for agent '{slug_to_compile}'. Details: {e}", err=True)
-            failed_count += 1 # Count as failure
-        else:
-             logger.debug(f"Skipping non-YAML file or directory: {item.name}")
+        if manifest is not None:
+            # Entries for deleted or failing configs are dropped here
+            manifest["entries"] = new_entries
+        final_registry_data = registry.to_dict()
 
     return final_registry_data, compiled_count, failed_count
 
 
 # --- Public Compilation Function ---
 
-def compile_agents(agent_slug: Optional[str] = None): # Renamed parameter
+def compile_agents(
+    agent_slug: Optional[str] = None, # Renamed parameter
+    jobs: Optional[int] = None,
+    full: bool = False,
+    journal: bool = False,
+    output_format: str = constants.COMPILE_OUTPUT_TEXT,
+    quiet: bool = False,
+    profile: bool = False,
+    trace_path: Optional[Path] = None,
+    profile_top: int = constants.PROFILE_TOP_FILES,
+    prompt_store: bool = False,
+    dry_run: bool = False,
+    config: Optional[config_loader.ConfigResolver] = None,
+    batch_validate: bool = False,
+    include: str = constants.DEFAULT_CONFIG_GLOB,
+    scan_threads: int = 1,
+    changed_since: Optional[str] = None,
+    team: Optional[str] = None,
+    teams_path: Optional[Path] = None,
+    team_partitions: bool = False
+):
     """
     Loads, validates, and compiles agent configuration(s), updating the global registry.
 
     Args:
         agent_slug: The specific agent slug to compile. If None, compiles all agents. # Updated docstring
+        jobs: Number of worker processes used when compiling all agents.
+              Defaults to the CPU count; 1 compiles serially.
+        full: When compiling all agents, ignore the compile manifest and re-process
+              every config (the manifest is still rebuilt afterwards).
+        journal: When compiling a single agent, append the update to the registry
+                 journal instead of rewriting the whole registry file. The journal
+                 is compacted automatically once it passes its size threshold.
+        output_format: 'text' for progress messages, or 'ndjson' for one JSON
+                       record per agent plus a summary record (see `compile_report`).
+        quiet: Print only the summary.
+        profile: Time each compile stage and print a profile report to stderr
+                 (see `profiling`).
+        trace_path: Also write the profile as a Chrome trace-event JSON file.
+                    Implies `profile`.
+        profile_top: Number of slowest files listed in the profile report.
+        prompt_store: Write the registry into the content-addressed prompt store,
+                      enabling it for later compiles (see `prompt_store`).
+        dry_run: Compile, then report the per-slug, per-field registry diff
+                 (see `registry_diff`) instead of writing the registry,
+                 journal or compile manifest.
+        config: Resolves the agent config directory and global registry path.
+                Defaults to `config_loader.get_resolver()`.
+        batch_validate: When compiling all agents, validate every changed config
+                        in one pass and report all validation errors together
+                        (see `config_validation`). Runs in this process.
+        include: When compiling all agents, glob of the config files to compile,
+                 relative to the agent config directory (e.g. '*/config.yaml').
+                 Paths in its `.rawrignore` file are skipped (see `config_scan`).
+        scan_threads: Number of threads walking the agent config directory.
+        changed_since: When compiling all agents, compile only the agents affected
+                       by local git changes since this revision (see `git_changes`)
+                       into the existing registry.
+        team: When compiling all agents, compile only the agents of this team
+              into the existing registry (see `agent_teams`).
+        teams_path: The team file. Defaults to `agent_teams.get_teams_path`.
+        team_partitions: Also write one registry partition per team next to
+                         the global registry (see `agent_teams.write_team_partitions`).
 
     Raises:
+        ValueError: If the output format is unknown.
         typer.Exit: If compilation fails or critical errors occur (e.g., cannot read/write registry).
     """
-    global_registry_path = GLOBAL_REGISTRY_PATH
-    agent_config_dir = AGENT_CONFIG_DIR
+    profiler = profiling.CompileProfiler() if profile or trace_path else None
+    if profiler is not None:
+        profiler.info["yaml_backend"] = yaml_io.BACKEND
+    reporter = compile_report.CompileReporter(output_format, quiet=quiet, profiler=profiler)
+    config = _get_config(config)
+    agent_config_dir, global_registry_path = config.agent_config_dir, config.global_registry_path
+    reporter.registry_path = global_registry_path
+    exit_code = 1 # Unless the compile completes or exits with its own code
+    try:
+        with profiling.activate(profiler):
+            _compile_agents(
+                agent_slug, jobs, full, journal, reporter, agent_config_dir, global_registry_path,
+                prompt_store, dry_run, batch_validate, include, scan_threads, changed_since,
+                team, teams_path, team_partitions
+            )
+        exit_code = 0
+    except typer.Exit as e:
+        exit_code = e.exit_code
+        raise
+    finally:
+        reporter.finish(exit_code)
+        if profiler is not None:
+            _report_profile(profiler, trace_path, profile_top)
+
+
+def _report_profile(profiler: profiling.CompileProfiler, trace_path: Optional[Path], top: int):
+    """Prints the profile report to stderr (keeping stdout parseable) and writes the trace file, if requested."""
+    typer.echo(profiler.format_report(top), err=True)
+    if trace_path is None:
+        return
+    try:
+        profiler.write_chrome_trace(trace_path)
+        typer.echo(f"ℹ️ Chrome trace written to {trace_path}", err=True)
+    except OSError as e:
+        logger.warning(f"Could not write Chrome trace to {trace_path}: {e}")
+        typer.echo(f"⚠️ Could not write Chrome trace to {trace_path}: {e}", err=True)
+
+
+def _compile_agents(
+    agent_slug: Optional[str],
+    jobs: Optional[int],
+    full: bool,
+    journal: bool,
+    reporter: compile_report.CompileReporter,
+    agent_config_dir: Path,
+    global_registry_path: Path,
+    use_prompt_store: bool = False,
+    dry_run: bool = False,
+    batch_validate: bool = False,
+    include: str = constants.DEFAULT_CONFIG_GLOB,
+    scan_threads: int = 1,
+    changed_since: Optional[str] = None,
+    team: Optional[str] = None,
+    teams_path: Optional[Path] = None,
+    team_partitions: bool = False
+):
+    """Runs the compile for `compile_agents`, reporting through `reporter`."""
+
+    # --- Read the Team File ---
+    teams = None
+    team_slugs = None
+    if team is not None or team_partitions:
+        teams_path = teams_path or agent_teams.get_teams_path(agent_config_dir)
+        try:
+            teams = agent_teams.read_teams(teams_path)
+            if team is not None and not agent_slug:
+                team_slugs = agent_teams.team_members(teams, team)
+        except TeamFileError as e:
+            logger.error(f"Could not select agents by team: {e}")
+            reporter.echo(f"❌ Error: {e}", err=True)
+            raise typer.Exit(code=1)
 
     # --- Read Initial Global Registry ---
-    typer.echo(f"Reading global registry from {global_registry_path}...")
+    reporter.echo(f"Reading global registry from {global_registry_path}...")
     try:
         initial_registry_data = registry_manager.read_global_registry(global_registry_path)
-        typer.echo("✅ Global registry read successfully.")
+        reporter.echo("✅ Global registry read successfully.")
         logger.info(f"Successfully read global registry from {global_registry_path}")
     except FileNotFoundError:
         logger.warning(f"Global registry file not found at {global_registry_path}. Will create a new one.")
-        typer.echo(f"ℹ️ Global registry file not found at {global_registry_path}. A new registry will be created.")
+        reporter.echo(f"ℹ️ Global registry file not found at {global_registry_path}. A new registry will be created.")
         initial_registry_data = {} # Start with an empty registry
     except Exception as e:
         logger.exception(f"Unexpected error reading global registry from {global_registry_path}")
         msg = f"An unexpected error occurred while reading the global registry. Details: {e}"
-        typer.echo(f"❌ Error: {msg}", err=True)
+        reporter.echo(f"❌ Error: {msg}", err=True)
         raise RegistryReadError(msg) from e # Raise specific registry error
 
     compiled_count = 0
     failed_count = 0
     final_registry_data = initial_registry_data # Default to initial if no changes
+    manifest = None # Only used when compiling all agents
 
     if agent_slug: # Use the renamed parameter
         # --- Compile Single Agent ---
         logger.info(f"Compiler invoked for single agent slug: {agent_slug}") # Updated log message
-        typer.echo(f"--- Compiling Single Agent: {agent_slug} ---") # Updated echo message
+        reporter.echo(f"--- Compiling Single Agent: {agent_slug} ---") # Updated echo message
         try:
             # Pass agent_config_dir explicitly
             # Pass agent_slug to _compile_specific_agent
             # _compile_specific_agent now returns (metadata, success)
             # Construct the full path for the single agent case
             single_agent_config_path = agent_config_dir / f"{agent_slug}.yaml"
+            timings: Dict[str, float] = {}
             # Pass the constructed path
-            agent_metadata, success = _compile_specific_agent(
-                single_agent_config_path, initial_registry_data
-            )
+            started = time.perf_counter()
+            with profiling.stage("compile", files=1):
+                agent_metadata, success = _compile_specific_agent(
+                    single_agent_config_path, initial_registry_data, verbose=reporter.verbose, timings=timings,
+                    fragments_dir=prompt_includes.get_fragments_dir(agent_config_dir)
+                )
             if success:
                  # Update registry here for the single agent case
-                 final_registry_data['agents'][agent_slug] = agent_metadata
+                 final_registry_data = registry_manager.update_global_registry(final_registry_data, agent_metadata)
                  compiled_count = 1
             else:
                  # Should not happen if exceptions are raised correctly
                  failed_count = 1
                  compiled_count = 0
             compiled_count = 1
+            event = compile_report.agent_event(
+                single_agent_config_path, agent_metadata.get("slug", agent_slug),
+                compile_report.STATUS_COMPILED if success else compile_report.STATUS_FAILED, timings=timings
+            )
+            if reporter.profiler is not None:
+                event["trace"] = profiling.trace_info(started)
+            reporter.agent(event)
             # Success message printed by helper
         except AgentProcessingError as e: # agent_slug is still correct within the exception context
             # Error message already printed by helper
-            # Error message already printed by helper
-            typer.echo(f"\n❌ Compilation failed for agent: '{e.agent_slug}'. Registry not written.", err=True)
+            reporter.agent(compile_report.agent_event(
+                single_agent_config_path, agent_slug, compile_report.STATUS_FAILED, timings=timings, error=e
+            ))
+            reporter.echo(f"\n❌ Compilation failed for agent: '{e.agent_slug}'. Registry not written.", err=True)
             raise typer.Exit(code=1) # Exit on single agent failure
         except Exception as e:
             logger.exception(f"Unexpected error during single agent compilation flow for '{agent_slug}'") # Use agent_slug
-            typer.echo(f"❌ Unexpected Error during compilation for '{agent_slug}'. Details: {e}", err=True) # Use agent_slug
+            reporter.agent(compile_report.agent_event(
+                agent_config_dir / f"{agent_slug}.yaml", agent_slug, compile_report.STATUS_FAILED, error=e
+            ))
+            reporter.echo(f"❌ Unexpected Error during compilation for '{agent_slug}'. Details: {e}", err=True) # Use agent_slug
             raise typer.Exit(code=1)
 
     else:
         # --- Compile All Agents ---
         logger.info("Compiler invoked to compile all agents.")
-        typer.echo("--- Compiling All Agents ---")
+        reporter.echo("--- Compiling All Agents ---")
 
         # Configuration directory check is now inside _compile_all_agents
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+
+        # Unchanged configs are skipped using the manifest unless a full compile is requested
+        manifest_path = compile_manifest.get_manifest_path(global_registry_path)
+        if full:
+            logger.info("Full compile requested. Ignoring the compile manifest.")
+            manifest = compile_manifest.new_manifest(agent_config_dir)
+        else:
+            with profiling.stage("manifest.read"):
+                manifest = compile_manifest.read_manifest(manifest_path, agent_config_dir)
+
+        changed = None
+        if changed_since is not None:
+            reporter.echo(f"Listing changes since '{changed_since}'...")
+            try:
+                with profiling.stage("git"):
+                    changed = git_changes.changed_paths(agent_config_dir, changed_since)
+            except ChangeDetectionError as e:
+                logger.error(f"Could not list changes since '{changed_since}': {e}")
+                reporter.echo(f"❌ Error: Could not list changes since '{changed_since}'. Details: {e}", err=True)
+                raise typer.Exit(code=1)
 
         try:
             final_registry_data, compiled_count, failed_count = _compile_all_agents(
-                agent_config_dir, initial_registry_data
+                agent_config_dir, initial_registry_data, jobs=jobs, manifest=manifest, reporter=reporter,
+                batch_validate=batch_validate, include=include, scan_threads=scan_threads, changed=changed,
+                team_slugs=team_slugs
             )
         except Exception as e:
             logger.exception(f"Unexpected error during 'compile all' execution in directory {agent_config_dir}")
-            typer.echo(f"❌ Unexpected Error during 'compile all'. Details: {e}", err=True)
+            reporter.echo(f"❌ Unexpected Error during 'compile all'. Details: {e}", err=True)
             # Don't necessarily exit here, allow reporting below
             # Set counts to indicate failure
             failed_count = failed_count or 1 # Ensure failure is marked if exception occurred before loop finished
 
         # --- Report Results for Compile All ---
-        if compiled_count == 0 and failed_count == 0:
+        if compiled_count == 0 and failed_count == 0 and changed is not None:
+            reporter.echo(f"\nℹ️ No agent configurations affected by changes since '{changed_since}'. Registry not written.")
+        elif compiled_count == 0 and failed_count == 0 and team_slugs is not None:
+            reporter.echo(f"\nℹ️ No agent configurations found for team '{team}'. Registry not written.")
+        elif compiled_count == 0 and failed_count == 0:
             # This case might happen if the directory exists but contains no valid agent subdirs
             logger.warning(f"No valid agent configurations found to compile in {agent_config_dir}")
-            typer.echo(f"\nℹ️ No valid agent configurations found to compile in {agent_config_dir}. Registry not written.")
+            reporter.echo(f"\nℹ️ No valid agent configurations found to compile in {agent_config_dir}. Registry not written.")
             # Don't exit with error here, just don't write the registry
         elif failed_count > 0 and compiled_count == 0:
-            typer.echo(f"\n❌ Compilation finished. All {failed_count} attempted agent(s) failed. Registry not updated.", err=True)
+            reporter.echo(f"\n❌ Compilation finished. All {failed_count} attempted agent(s) failed. Registry not updated.", err=True)
             raise typer.Exit(code=1)
         elif failed_count > 0:
-            typer.echo(f"\n⚠️ Compilation finished with {failed_count} error(s). Registry will be written with {compiled_count} successful update(s).")
+            reporter.echo(f"\n⚠️ Compilation finished with {failed_count} error(s). Registry will be written with {compiled_count} successful update(s).")
         else: # compiled_count > 0 and failed_count == 0
-             typer.echo(f"\n✅ Successfully processed {compiled_count} agent(s).")
-             typer.echo(f"\n🎉 Finished compiling all {compiled_count} agents successfully.")
+             reporter.echo(f"\n✅ Successfully processed {compiled_count} agent(s).")
+             reporter.echo(f"\n🎉 Finished compiling all {compiled_count} agents successfully.")
 
 
     # --- Write Final Global Registry ---
@@ -333,20 +942,69 @@ def compile_agents(agent_slug: Optional[str] = None): # Renamed parameter
     # Write if at least one agent succeeded, even if others failed (for 'all' mode)
     # Write if the single agent succeeded (for 'single' mode)
     should_write_registry = compiled_count > 0
+    # Enabling the prompt store needs a full registry write, even if nothing else changed
+    enable_prompt_store = use_prompt_store and not prompt_store.is_enabled(global_registry_path)
+    with profiling.stage("diff"):
+        changes = registry_diff.diff_registries(initial_registry_data, final_registry_data)
+
+    if dry_run and should_write_registry:
+        reporter.registry_status = compile_report.REGISTRY_DRY_RUN
+        reporter.diff(changes)
+        reporter.echo(f"\nℹ️ Dry run: {global_registry_path} was not written.")
+        return
+    if should_write_registry and not changes.is_empty:
+        reporter.echo(f"\nRegistry changes: {changes.summary()}.")
+
+    # A compile that changed nothing leaves the registry untouched (a --full
+    # compile still rewrites it if its bytes differ)
+    registry_unchanged = not full and changes.is_empty and not enable_prompt_store
 
-    if should_write_registry:
-        typer.echo(f"\nWriting updated global registry to {global_registry_path}...")
+    if should_write_registry and registry_unchanged:
+        reporter.registry_status = compile_report.REGISTRY_UNCHANGED
+        reporter.echo(f"\nℹ️ Global registry at {global_registry_path} is already up to date. Registry not rewritten.")
+        logger.info("Registry write skipped as the compiled registry data is unchanged.")
+    elif should_write_registry and journal and agent_slug and not enable_prompt_store:
+        # Record just this agent in the registry journal instead of rewriting the whole file
+        reporter.echo(f"\nAppending '{agent_slug}' to the registry journal for {global_registry_path}...")
         try:
-            registry_manager.write_global_registry(
+            registry_manager.append_registry_journal(
+                global_registry_path, [{"op": "upsert", "mode": agent_metadata}]
+            )
+            reporter.registry_status = compile_report.REGISTRY_JOURNALED
+            if registry_manager.compact_registry_if_needed(global_registry_path):
+                reporter.echo(f"✅ Registry journal compacted into {global_registry_path}.")
+            else:
+                reporter.echo(f"✅ Registry journal updated. Run 'rawr compact' to materialize it for the editor.")
+        except Exception as e:
+            msg = f"An unexpected error occurred while writing the registry journal. Details: {e}"
+            logger.exception(msg)
+            reporter.echo(f"❌ Error: {msg}", err=True)
+            raise RegistryWriteError(msg) from e # Raise specific registry error
+    elif should_write_registry:
+        reporter.echo(f"\nWriting updated global registry to {global_registry_path}...")
+        try:
+            # Skip the write when nothing changed on disk, so editor file watchers don't reload
+            written = registry_manager.write_global_registry(
                 registry_path=global_registry_path,
-                registry_data=final_registry_data
+                registry_data=final_registry_data,
+                skip_unchanged=True,
+                use_prompt_store=use_prompt_store
             )
-            typer.echo(f"✅ Global registry successfully written.")
-            logger.info(f"Successfully wrote updated global registry to {global_registry_path}")
+            reporter.registry_status = (
+                compile_report.REGISTRY_WRITTEN if written is not False else compile_report.REGISTRY_UNCHANGED
+            )
+            if written is False:
+                reporter.echo(f"ℹ️ Global registry content is unchanged. Registry not rewritten.")
+                logger.info(f"Global registry at {global_registry_path} already matches the compiled data.")
+            elif prompt_store.is_enabled(global_registry_path):
+                reporter.echo(f"✅ Global registry written to the prompt store. Run 'rawr materialize' to update it for the editor.")
+            else:
+                reporter.echo(f"✅ Global registry successfully written.")
+                logger.info(f"Successfully wrote updated global registry to {global_registry_path}")
         except Exception as e:
             msg = f"An unexpected error occurred while writing the final global registry. Details: {e}"
             logger.exception(msg)
-            typer.echo(f"❌ Error: {msg}", err=True)
+            reporter.echo(f"❌ Error: {msg}", err=True)
             raise RegistryWriteError(msg) from e # Raise specific registry error
     elif not agent_slug and failed_count == 0 and compiled_count == 0: # Use agent_slug
          pass # Message already printed above for this case
@@ -355,8 +1013,33 @@ def compile_agents(agent_slug: Optional[str] = None): # Renamed parameter
     else: # Should not happen unless single agent failed (already handled)
          logger.debug("Registry write skipped as no agents were successfully compiled.")
 
+    # --- Write Team Partitions ---
+    # Partitions follow the registry as written (an unchanged registry keeps its
+    # own layout); each one is rewritten only if its content changed
+    if teams is not None and team_partitions and should_write_registry:
+        partitions_dir = agent_teams.get_partitions_dir(global_registry_path)
+        partition_source = initial_registry_data if registry_unchanged else final_registry_data
+        try:
+            with profiling.stage("partitions", teams=len(teams)):
+                written_partitions = agent_teams.write_team_partitions(partition_source, teams, global_registry_path)
+            reporter.echo(f"✅ {len(written_partitions)} of {len(teams)} team partition(s) updated in {partitions_dir}.")
+        except OSError as e:
+            # The global registry is already written; partitions are rebuilt on the next compile
+            logger.warning(f"Could not write team partitions to {partitions_dir}: {e}")
+            reporter.echo(f"⚠️ Could not write team partitions to {partitions_dir}: {e}", err=True)
+
+    # --- Persist the Compile Manifest ---
+    # Only after the registry is known to reflect the manifest's contents
+    if manifest is not None and should_write_registry:
+        try:
+            with profiling.stage("manifest.write"):
+                compile_manifest.write_manifest(manifest_path, manifest)
+        except OSError as e:
+            # A missing manifest only costs a full compile next time
+            logger.warning(f"Could not write compile manifest to {manifest_path}: {e}")
+
 
     # Final summary message for single agent success
     if agent_slug and compiled_count > 0: # Use agent_slug
-         typer.echo(f"\n🎉 Successfully compiled and updated global registry for agent: '{agent_slug}'") # Use agent_slug
+         reporter.echo(f"\n🎉 Successfully compiled and updated global registry for agent: '{agent_slug}'") # Use agent_slug
     # 'compile all' summary messages are handled within the 'else' block above
\ No newline at end of file
@@ -1,8 +1,9 @@
 # cli/config_loader.py
-import yaml
 import os
 from pathlib import Path
 import sys
+import time
+from typing import Mapping, Optional, Tuple
 
 # Determine the project root directory dynamically
 # Assumes this script is in 'cli/' subdirectory relative to the project root
@@ -15,12 +16,26 @@ LOCAL_CONFIG_PATH = PROJECT_ROOT / "rawr.config.local.yaml"
 DEFAULT_AGENT_CONFIG_DIR = PROJECT_ROOT / "cli/agent_config"
 DEFAULT_GLOBAL_REGISTRY_PATH = PROJECT_ROOT / ".rawr_registry/custom_modes.json"
 
+# Environment variables that override the config files, by settings key
+ENV_VARS = {
+    'agent_config_dir': 'RAWR_AGENT_CONFIG_DIR',
+    'global_registry_path': 'RAWR_GLOBAL_REGISTRY_PATH',
+}
+
+# Config files modified this recently may change again within the same mtime
+# tick, so their stat data alone is not trusted (as in compile_manifest)
+_RACY_WINDOW_NS = 2_000_000_000
+
 def load_config():
     """
     Loads configuration from default, local, and environment variables.
     Precedence: Env Vars > Local Config > Main Config > Code Defaults.
     Returns paths as absolute Path objects.
     """
+    return _resolve_settings(DEFAULT_CONFIG_PATH, LOCAL_CONFIG_PATH, os.environ)
+
+def _resolve_settings(main_config_path, local_config_path, environ):
+    """Merges code defaults, both config files and the environment (see `load_config`)."""
     # Start with code defaults
     config = {
         'agent_config_dir': DEFAULT_AGENT_CONFIG_DIR,
@@ -30,9 +45,10 @@ def load_config():
     # Helper to load and merge from a YAML file
     def merge_from_yaml(file_path, current_config):
         if file_path.exists() and file_path.is_file():
+            from . import yaml_io # Deferred: only needed when a config file is present
             try:
                 with open(file_path, 'r') as f:
-                    yaml_config = yaml.safe_load(f)
+                    yaml_config = yaml_io.load(f)
                     if isinstance(yaml_config, dict): # Ensure it's a dictionary
                         # Only update keys present in the YAML file
                         for key in current_config.keys():
@@ -42,28 +58,24 @@ def load_config():
                     else:
                          print(f"Warning: Config file {file_path} is not a valid dictionary. Ignoring.", file=sys.stderr)
 
-            except yaml.YAMLError as e:
+            except yaml_io.YAMLError as e:
                 print(f"Warning: Error parsing {file_path}: {e}. Using previous config values.", file=sys.stderr)
             except Exception as e:
                 print(f"Warning: Could not read {file_path}: {e}. Using previous config values.", file=sys.stderr)
         return current_config
 
     # 1. Load main config file (rawr.config.yaml)
-    config = merge_from_yaml(DEFAULT_CONFIG_PATH, config.copy()) # Use copy to avoid modifying defaults directly yet
+    config = merge_from_yaml(main_config_path, config.copy()) # Use copy to avoid modifying defaults directly yet
 
     # 2. Load local override config file (rawr.config.local.yaml)
-    config = merge_from_yaml(LOCAL_CONFIG_PATH, config.copy()) # Use copy, local overrides main
+    config = merge_from_yaml(local_config_path, config.copy()) # Use copy, local overrides main
 
     # 3. Load from environment variables (highest precedence)
-    env_agent_config_dir = os.getenv('RAWR_AGENT_CONFIG_DIR')
-    if env_agent_config_dir:
-        # Assume env var path is relative to CWD or absolute
-        config['agent_config_dir'] = Path(env_agent_config_dir).resolve()
-
-    env_global_registry_path = os.getenv('RAWR_GLOBAL_REGISTRY_PATH')
-    if env_global_registry_path:
-        # Assume env var path is relative to CWD or absolute
-        config['global_registry_path'] = Path(env_global_registry_path).resolve()
+    for key, env_var in ENV_VARS.items():
+        env_value = environ.get(env_var)
+        if env_value:
+            # Assume env var path is relative to CWD or absolute
+            config[key] = Path(env_value).resolve()
 
     # Ensure all paths are absolute Path objects at the end
     config['agent_config_dir'] = Path(config['agent_config_dir']).resolve()
@@ -71,17 +83,141 @@ def load_config():
 
     return config
 
-# Load config once on import to be used by other modules
-settings = load_config()
+
+class ConfigResolver:
+    """
+    Resolves the CLI settings on demand and memoizes them.
+
+    Constructing a resolver does no I/O. The settings are resolved on first
+    use and re-resolved only when one of the config files changes (by size and
+    mtime) or one of the `ENV_VARS` changes, so a long-running process picks up
+    edits without re-importing anything and a warm lookup costs two `stat`
+    calls. Overridden settings are returned as given, without touching the
+    config files at all.
+    """
+
+    def __init__(
+        self,
+        main_config_path: Optional[Path] = None,
+        local_config_path: Optional[Path] = None,
+        environ: Optional[Mapping[str, str]] = None,
+        **overrides
+    ):
+        """
+        Args:
+            main_config_path: The main config file. Defaults to `DEFAULT_CONFIG_PATH`
+                              (looked up when resolving, so it can be patched).
+            local_config_path: The local override file. Defaults to `LOCAL_CONFIG_PATH`.
+            environ: The environment to read `ENV_VARS` from. Defaults to `os.environ`.
+            **overrides: Settings (e.g. `agent_config_dir=...`) that take precedence
+                         over everything else. None values are ignored.
+
+        Raises:
+            TypeError: If an override is not a known setting.
+        """
+        unknown = set(overrides) - set(ENV_VARS)
+        if unknown:
+            raise TypeError(f"Unknown setting(s): {', '.join(sorted(unknown))}")
+        self.main_config_path = main_config_path
+        self.local_config_path = local_config_path
+        self.environ = environ
+        self.overrides = {key: Path(value).resolve() for key, value in overrides.items() if value is not None}
+        self._key = None
+        self._settings = None
+
+    def _config_paths(self) -> Tuple[Path, Path]:
+        return (
+            self.main_config_path if self.main_config_path is not None else DEFAULT_CONFIG_PATH,
+            self.local_config_path if self.local_config_path is not None else LOCAL_CONFIG_PATH,
+        )
+
+    def _inputs_key(self) -> Optional[tuple]:
+        """Returns what the settings depend on, or None if a config file is too fresh to trust."""
+        environ = os.environ if self.environ is None else self.environ
+        key = [tuple(environ.get(env_var) for env_var in ENV_VARS.values())]
+        for path in self._config_paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                key.append((str(path), None, None))
+                continue
+            if stat.st_mtime_ns >= time.time_ns() - _RACY_WINDOW_NS:
+                return None
+            key.append((str(path), stat.st_size, stat.st_mtime_ns))
+        return tuple(key)
+
+    def settings(self) -> dict:
+        """Returns all settings as absolute paths, re-resolving them if their inputs changed."""
+        if len(self.overrides) == len(ENV_VARS):
+            return dict(self.overrides)
+        key = self._inputs_key()
+        if self._settings is None or key is None or key != self._key:
+            main_config_path, local_config_path = self._config_paths()
+            environ = os.environ if self.environ is None else self.environ
+            self._settings = _resolve_settings(main_config_path, local_config_path, environ)
+            self._key = key
+        return {**self._settings, **self.overrides}
+
+    def get(self, key: str) -> Path:
+        """Returns one setting, resolving the config only if it is not overridden."""
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.settings()[key]
+
+    @property
+    def agent_config_dir(self) -> Path:
+        return self.get('agent_config_dir')
+
+    @property
+    def global_registry_path(self) -> Path:
+        return self.get('global_registry_path')
+
+    def with_overrides(self, **overrides) -> "ConfigResolver":
+        """
+        Returns a resolver with some settings overridden (None values are ignored).
+
+        The new resolver reads the same config files and environment and starts
+        with this resolver's memoized settings.
+        """
+        resolver = ConfigResolver(
+            self.main_config_path, self.local_config_path, self.environ, **{**self.overrides, **overrides}
+        )
+        resolver._key, resolver._settings = self._key, self._settings
+        return resolver
+
+
+_default_resolver: Optional[ConfigResolver] = None
+
+def get_resolver() -> ConfigResolver:
+    """Returns the process-wide resolver (by default, for the project's config files and `os.environ`)."""
+    global _default_resolver
+    if _default_resolver is None:
+        _default_resolver = ConfigResolver()
+    return _default_resolver
+
+def set_resolver(resolver: Optional[ConfigResolver]) -> Optional[ConfigResolver]:
+    """
+    Replaces the process-wide resolver, e.g. with one whose paths are overridden
+    (see `ConfigResolver.with_overrides`). This is the only way to redirect the
+    paths used by commands that are not given a resolver.
+
+    Args:
+        resolver: The new resolver, or None to go back to the config files and environment.
+
+    Returns:
+        The previous resolver (None if the default one was not created yet),
+        so callers can restore it.
+    """
+    global _default_resolver
+    previous, _default_resolver = _default_resolver, resolver
+    return previous
 
 # Provide accessors that return absolute Path objects
 def get_agent_config_dir() -> Path:
-    # Fallback needed if initial loading failed completely for some reason
-    return settings.get('agent_config_dir', DEFAULT_AGENT_CONFIG_DIR).resolve()
+    return get_resolver().agent_config_dir
 
 def get_global_registry_path() -> Path:
-     # Fallback needed
-    return settings.get('global_registry_path', DEFAULT_GLOBAL_REGISTRY_PATH).resolve()
+    return get_resolver().global_registry_path
 
 if __name__ == '__main__':
     # Example usage/test
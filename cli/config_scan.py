@@ -0,0 +1,171 @@
+# cli/config_scan.py
+"""
+Discovery of agent config files in the agent config directory.
+
+`scan_configs` walks the directory with `os.scandir` and returns the files
+matching an include glob (`constants.DEFAULT_CONFIG_GLOB`, i.e. every
+`.yaml` file, unless configured otherwise, e.g. `*/config.yaml`). Paths
+listed in `.rawrignore` (`constants.CONFIG_IGNORE_FILENAME`) at the top of
+the directory are skipped, and ignored directories are never entered, nor
+are directories the include glob cannot match anything in. Large trees can
+be walked by a thread pool, one directory per task.
+
+`.rawrignore` holds one pattern per line (`#` starts a comment line), in a
+subset of gitignore syntax:
+
+- `drafts/` (trailing slash): directories only.
+- `*.bak.yaml` (no slash): matches the name at any depth.
+- `/vendor` or `team/old/*` (a slash at the start or in the middle):
+  matches the path relative to the agent config directory; `**` matches
+  any number of directories.
+
+Negated (`!`) patterns are not supported.
+"""
+import concurrent.futures
+import fnmatch
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from . import constants
+
+logger = logging.getLogger(__name__)
+
+_Parts = Tuple[str, ...] # A path relative to the scanned directory, split into names
+
+
+def _match_parts(parts: Sequence[str], pattern: Sequence[str]) -> bool:
+    """Matches path parts against glob parts, where a '**' part matches any number of names."""
+    if not pattern:
+        return not parts
+    head, rest = pattern[0], pattern[1:]
+    if head == "**":
+        return any(_match_parts(parts[index:], rest) for index in range(len(parts) + 1))
+    return bool(parts) and fnmatch.fnmatchcase(parts[0], head) and _match_parts(parts[1:], rest)
+
+
+class PathGlob:
+    """A glob over paths relative to the scanned directory, e.g. '*/config.yaml' or '**/*.yaml'."""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.parts = tuple(part for part in pattern.strip("/").split("/") if part)
+
+    def matches(self, parts: _Parts) -> bool:
+        return _match_parts(parts, self.parts)
+
+    def may_contain(self, dir_parts: _Parts) -> bool:
+        """Returns False if no file under the directory can match, so it need not be walked."""
+        for index, name in enumerate(dir_parts):
+            if index < len(self.parts) and self.parts[index] == "**":
+                return True
+            if index >= len(self.parts) - 1: # No pattern part left for the file name
+                return False
+            if not fnmatch.fnmatchcase(name, self.parts[index]):
+                return False
+        return True
+
+
+class IgnoreRules:
+    """Patterns of paths to skip (see the module docstring for the syntax)."""
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.rules: List[Tuple[Tuple[str, ...], bool, bool]] = [] # (pattern parts, anchored, directories only)
+        for line in patterns:
+            pattern = line.strip()
+            if not pattern or pattern.startswith("#"):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            self.rules.append((tuple(part for part in pattern.split("/") if part), anchored, dir_only))
+
+    @classmethod
+    def from_dir(cls, base_dir: Path, extra: Iterable[str] = ()) -> "IgnoreRules":
+        """Reads the ignore file of a directory (if any), adding the extra patterns."""
+        patterns = list(extra)
+        ignore_path = base_dir / constants.CONFIG_IGNORE_FILENAME
+        try:
+            patterns.extend(ignore_path.read_text(encoding="utf-8").splitlines())
+        except FileNotFoundError:
+            pass
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Could not read {ignore_path}: {e}. No ignore rules applied from it.")
+        return cls(patterns)
+
+    def ignores(self, parts: _Parts, is_dir: bool) -> bool:
+        """Returns True if the path (relative to the scanned directory) is ignored."""
+        for pattern, anchored, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                if _match_parts(parts, pattern):
+                    return True
+            elif fnmatch.fnmatchcase(parts[-1], pattern[0]):
+                return True
+        return False
+
+
+def scan_configs(
+    base_dir: Path,
+    include: str = constants.DEFAULT_CONFIG_GLOB,
+    ignore: Optional[IgnoreRules] = None,
+    threads: int = 1
+) -> List[Path]:
+    """
+    Finds the agent config files in a directory.
+
+    Like `Path.rglob`, symlinked directories are not entered; symlinked files
+    are found. Unreadable directories are skipped with a warning.
+
+    Args:
+        base_dir: The agent config directory.
+        include: Glob that config paths (relative to `base_dir`) must match.
+        ignore: Paths to skip. Defaults to the rules in `base_dir`'s ignore file.
+        threads: Number of threads scanning directories; 1 walks serially.
+
+    Returns:
+        The matching files, sorted.
+    """
+    glob = PathGlob(include)
+    ignore = IgnoreRules.from_dir(base_dir) if ignore is None else ignore
+
+    def scan_dir(dir_path: str, dir_parts: _Parts) -> Tuple[List[Path], List[Tuple[str, _Parts]]]:
+        files: List[Path] = []
+        subdirs: List[Tuple[str, _Parts]] = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    parts = dir_parts + (entry.name,)
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if ignore.ignores(parts, is_dir):
+                            continue
+                        if is_dir:
+                            if glob.may_contain(parts):
+                                subdirs.append((entry.path, parts))
+                        elif glob.matches(parts) and entry.is_file():
+                            files.append(Path(entry.path))
+                    except OSError:
+                        continue # Removed while scanning
+        except OSError as e:
+            logger.warning(f"Could not scan {dir_path}: {e}")
+        return files, subdirs
+
+    found: List[Path] = []
+    pending = [(str(base_dir), ())]
+    if threads > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            while pending: # One level of the tree per round
+                next_level = []
+                for files, subdirs in executor.map(lambda item: scan_dir(*item), pending):
+                    found.extend(files)
+                    next_level.extend(subdirs)
+                pending = next_level
+    else:
+        while pending:
+            files, subdirs = scan_dir(*pending.pop())
+            found.extend(files)
+            pending.extend(subdirs)
+    return sorted(found)
@@ -0,0 +1,136 @@
+# cli/config_validation.py
+"""
+Batch validation of agent configs against `GlobalAgentConfig`.
+
+`validate_configs` validates every loaded config in one call through a
+prebuilt `TypeAdapter(List[GlobalAgentConfig])`: the validator is built once
+per process, and pydantic raises at most one ValidationError for the whole
+batch instead of one per invalid file. Its errors are split back per config
+file into one ValidationReport.
+
+Errors are located in their source file (`file:line:col`) through the
+`yaml_io.SourceMarks` kept from loading each config, so locating them does
+not parse anything again.
+"""
+import functools
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from . import yaml_io
+from .models import GlobalAgentConfig
+
+
+@dataclass
+class ValidationIssue:
+    """One validation error in one config file."""
+    path: Path
+    loc: Tuple[Any, ...]  # Location within the config, e.g. ('groups', 1)
+    message: str
+    line: Optional[int] = None  # 1-based source location of the offending key or item, if known
+    column: Optional[int] = None
+
+    def format(self) -> str:
+        """Returns the issue as 'path:line:col: location: message'."""
+        where = f"{self.path}:{self.line}:{self.column}" if self.line is not None else str(self.path)
+        location = ".".join(str(part) for part in self.loc) or "(config)"
+        return f"{where}: {location}: {self.message}"
+
+
+@dataclass
+class ValidationReport:
+    """The outcome of validating a batch of configs."""
+    validated: int = 0  # Number of configs in the batch
+    issues: List[ValidationIssue] = field(default_factory=list)  # In batch order
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    @property
+    def failed_paths(self) -> List[Path]:
+        """Returns the config files with at least one issue, in batch order."""
+        return list(dict.fromkeys(issue.path for issue in self.issues))
+
+    def issues_for(self, path: Path) -> List[ValidationIssue]:
+        return [issue for issue in self.issues if issue.path == path]
+
+    def format_lines(self) -> List[str]:
+        """Returns the report as human-readable lines, one per issue."""
+        if self.ok:
+            return [f"✅ Validated {self.validated} config(s)."]
+        lines = [f"❌ Validation failed for {len(self.failed_paths)} of {self.validated} config(s):"]
+        lines.extend(f"  {issue.format()}" for issue in self.issues)
+        return lines
+
+
+@functools.lru_cache(maxsize=None)
+def get_adapter() -> TypeAdapter:
+    """Returns the process-wide validator for a list of configs."""
+    return TypeAdapter(List[GlobalAgentConfig])
+
+
+def issues_from_errors(
+    path: Path,
+    errors: List[Dict[str, Any]],
+    marks: Optional[yaml_io.SourceMarks] = None
+) -> List[ValidationIssue]:
+    """
+    Converts pydantic errors for one config into located issues.
+
+    Args:
+        path: The config file.
+        errors: `ValidationError.errors()` of the config (locations relative to it).
+        marks: The config's source marks (see `yaml_io.load_with_marks`).
+    """
+    issues = []
+    for error in errors:
+        loc = tuple(error["loc"])
+        location = marks.locate(loc) if marks is not None else None
+        line, column = location if location is not None else (None, None)
+        issues.append(ValidationIssue(path, loc, error["msg"], line, column))
+    return issues
+
+
+def validate_configs(
+    configs: Sequence[Tuple[Path, Dict[str, Any], Optional[yaml_io.SourceMarks]]]
+) -> Tuple[List[Optional[GlobalAgentConfig]], ValidationReport]:
+    """
+    Validates a batch of parsed configs in one pass.
+
+    Args:
+        configs: (config path, parsed config data, source marks or None) per
+                 config. The source marks are only used to locate errors.
+
+    Returns:
+        A tuple containing:
+            - models: The validated config per input, in order; None for
+                      configs with validation errors.
+            - report: The validation issues of the whole batch.
+    """
+    report = ValidationReport(validated=len(configs))
+    adapter = get_adapter()
+    data = [config_data for _, config_data, _ in configs]
+    try:
+        return adapter.validate_python(data), report
+    except ValidationError as e:
+        errors = e.errors(include_url=False)
+
+    # Errors come in list order; their locations start with the config's index
+    by_index: Dict[int, List[Dict[str, Any]]] = {}
+    for error in errors:
+        by_index.setdefault(error["loc"][0], []).append({**error, "loc": error["loc"][1:]})
+    failed = set(by_index)
+    for index, config_errors in by_index.items():
+        path, _, marks = configs[index]
+        report.issues.extend(issues_from_errors(path, config_errors, marks))
+
+    # A failing item fails the whole list, so the valid configs are validated
+    # again as their own batch (which now passes) to get their models
+    valid = [index for index in range(len(configs)) if index not in failed]
+    models: List[Optional[GlobalAgentConfig]] = [None] * len(configs)
+    for index, model in zip(valid, adapter.validate_python([data[index] for index in valid])):
+        models[index] = model
+    return models, report
@@ -31,8 +31,56 @@ ROLE_DEFINITION_HEADINGS = [
     MD_HEADING_ROLE,
 ]
 
+# List of headings whose sections are concatenated into the custom instructions
+CUSTOM_INSTRUCTIONS_HEADINGS = [
+    MD_HEADING_CUSTOM_INSTRUCTIONS,
+    MD_HEADING_MODE_INSTRUCTIONS,
+    MD_HEADING_SOP,
+]
+
 # --- Default Paths/Files ---
 DEFAULT_CONFIG_PATH = "cli/config.yaml"
+# Agent prompt directory synced by `sync` (relative to the project root), and
+# the prompt file inside each agent's directory.
+DEFAULT_AGENTS_DIR = "ai/agents"
+PROMPT_FILENAME = "prompt.md"
+# Team -> agent slugs (see cli/agent_teams.py), in the agent config or agent prompt directory.
+TEAMS_FILENAME = "agent_teams.txt"
+# Shared prompt fragments for include directives (see cli/prompt_includes.py),
+# inside the agent config directory.
+FRAGMENTS_DIRNAME = "_fragments"
+# Ignore rules for agent config discovery (see cli/config_scan.py), in the
+# agent config directory, and the files compiled by default.
+CONFIG_IGNORE_FILENAME = ".rawrignore"
+DEFAULT_CONFIG_GLOB = "**/*.yaml"
+# Stored next to the global registry; used for incremental compiles.
+COMPILE_MANIFEST_FILENAME = "compile_manifest.json"
+# Appended to the registry filename for its write-ahead journal.
+REGISTRY_JOURNAL_SUFFIX = ".journal"
+# The journal is folded into the registry JSON once it grows past this size.
+REGISTRY_JOURNAL_COMPACT_THRESHOLD_BYTES = 1024 * 1024
+# Reverse index (group/fileRegex -> slugs), stored next to the global registry.
+REGISTRY_INDEX_FILENAME = "registry_index.json"
+# Content-addressed prompt store (see cli/prompt_store.py), stored next to the global registry.
+PROMPT_STORE_DIRNAME = "prompt_store"
+# Per-team registry partitions (`compile --team-partitions`), stored next to the global registry.
+TEAM_PARTITIONS_DIRNAME = "team_registries"
+# Unix socket of the `watch` daemon, stored next to the global registry.
+DAEMON_SOCKET_FILENAME = "compile_daemon.sock"
+
+# --- Compile Output ---
+# `rawr compile --format`: human-readable messages or one JSON record per agent.
+COMPILE_OUTPUT_TEXT = "text"
+COMPILE_OUTPUT_NDJSON = "ndjson"
+COMPILE_OUTPUT_FORMATS = (COMPILE_OUTPUT_TEXT, COMPILE_OUTPUT_NDJSON)
+# Number of slowest files listed by `rawr compile --profile`.
+PROFILE_TOP_FILES = 10
+
+# --- Watch Daemon Timing ---
+# Bursts of saves closer together than this are compiled as one batch.
+WATCH_DEBOUNCE_SECONDS = 0.3
+# How often the agent config directory is polled for changes.
+WATCH_POLL_INTERVAL_SECONDS = 0.5
 
 # --- User-Facing Messages (Example) ---
 # Add common error/success message formats if needed
\ No newline at end of file
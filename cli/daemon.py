@@ -0,0 +1,386 @@
+# cli/daemon.py
+"""
+Resident compile daemon (`rawr watch`).
+
+The daemon keeps the compiler imported, polls the agent config directory for
+changes and recompiles once a burst of saves has settled. Unchanged configs
+are skipped through the compile manifest, so only the affected agents are
+re-processed and each burst produces a single registry write.
+
+It also listens on a Unix socket next to the global registry. `rawr compile`
+hands its request to a running daemon over that socket instead of paying the
+interpreter start-up and import cost itself, and falls back to compiling
+locally when no daemon answers.
+
+Wire protocol: the client sends one JSON object terminated by a newline and
+the daemon answers with one JSON object, then closes the connection.
+"""
+import contextlib
+import io
+import itertools
+import json
+import logging
+import os
+import selectors
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import typer
+
+from . import config_loader
+from . import config_scan
+from . import constants
+from .exceptions import DaemonError
+
+logger = logging.getLogger(__name__)
+
+# Seconds a client waits to connect to, or send a request to, the daemon
+CLIENT_CONNECT_TIMEOUT = 1.0
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def get_socket_path(registry_path: Path) -> Path:
+    """Returns the daemon socket path that belongs to the given registry file."""
+    return registry_path.with_name(constants.DAEMON_SOCKET_FILENAME)
+
+
+def is_supported() -> bool:
+    """Returns True if the platform supports the Unix sockets the daemon listens on."""
+    return hasattr(socket, "AF_UNIX")
+
+
+def snapshot_configs(agent_config_dir: Path) -> Snapshot:
+    """
+    Returns the (size, mtime_ns) of every agent config file and prompt fragment in the directory.
+
+    Config files are found as the compiler finds them (see `config_scan`), so
+    ignored paths are not watched; the ignore file itself is.
+    """
+    snapshot: Snapshot = {}
+    if not agent_config_dir.is_dir():
+        return snapshot
+    ignore = config_scan.IgnoreRules.from_dir(agent_config_dir, extra=[f"/{constants.FRAGMENTS_DIRNAME}/"])
+    config_paths = config_scan.scan_configs(agent_config_dir, ignore=ignore)
+    # Fragments (see cli/prompt_includes.py) can have any extension
+    fragment_paths = (agent_config_dir / constants.FRAGMENTS_DIRNAME).rglob('*')
+    ignore_file = [agent_config_dir / constants.CONFIG_IGNORE_FILENAME]
+    for config_path in itertools.chain(config_paths, fragment_paths, ignore_file):
+        try:
+            stat = config_path.stat()
+        except OSError:
+            continue # Deleted between listing and stat
+        snapshot[config_path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def changed_paths(old: Snapshot, new: Snapshot) -> List[Path]:
+    """Returns the sorted config paths that were added, modified or deleted between two snapshots."""
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    changed.update(path for path in old if path not in new)
+    return sorted(changed)
+
+
+def _request_count(request: Dict[str, Any], key: str) -> Optional[int]:
+    """
+    Returns a positive count from a client request, or None if it is not given.
+
+    Raises:
+        ValueError: If the value is not a positive integer.
+    """
+    value = request.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"Invalid {key}: {value!r}")
+    return value
+
+
+def run_compile(
+    agent_slug: Optional[str] = None,
+    jobs: Optional[int] = None,
+    full: bool = False,
+    journal: bool = False,
+    output_format: str = constants.COMPILE_OUTPUT_TEXT,
+    quiet: bool = False,
+    config: Optional[config_loader.ConfigResolver] = None,
+    scan_threads: int = 1
+) -> Tuple[int, str, str]:
+    """
+    Runs `compiler.compile_agents` in-process with its console output captured.
+
+    Args:
+        config: The paths to compile (see `compiler.compile_agents`).
+        scan_threads: Number of threads walking the agent config directory.
+
+    Returns:
+        A tuple of (exit_code, stdout, stderr).
+    """
+    from . import compiler # Deferred so a client handing off a compile never imports it
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            compiler.compile_agents(
+                agent_slug=agent_slug, jobs=jobs, full=full, journal=journal,
+                output_format=output_format, quiet=quiet, config=config, scan_threads=scan_threads
+            )
+        except typer.Exit as e:
+            exit_code = e.exit_code
+        except Exception as e:
+            # Mirrors the error handling of the `compile` command
+            logger.exception(f"Unexpected error during agent compilation triggered from the daemon: {e}")
+            typer.echo(f"❌ An unexpected error occurred during compilation. Details: {e}", err=True)
+            exit_code = 1
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+
+class CompileDaemon:
+    """
+    Watches an agent config directory and serves compile requests on a Unix socket.
+
+    All work happens on a single thread, so a watch-triggered compile and a
+    client request never run concurrently.
+    """
+
+    def __init__(
+        self,
+        agent_config_dir: Path,
+        registry_path: Path,
+        jobs: Optional[int] = None,
+        debounce: float = constants.WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = constants.WATCH_POLL_INTERVAL_SECONDS
+    ):
+        # Fixed for the daemon's lifetime: edits to the config files or the
+        # environment must not move compiles away from the watched directory
+        self.config = config_loader.ConfigResolver().with_overrides(
+            agent_config_dir=agent_config_dir, global_registry_path=registry_path
+        )
+        self.agent_config_dir = self.config.agent_config_dir
+        self.registry_path = self.config.global_registry_path
+        self.socket_path = get_socket_path(registry_path)
+        self.jobs = jobs
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._snapshot: Snapshot = {}
+        self._pending: Set[Path] = set()
+        self._last_change: Optional[float] = None
+        self._stopping = False
+
+    def stop(self):
+        """Asks the serve loop to exit after its current iteration."""
+        self._stopping = True
+
+    # --- File watching ---
+
+    def poll(self, now: Optional[float] = None) -> bool:
+        """
+        Checks the config directory for changes and compiles once they have settled.
+
+        Args:
+            now: The current monotonic time. Defaults to `time.monotonic()`.
+
+        Returns:
+            True if a compile was run.
+        """
+        if now is None:
+            now = time.monotonic()
+        snapshot = snapshot_configs(self.agent_config_dir)
+        changed = changed_paths(self._snapshot, snapshot)
+        self._snapshot = snapshot
+        if changed:
+            self._pending.update(changed)
+            self._last_change = now
+            logger.debug(f"Detected {len(changed)} changed agent config(s); waiting for further changes.")
+
+        if self._pending and now - self._last_change >= self.debounce:
+            self._compile_pending()
+            return True
+        return False
+
+    def _compile_pending(self):
+        names = ", ".join(path.relative_to(self.agent_config_dir).as_posix() for path in sorted(self._pending))
+        self._pending.clear()
+        typer.echo(f"\n🔄 Change detected in: {names}. Recompiling...")
+        exit_code, out, err = run_compile(jobs=self.jobs, config=self.config)
+        if out:
+            typer.echo(out, nl=False)
+        if err:
+            typer.echo(err, nl=False, err=True)
+        if exit_code:
+            typer.echo("⚠️ Compilation failed. Waiting for the next change...", err=True)
+
+    def _timeout(self) -> float:
+        """Seconds until the next poll, shortened so a settled burst is not kept waiting."""
+        if not self._pending:
+            return self.poll_interval
+        remaining = self._last_change + self.debounce - time.monotonic()
+        return max(0.0, min(self.poll_interval, remaining))
+
+    # --- Socket serving ---
+
+    def _bind(self) -> socket.socket:
+        if not is_supported():
+            raise DaemonError("The compile daemon requires Unix domain sockets, which this platform does not support.")
+        if self.socket_path.exists():
+            existing = _connect(self.socket_path)
+            if existing is not None:
+                existing.close()
+                raise DaemonError(f"A compile daemon is already listening on {self.socket_path}.")
+            logger.info(f"Removing stale daemon socket {self.socket_path}")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(str(self.socket_path))
+            server.listen()
+        except OSError as e:
+            server.close()
+            raise DaemonError(f"Could not listen on {self.socket_path}: {e}") from e
+        return server
+
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs one client request and returns the response to send back."""
+        if request.get("command") != "compile":
+            return {"status": "rejected", "reason": f"Unknown command: {request.get('command')!r}"}
+        # Only serve clients that agree on which files the daemon compiles
+        if (
+            request.get("agent_config_dir") != str(self.agent_config_dir)
+            or request.get("registry_path") != str(self.registry_path)
+        ):
+            return {"status": "rejected", "reason": "Daemon serves a different agent config directory or registry."}
+
+        try:
+            jobs = _request_count(request, "jobs") or self.jobs
+            scan_threads = _request_count(request, "scan_threads") or 1
+        except ValueError as e:
+            return {"status": "rejected", "reason": str(e)}
+
+        exit_code, out, err = run_compile(
+            agent_slug=request.get("agent_slug"),
+            jobs=jobs,
+            full=bool(request.get("full")),
+            journal=bool(request.get("journal")),
+            output_format=request.get("output_format") or constants.COMPILE_OUTPUT_TEXT,
+            quiet=bool(request.get("quiet")),
+            config=self.config,
+            scan_threads=scan_threads,
+        )
+        return {"status": "ok", "exit_code": exit_code, "stdout": out, "stderr": err}
+
+    def _serve_client(self, conn: socket.socket):
+        with conn:
+            try:
+                conn.settimeout(CLIENT_CONNECT_TIMEOUT)
+                with conn.makefile('rb') as reader:
+                    request = json.loads(reader.readline())
+                if not isinstance(request, dict):
+                    raise ValueError("Request is not a JSON object.")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring malformed daemon request: {e}")
+                return
+            logger.info(f"Serving {request.get('command')} request for {request.get('agent_slug') or 'all agents'}")
+            response = self.handle_request(request)
+            try:
+                conn.settimeout(None)
+                conn.sendall(json.dumps(response).encode('utf-8') + b"\n")
+            except OSError as e:
+                logger.warning(f"Could not send daemon response: {e}")
+
+    def serve(self):
+        """
+        Compiles once, then watches for changes and serves requests until stopped.
+
+        Raises:
+            DaemonError: If the socket cannot be created or another daemon is running.
+        """
+        server = self._bind()
+        typer.echo(f"👀 Watching {self.agent_config_dir} (socket: {self.socket_path}). Press Ctrl+C to stop.")
+        try:
+            # Bring the registry up to date before waiting for changes
+            self._snapshot = snapshot_configs(self.agent_config_dir)
+            self._pending = set(self._snapshot)
+            self._last_change = time.monotonic() - self.debounce
+            with selectors.DefaultSelector() as selector:
+                selector.register(server, selectors.EVENT_READ)
+                while not self._stopping:
+                    self.poll()
+                    for _key, _events in selector.select(timeout=self._timeout()):
+                        conn, _ = server.accept()
+                        self._serve_client(conn)
+        finally:
+            server.close()
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+
+
+def _connect(socket_path: Path) -> Optional[socket.socket]:
+    """Connects to a daemon socket, returning None if nothing is listening."""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CLIENT_CONNECT_TIMEOUT)
+    try:
+        client.connect(str(socket_path))
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def request_compile(
+    registry_path: Path,
+    agent_config_dir: Path,
+    agent_slug: Optional[str] = None,
+    jobs: Optional[int] = None,
+    full: bool = False,
+    journal: bool = False,
+    output_format: str = constants.COMPILE_OUTPUT_TEXT,
+    quiet: bool = False,
+    scan_threads: int = 1
+) -> Optional[Dict[str, Any]]:
+    """
+    Hands a compile request to a running daemon.
+
+    Returns:
+        The daemon's response (with `exit_code`, `stdout` and `stderr`), or None
+        if no daemon is running for this registry or it declined the request.
+        The caller should compile locally in that case.
+    """
+    socket_path = get_socket_path(registry_path)
+    if not is_supported() or not socket_path.exists():
+        return None
+    client = _connect(socket_path)
+    if client is None:
+        logger.info(f"No compile daemon is listening on {socket_path}. Compiling locally.")
+        return None
+
+    request = {
+        "command": "compile",
+        "agent_config_dir": str(agent_config_dir),
+        "registry_path": str(registry_path),
+        "agent_slug": agent_slug,
+        "jobs": jobs,
+        "full": full,
+        "journal": journal,
+        "output_format": output_format,
+        "quiet": quiet,
+        "scan_threads": scan_threads,
+        "pid": os.getpid(),
+    }
+    with client:
+        try:
+            client.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            client.settimeout(None) # A compile may take a while
+            with client.makefile('rb') as reader:
+                response = json.loads(reader.readline())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Compile daemon on {socket_path} did not answer: {e}. Compiling locally.")
+            return None
+
+    if not isinstance(response, dict) or response.get("status") != "ok":
+        reason = response.get("reason") if isinstance(response, dict) else response
+        logger.info(f"Compile daemon declined the request: {reason}. Compiling locally.")
+        return None
+    return response
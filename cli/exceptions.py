@@ -24,6 +24,10 @@ class AgentCompileError(AgentProcessingError):
     """Exception for errors during metadata extraction or registry update."""
     pass
 
+class FragmentIncludeError(Exception):
+    """Exception for prompt fragment include directives that cannot be resolved."""
+    pass
+
 class RegistryError(Exception):
     """Base exception for registry-related errors."""
     pass
@@ -34,4 +38,16 @@ class RegistryReadError(RegistryError):
 
 class RegistryWriteError(RegistryError):
     """Exception for errors writing the registry file."""
-    pass
\ No newline at end of file
+    pass
+
+class DaemonError(Exception):
+    """Exception for errors starting or talking to the compile daemon."""
+    pass
+
+class ChangeDetectionError(Exception):
+    """Exception for errors listing changed files with git."""
+    pass
+
+class TeamFileError(Exception):
+    """Exception for an agent team file that cannot be read or parsed, or an unknown team."""
+    pass
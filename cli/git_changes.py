@@ -0,0 +1,106 @@
+# cli/git_changes.py
+"""
+Agent configs affected by the changes since a git revision.
+
+`changed_paths` asks the local git repository (no network access) for the
+files under the agent config directory that differ from a revision:
+committed, staged and unstaged changes, plus untracked files.
+`affected_configs` maps those files to the agent configs to recompile, which
+is what `rawr compile --changed-since <rev>` compiles.
+"""
+import subprocess
+from pathlib import Path
+from typing import Iterable, List, Set
+
+from . import prompt_includes
+from . import yaml_io
+from .exceptions import ChangeDetectionError
+
+
+def _git(cwd: Path, *args: str) -> List[str]:
+    """Runs a git command that prints NUL-separated paths and returns them."""
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=False)
+    except FileNotFoundError as e:
+        raise ChangeDetectionError("git is not installed or not on PATH.") from e
+    if result.returncode != 0:
+        raise ChangeDetectionError(f"'git {args[0]}' failed in {cwd}: {result.stderr.strip()}")
+    return [name for name in result.stdout.split("\0") if name]
+
+
+def changed_paths(base_dir: Path, rev: str) -> List[Path]:
+    """
+    Returns the files under a directory that changed since a revision.
+
+    Deleted files are included, so callers should not expect every path to exist.
+
+    Args:
+        base_dir: A directory inside a git work tree (e.g. the agent config directory).
+        rev: Any revision git understands (e.g. 'origin/main', 'HEAD~3', a commit hash).
+
+    Returns:
+        The absolute changed paths under `base_dir`, sorted.
+
+    Raises:
+        ChangeDetectionError: If the directory is not in a git work tree, the
+                              revision is unknown, or git cannot be run.
+    """
+    if rev.startswith("-"):
+        raise ChangeDetectionError(f"Invalid revision: {rev!r}")
+    if not base_dir.is_dir():
+        raise ChangeDetectionError(f"Agent config directory not found: {base_dir}")
+    # Paths are printed relative to base_dir, which limits them to it
+    names = _git(base_dir, "diff", "--name-only", "--relative", "-z", rev, "--", ".")
+    names += _git(base_dir, "ls-files", "--others", "--exclude-standard", "-z", "--", ".")
+    return sorted({base_dir / name for name in names})
+
+
+def affected_configs(config_paths: Iterable[Path], changed: Iterable[Path], base_dir: Path) -> List[Path]:
+    """
+    Selects the agent configs that a set of changed files affects.
+
+    A config is affected if it changed, if another file in its own agent
+    directory changed (e.g. the `prompt.md` next to `agent/config.yaml`;
+    not for configs directly in `base_dir`), or if a prompt fragment it
+    includes, directly or through other fragments, changed.
+
+    Args:
+        config_paths: The candidate config files (e.g. from `config_scan.scan_configs`).
+        changed: Changed files (see `changed_paths`).
+        base_dir: The agent config directory.
+
+    Returns:
+        The affected configs, in the order of `config_paths`.
+    """
+    changed = set(changed)
+    changed_dirs = {path.parent for path in changed}
+    fragments_dir = prompt_includes.get_fragments_dir(base_dir)
+    changed_fragments: Set[str] = {
+        path.relative_to(fragments_dir).as_posix() for path in changed if fragments_dir in path.parents
+    }
+
+    affected = []
+    for config_path in config_paths:
+        if config_path in changed or (config_path.parent != base_dir and config_path.parent in changed_dirs):
+            affected.append(config_path)
+        elif changed_fragments:
+            # Config files are only parsed when a fragment changed
+            try:
+                config_data = yaml_io.load(config_path.read_text(encoding="utf-8"))
+            except (OSError, UnicodeDecodeError, yaml_io.YAMLError):
+                affected.append(config_path) # Let the compile report the problem
+                continue
+            if changed_fragments & _referenced_fragments(config_data, fragments_dir):
+                affected.append(config_path)
+    return affected
+
+
+def _referenced_fragments(config_data, fragments_dir: Path) -> Set[str]:
+    """Returns the fragments the prompt fields of parsed config data include, directly or not."""
+    names: Set[str] = set()
+    if isinstance(config_data, dict):
+        for field in prompt_includes.RENDERED_FIELDS:
+            value = config_data.get(field)
+            if isinstance(value, str):
+                names |= prompt_includes.referenced_fragments(value, fragments_dir)
+    return names
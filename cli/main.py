@@ -3,22 +3,46 @@ import typer
 import logging
 from pathlib import Path
 from typing_extensions import Annotated
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
+import signal
+import sys
 import os # Needed for os.path.join and os.listdir
 # Removed yaml, GlobalAgentConfig, ConfigValidationError, Tuple
+# Only lightweight modules are imported here so `--help` starts fast. The
+# compiler (yaml, pydantic, models) and the daemon are imported by the
+# commands that need them.
 from . import config_loader
-from . import compiler # Keep this import
-from . import registry_manager # Keep this import
+from . import constants
 # from .models import GlobalAgentConfig # Removed
 # from pydantic import ValidationError as ConfigValidationError # Removed
 # from typing import Tuple # Removed
 # from . import config_loader # This was duplicated, removed. The one above is sufficient.
 # --- Constants & Configuration ---
-# Assuming the global registry path is defined in constants
-# Paths are now loaded via the centralized config_loader
-GLOBAL_REGISTRY_PATH = config_loader.get_global_registry_path()
-AGENT_CONFIG_DIR = config_loader.get_agent_config_dir()
+# GLOBAL_REGISTRY_PATH and AGENT_CONFIG_DIR are resolved via the centralized
+# config_loader on first access (see __getattr__ below), not at import time.
+_LAZY_PATHS = {
+    "GLOBAL_REGISTRY_PATH": config_loader.get_global_registry_path,
+    "AGENT_CONFIG_DIR": config_loader.get_agent_config_dir,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_PATHS:
+        return _LAZY_PATHS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_path(name: str) -> Path:
+    """Returns a path constant from the process-wide config resolver (see `config_loader.set_resolver`)."""
+    return _LAZY_PATHS[name]()
+
+
+def _get_config() -> "config_loader.ConfigResolver":
+    """Returns the config resolver for commands."""
+    return config_loader.get_resolver()
+
+
 # --- Logging Setup ---
 # Basic logging configuration (can be enhanced later)
 logging.basicConfig(
@@ -59,6 +83,12 @@ def main_callback():
 
 # --- CLI Command ---
 
+def _validate_output_format(value: str) -> str:
+    if value not in constants.COMPILE_OUTPUT_FORMATS:
+        raise typer.BadParameter(f"Must be one of: {', '.join(constants.COMPILE_OUTPUT_FORMATS)}.")
+    return value
+
+
 @app.command("compile")
 def compile_agent_config(
     agent_slug: Annotated[
@@ -66,16 +96,191 @@ def compile_agent_config(
         typer.Argument( # Default value removed from here
             help="The unique slug of the agent to compile. If omitted, compiles all agents found in the config directory."
         ),
-    ] = None # Typer needs the default here too
+    ] = None, # Typer needs the default here too
+    jobs: Annotated[
+        Optional[int],
+        typer.Option(
+            "--jobs", "-j",
+            min=1,
+            help="Number of worker processes used when compiling all agents. Defaults to the CPU count; use 1 to compile serially."
+        ),
+    ] = None,
+    full: Annotated[
+        bool,
+        typer.Option(
+            "--full",
+            help="Re-process every agent config, ignoring the incremental compile manifest."
+        ),
+    ] = False,
+    journal: Annotated[
+        bool,
+        typer.Option(
+            "--journal",
+            help="When compiling a single agent, append the update to the registry journal instead of rewriting the registry."
+        ),
+    ] = False,
+    use_daemon: Annotated[
+        bool,
+        typer.Option(
+            "--daemon/--no-daemon",
+            help="Hand the compile to a running `watch` daemon when one is available."
+        ),
+    ] = True,
+    output_format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            callback=_validate_output_format,
+            help="Output format: 'text' for progress messages, or 'ndjson' for one JSON record per agent plus a summary record."
+        ),
+    ] = constants.COMPILE_OUTPUT_TEXT,
+    quiet: Annotated[
+        bool,
+        typer.Option(
+            "--quiet", "-q",
+            help="Print only the summary (one line of text, or one JSON record with --format ndjson)."
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Time each compile stage and print per-stage totals, p50/p95 per-file latency and the slowest files to stderr."
+        ),
+    ] = False,
+    trace_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--trace-file",
+            dir_okay=False,
+            help="With profiling, also write a Chrome trace-event JSON file (chrome://tracing, Perfetto). Implies --profile."
+        ),
+    ] = None,
+    profile_top: Annotated[
+        int,
+        typer.Option(
+            "--profile-top",
+            min=1,
+            help="Number of slowest files listed in the profile report."
+        ),
+    ] = constants.PROFILE_TOP_FILES,
+    prompt_store: Annotated[
+        bool,
+        typer.Option(
+            "--prompt-store",
+            help="Keep the registry in the content-addressed prompt store, storing shared prompt fragments once. Stays enabled for later compiles; see `materialize`."
+        ),
+    ] = False,
+    dry_run: Annotated[
+        bool,
+        typer.Option(
+            "--dry-run",
+            help="Compile and print what would change in the registry, per agent and field, without writing anything."
+        ),
+    ] = False,
+    batch_validate: Annotated[
+        bool,
+        typer.Option(
+            "--batch-validate",
+            help="When compiling all agents, validate every changed config in one pass and report all validation errors (with file and line) together."
+        ),
+    ] = False,
+    include: Annotated[
+        str,
+        typer.Option(
+            "--include",
+            help="When compiling all agents, glob of the config files to compile, relative to the agent config directory (e.g. '*/config.yaml'). Paths listed in its .rawrignore file are always skipped."
+        ),
+    ] = constants.DEFAULT_CONFIG_GLOB,
+    scan_threads: Annotated[
+        int,
+        typer.Option(
+            "--scan-threads",
+            min=1,
+            help="Number of threads walking the agent config directory (helps on network file systems)."
+        ),
+    ] = 1,
+    changed_since: Annotated[
+        Optional[str],
+        typer.Option(
+            "--changed-since",
+            metavar="REV",
+            help="Compile only the agents whose config, agent directory files (e.g. prompt.md) or included fragments changed since this git revision, per the local repository."
+        ),
+    ] = None,
+    team: Annotated[
+        Optional[str],
+        typer.Option(
+            "--team",
+            help=f"Compile only the agents of this team, as listed in {constants.TEAMS_FILENAME}."
+        ),
+    ] = None,
+    teams_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--teams-file",
+            dir_okay=False,
+            help=f"Team file for --team and --team-partitions. Defaults to {constants.TEAMS_FILENAME} in the agent config directory, else in {constants.DEFAULT_AGENTS_DIR}."
+        ),
+    ] = None,
+    team_partitions: Annotated[
+        bool,
+        typer.Option(
+            "--team-partitions",
+            help=f"Also write one registry file per team (with only its modes) to {constants.TEAM_PARTITIONS_DIRNAME}/ next to the global registry."
+        ),
+    ] = False
 ):
     """
     Loads, validates, and compiles agent configuration(s), updating the global registry.
     If AGENT_SLUG is provided, compiles only that agent.
     If AGENT_SLUG is omitted, compiles all valid agents found in the configured directory.
+    Use --jobs to control how many processes load and validate configs in parallel.
+    When compiling all agents, unchanged configs are skipped unless --full is given.
+    With --journal, a single-agent compile is appended to the registry journal (see `compact`).
+    If a `watch` daemon is running for the same registry, it performs the compile.
+    Use --format ndjson for machine-readable output and --quiet for just the summary.
+    Options other than --jobs, --full, --journal, --format, --quiet and --scan-threads
+    run the compile in this process rather than on the daemon.
     """
+    if agent_slug and changed_since is not None:
+        raise typer.BadParameter("--changed-since compiles all affected agents and cannot be combined with AGENT_SLUG.")
+    if agent_slug and team is not None:
+        raise typer.BadParameter("--team compiles all agents of a team and cannot be combined with AGENT_SLUG.")
+    profile = profile or trace_file is not None
+    # The daemon runs plain compiles; these options need this process
+    local_only = (
+        profile or prompt_store or dry_run or batch_validate or changed_since is not None
+        or include != constants.DEFAULT_CONFIG_GLOB or team is not None or team_partitions
+    )
+    if use_daemon and not local_only:
+        from . import daemon
+        response = daemon.request_compile(
+            _get_path("GLOBAL_REGISTRY_PATH"), _get_path("AGENT_CONFIG_DIR"),
+            agent_slug=agent_slug, jobs=jobs, full=full, journal=journal,
+            output_format=output_format, quiet=quiet, scan_threads=scan_threads
+        )
+        if response is not None:
+            # Replay the daemon's output as if the compile had run here
+            if response["stdout"]:
+                typer.echo(response["stdout"], nl=False)
+            if response["stderr"]:
+                typer.echo(response["stderr"], nl=False, err=True)
+            if response["exit_code"]:
+                raise typer.Exit(code=response["exit_code"])
+            return
+
     # Delegate the entire compilation process to the compiler module
+    from . import compiler
     try:
-        compiler.compile_agents(agent_slug=agent_slug)
+        compiler.compile_agents(
+            agent_slug=agent_slug, jobs=jobs, full=full, journal=journal,
+            output_format=output_format, quiet=quiet,
+            profile=profile, trace_path=trace_file, profile_top=profile_top,
+            prompt_store=prompt_store, dry_run=dry_run, config=_get_config(),
+            batch_validate=batch_validate, include=include, scan_threads=scan_threads,
+            changed_since=changed_since, team=team, teams_path=teams_file, team_partitions=team_partitions
+        )
         # Success/failure messages and registry writing are handled within compile_agents
     except typer.Exit as e:
         # Re-raise typer.Exit exceptions to allow tests to catch them
@@ -87,6 +292,257 @@ def compile_agent_config(
         raise typer.Exit(code=1)
 
 
+@app.command("compact")
+def compact_registry_journal():
+    """
+    Folds pending registry journal entries into the global registry JSON file.
+    With the prompt store enabled, they are folded into the store and
+    prompt fragments no longer referenced are removed.
+    """
+    from . import prompt_store, registry_manager
+    GLOBAL_REGISTRY_PATH = _get_path("GLOBAL_REGISTRY_PATH")
+    try:
+        if registry_manager.compact_registry(GLOBAL_REGISTRY_PATH):
+            typer.echo(f"✅ Registry journal compacted into {GLOBAL_REGISTRY_PATH}.")
+        else:
+            typer.echo(f"ℹ️ No pending registry journal entries for {GLOBAL_REGISTRY_PATH}.")
+        if prompt_store.is_enabled(GLOBAL_REGISTRY_PATH):
+            pruned = prompt_store.prune_blobs(GLOBAL_REGISTRY_PATH)
+            typer.echo(f"✅ Removed {pruned} unreferenced prompt fragment(s) from the prompt store.")
+    except Exception as e:
+        logger.exception(f"Unexpected error compacting the registry journal: {e}")
+        typer.echo(f"❌ Error: Failed to compact the registry journal. Details: {e}", err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command("materialize")
+def materialize_registry(
+    disable_store: Annotated[
+        bool,
+        typer.Option(
+            "--disable-store",
+            help="Also move the registry back into the JSON file and remove the prompt store."
+        ),
+    ] = False
+):
+    """
+    Writes the global registry JSON file read by the editor from the prompt store.
+    """
+    from . import prompt_store
+    GLOBAL_REGISTRY_PATH = _get_path("GLOBAL_REGISTRY_PATH")
+    if not prompt_store.is_enabled(GLOBAL_REGISTRY_PATH):
+        typer.echo(f"ℹ️ No prompt store for {GLOBAL_REGISTRY_PATH}; the registry JSON file is already current.")
+        return
+    try:
+        if disable_store:
+            prompt_store.disable_prompt_store(GLOBAL_REGISTRY_PATH)
+            typer.echo(f"✅ Registry moved back into {GLOBAL_REGISTRY_PATH} and prompt store removed.")
+        elif prompt_store.materialize_registry(GLOBAL_REGISTRY_PATH):
+            typer.echo(f"✅ Registry materialized into {GLOBAL_REGISTRY_PATH}.")
+        else:
+            typer.echo(f"ℹ️ {GLOBAL_REGISTRY_PATH} is already up to date.")
+    except Exception as e:
+        logger.exception(f"Unexpected error materializing the registry: {e}")
+        typer.echo(f"❌ Error: Failed to materialize the registry. Details: {e}", err=True)
+        raise typer.Exit(code=1)
+
+
+@app.command("sync")
+def sync_agent_prompts(
+    agents_dir: Annotated[
+        Optional[Path],
+        typer.Argument(
+            help=f"Directory containing <slug>/{constants.PROMPT_FILENAME} files. Defaults to {constants.DEFAULT_AGENTS_DIR} in the project root."
+        ),
+    ] = None,
+    delete_stale: Annotated[
+        bool,
+        typer.Option(
+            "--delete-stale",
+            help="Remove registry entries whose agent has neither a prompt in the directory nor a config in the agent config directory."
+        ),
+    ] = False,
+    jobs: Annotated[
+        Optional[int],
+        typer.Option(
+            "--jobs", "-j",
+            min=1,
+            help="Number of worker processes used to parse prompts. Defaults to the CPU count."
+        ),
+    ] = None
+):
+    """
+    Syncs the name and role definition of every agent prompt into the global registry in one write.
+    For agents compiled from agent configs, the config takes precedence at the next compile.
+    """
+    from . import markdown_sync
+    from .exceptions import RegistryError
+    if agents_dir is None:
+        agents_dir = config_loader.PROJECT_ROOT / constants.DEFAULT_AGENTS_DIR
+    GLOBAL_REGISTRY_PATH = _get_path("GLOBAL_REGISTRY_PATH")
+
+    typer.echo(f"Syncing agent prompts from {agents_dir} into {GLOBAL_REGISTRY_PATH}...")
+    try:
+        report = markdown_sync.sync_markdown_agents(
+            agents_dir, GLOBAL_REGISTRY_PATH, delete_stale=delete_stale, jobs=jobs or os.cpu_count() or 1,
+            agent_config_dir=_get_path("AGENT_CONFIG_DIR")
+        )
+    except (FileNotFoundError, RegistryError, OSError) as e:
+        logger.error(f"Sync failed: {e}")
+        typer.echo(f"❌ Error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    for label, slugs in (("➕ Added", report.added), ("🔄 Updated", report.updated), ("🗑️ Deleted", report.deleted)):
+        if slugs:
+            typer.echo(f"{label} ({len(slugs)}): {', '.join(slugs)}")
+    if report.stale:
+        typer.echo(f"ℹ️ {len(report.stale)} registry entry(ies) have no prompt (use --delete-stale to remove): {', '.join(report.stale)}")
+    if report.compiled:
+        typer.echo(f"⚠️ {len(report.compiled)} updated agent(s) are compiled from agent configs; the next compile replaces the synced fields: {', '.join(report.compiled)}")
+    if report.left_to_compile:
+        typer.echo(f"ℹ️ {len(report.left_to_compile)} prompt(s) belong to agent configs not yet in the registry (run 'rawr compile'): {', '.join(report.left_to_compile)}")
+    for path, error in report.failed.items():
+        typer.echo(f"❌ Error parsing {path}: {error}", err=True)
+
+    if report.written:
+        typer.echo(f"✅ Global registry written ({len(report.unchanged)} unchanged).")
+    else:
+        typer.echo(f"ℹ️ Global registry is already up to date ({len(report.unchanged)} unchanged). Registry not rewritten.")
+    if report.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command("check-access")
+def check_access(
+    agent_slug: Annotated[str, typer.Argument(help="The slug of the agent to check.")],
+    paths: Annotated[
+        Optional[List[str]],
+        typer.Argument(help="Relative file paths to check. Read from stdin (one per line) if omitted.")
+    ] = None,
+    group: Annotated[
+        str,
+        typer.Option("--group", "-g", help="The tool group to check (e.g. 'edit').")
+    ] = "edit"
+):
+    """
+    Reports whether an agent may use a tool group on each path, based on its fileRegex restrictions.
+    Exits with code 1 if any path is denied.
+    """
+    from . import permissions, registry_manager
+    GLOBAL_REGISTRY_PATH = _get_path("GLOBAL_REGISTRY_PATH")
+    try:
+        engine = permissions.PermissionEngine.from_registry(registry_manager.read_global_registry(GLOBAL_REGISTRY_PATH))
+    except ValueError as e:
+        typer.echo(f"❌ Error: {e}", err=True)
+        raise typer.Exit(code=1)
+    if agent_slug not in engine.slugs():
+        typer.echo(f"❌ Error: Agent '{agent_slug}' not found in {GLOBAL_REGISTRY_PATH}.", err=True)
+        raise typer.Exit(code=1)
+
+    if not paths:
+        paths = [line.strip() for line in sys.stdin if line.strip()]
+    denied = 0
+    for path, allowed in engine.check_paths(agent_slug, group, paths):
+        typer.echo(f"{'✅ allow' if allowed else '❌ deny '}  {path}")
+        denied += not allowed
+    if denied:
+        raise typer.Exit(code=1)
+
+
+@app.command("query")
+def query_registry(
+    group: Annotated[
+        Optional[str],
+        typer.Option("--group", "-g", help="List agents with access to this tool group (e.g. 'edit').")
+    ] = None,
+    pattern: Annotated[
+        Optional[str],
+        typer.Option("--pattern", "-p", help="List agents restricted by this exact fileRegex pattern.")
+    ] = None,
+    path: Annotated[
+        Optional[str],
+        typer.Option("--path", help="With --group, list agents allowed to use the group on this relative path.")
+    ] = None,
+    unrestricted: Annotated[
+        bool,
+        typer.Option("--unrestricted", help="With --group, only list agents granted the group without a fileRegex.")
+    ] = False
+):
+    """
+    Looks up agents in the registry's reverse index by group, fileRegex pattern or path.
+    Matching slugs are printed one per line, in registry order.
+    """
+    from . import registry_index
+    if group is None and pattern is None:
+        typer.echo("❌ Error: Provide --group and/or --pattern.", err=True)
+        raise typer.Exit(code=2)
+    if (path is not None or unrestricted) and group is None:
+        typer.echo("❌ Error: --path and --unrestricted require --group.", err=True)
+        raise typer.Exit(code=2)
+
+    index = registry_index.load_registry_index(_get_path("GLOBAL_REGISTRY_PATH"))
+    if pattern is not None:
+        slugs = registry_index.slugs_with_restriction(index, pattern, group)
+    elif path is not None:
+        slugs = registry_index.slugs_for_path(index, group, path)
+    else:
+        slugs = registry_index.slugs_with_group(index, group, unrestricted_only=unrestricted)
+
+    for slug in slugs:
+        typer.echo(slug)
+    if not slugs:
+        typer.echo("ℹ️ No agents match the query.", err=True)
+
+
+@app.command("watch")
+def watch_agent_configs(
+    jobs: Annotated[
+        Optional[int],
+        typer.Option(
+            "--jobs", "-j",
+            min=1,
+            help="Number of worker processes used for each recompile. Defaults to the CPU count."
+        ),
+    ] = None,
+    debounce: Annotated[
+        float,
+        typer.Option(
+            "--debounce",
+            min=0.0,
+            help="Seconds to wait for further changes before recompiling a burst of saves."
+        ),
+    ] = constants.WATCH_DEBOUNCE_SECONDS,
+    poll_interval: Annotated[
+        float,
+        typer.Option(
+            "--poll-interval",
+            min=0.05,
+            help="Seconds between checks of the agent config directory."
+        ),
+    ] = constants.WATCH_POLL_INTERVAL_SECONDS
+):
+    """
+    Keeps the compiler resident, recompiling agents whenever their configs change.
+    While running, `compile` commands for the same registry are handed to this process.
+    """
+    from . import compiler, daemon
+    from .exceptions import DaemonError
+    config = compiler._get_config()
+    compile_daemon = daemon.CompileDaemon(
+        config.agent_config_dir, config.global_registry_path,
+        jobs=jobs, debounce=debounce, poll_interval=poll_interval
+    )
+    # Shut down cleanly (removing the socket) when terminated, not just on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: compile_daemon.stop())
+    try:
+        compile_daemon.serve()
+    except KeyboardInterrupt:
+        typer.echo("\n👋 Stopped watching.")
+    except DaemonError as e:
+        typer.echo(f"❌ Error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+
 # --- Entry Point Execution ---
 if __name__ == "__main__":
     app()
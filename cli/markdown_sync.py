@@ -0,0 +1,206 @@
+# cli/markdown_sync.py
+"""
+Directory-level sync of agent prompts (`<agents_dir>/<slug>/prompt.md`) into the global registry.
+
+All prompts are parsed (in parallel when `jobs > 1`), diffed against the
+registry in memory, and the resulting adds, updates and optional stale
+deletions are applied with a single registry write.
+
+Only the fields the prompt defines ('name' and 'roleDefinition') are synced.
+Other fields of an existing entry, such as 'groups', are preserved. New
+entries start with no groups, and 'customInstructions' is never stored in
+the global registry. Include directives in the prompt are expanded from the
+`_fragments` directory of the agents directory (see cli/prompt_includes.py).
+
+Given the agent config directory, sync also respects agents compiled from
+its configs: their entries are never stale, prompts of compiled agents with
+no entry yet are left to `compile` (which knows their groups), and updating
+a compiled agent's entry drops its compile manifest entry. The config takes
+precedence: the next compile re-processes it and replaces the synced fields.
+"""
+import concurrent.futures
+import functools
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from . import compile_manifest
+from . import config_scan
+from . import constants
+from . import markdown_utils
+from . import prompt_includes
+from . import registry_manager
+from . import yaml_io
+from .exceptions import FragmentIncludeError
+
+logger = logging.getLogger(__name__)
+
+# Registry fields taken from the parsed prompt
+SYNCED_FIELDS = (constants.NAME, constants.ROLE_DEFINITION)
+
+
+@dataclass
+class SyncReport:
+    """What a sync changed (or, for stale entries that were kept, would change)."""
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    stale: List[str] = field(default_factory=list)  # Registry-only slugs kept because delete_stale was off
+    compiled: List[str] = field(default_factory=list)  # Updated slugs whose config will replace the synced fields
+    left_to_compile: List[str] = field(default_factory=list)  # New prompts of compiled agents, not added
+    failed: Dict[str, str] = field(default_factory=dict)  # Prompt path -> error message
+    written: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+
+def find_prompt_files(agents_dir: Path) -> List[Path]:
+    """Returns the `<slug>/prompt.md` files directly below the agents directory, sorted by slug."""
+    return sorted(agents_dir.glob(f"*/{constants.PROMPT_FILENAME}"))
+
+
+def config_slugs(agent_config_dir: Path, registry_path: Path) -> Set[str]:
+    """
+    Returns the slugs of the agents defined by the configs in the agent config directory.
+
+    The slug recorded in the compile manifest is used for unchanged configs;
+    other configs are parsed. A config that cannot be parsed counts under its
+    path's slug (`<slug>/config.yaml` or `<slug>.yaml`).
+    """
+    if not agent_config_dir.is_dir():
+        return set()
+    ignore = config_scan.IgnoreRules.from_dir(agent_config_dir, extra=[f"/{constants.FRAGMENTS_DIRNAME}/"])
+    manifest = compile_manifest.read_manifest(compile_manifest.get_manifest_path(registry_path), agent_config_dir)
+    slugs = set()
+    for config_path in config_scan.scan_configs(agent_config_dir, ignore=ignore):
+        key = config_path.relative_to(agent_config_dir).as_posix()
+        try:
+            metadata, _ = compile_manifest.lookup(manifest, key, config_path)
+            slug = metadata.get(constants.SLUG) if metadata is not None else None
+            if slug is None:
+                config_data = yaml_io.load(config_path.read_text(encoding="utf-8"))
+                slug = config_data.get(constants.SLUG) if isinstance(config_data, dict) else None
+        except (OSError, UnicodeDecodeError, yaml_io.YAMLError):
+            slug = None
+        if not isinstance(slug, str):
+            slug = config_path.parent.name if config_path.parent != agent_config_dir else config_path.stem
+        slugs.add(slug)
+    return slugs
+
+
+def _parse_prompt_job(markdown_path: Path, fragments_dir: Path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Process-pool worker: parses and renders one prompt, returning (fields, None) or (None, error message)."""
+    try:
+        fields = markdown_utils.parse_markdown(markdown_path)
+        prompt_includes.render_config(fields, fragments_dir)
+        return fields, None
+    except (OSError, ValueError, UnicodeDecodeError, FragmentIncludeError) as e:
+        return None, str(e)
+
+
+def _parse_prompts(
+    prompt_paths: List[Path],
+    jobs: int,
+    fragments_dir: Path
+) -> Iterator[Tuple[Path, Optional[Dict[str, Any]], Optional[str]]]:
+    """Parses the prompts, yielding (path, fields, error) in the order of `prompt_paths`."""
+    parse = functools.partial(_parse_prompt_job, fragments_dir=fragments_dir)
+    if jobs > 1 and len(prompt_paths) > 1:
+        workers = min(jobs, len(prompt_paths))
+        chunksize = max(1, len(prompt_paths) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            for path, (fields, error) in zip(prompt_paths, executor.map(parse, prompt_paths, chunksize=chunksize)):
+                yield path, fields, error
+        return
+    for path in prompt_paths:
+        fields, error = parse(path)
+        yield path, fields, error
+
+
+def sync_markdown_agents(
+    agents_dir: Path,
+    registry_path: Path,
+    delete_stale: bool = False,
+    jobs: int = 1,
+    agent_config_dir: Optional[Path] = None
+) -> SyncReport:
+    """
+    Syncs every agent prompt in a directory into the global registry in one write.
+
+    Args:
+        agents_dir: The directory containing `<slug>/prompt.md` files.
+        registry_path: The path to the global registry JSON file.
+        delete_stale: Remove registry entries that have no prompt in the directory
+                      (and, given `agent_config_dir`, no agent config).
+        jobs: Number of worker processes used to parse prompts. 1 parses serially.
+        agent_config_dir: The agent config directory the registry is compiled
+                          from (see the module docstring).
+
+    Returns:
+        A SyncReport describing the changes.
+
+    Raises:
+        FileNotFoundError: If the agents directory does not exist.
+        RegistryReadError: If the registry cannot be read.
+        OSError: If the registry cannot be written.
+    """
+    if not agents_dir.is_dir():
+        raise FileNotFoundError(f"Agents directory not found: {agents_dir}")
+
+    prompt_paths = find_prompt_files(agents_dir)
+    logger.info(f"Syncing {len(prompt_paths)} agent prompt(s) from {agents_dir} into {registry_path}")
+    registry = registry_manager.SlugIndexedRegistry(registry_manager.read_global_registry(registry_path))
+    report = SyncReport()
+    compiled_slugs = config_slugs(agent_config_dir, registry_path) if agent_config_dir is not None else set()
+
+    seen = set()
+    for path, fields, error in _parse_prompts(prompt_paths, jobs, prompt_includes.get_fragments_dir(agents_dir)):
+        if error is not None:
+            logger.warning(f"Could not parse {path}: {error}")
+            report.failed[str(path)] = error
+            # A prompt that exists but fails to parse is never treated as stale
+            seen.add(path.parent.name)
+            continue
+
+        slug = fields[constants.SLUG]
+        seen.add(slug)
+        existing = registry.get(slug)
+        if existing is None and slug in compiled_slugs:
+            report.left_to_compile.append(slug)
+        elif existing is None:
+            registry.upsert({constants.SLUG: slug, **{key: fields[key] for key in SYNCED_FIELDS}, "groups": []})
+            report.added.append(slug)
+        elif any(existing.get(key) != fields[key] for key in SYNCED_FIELDS):
+            registry.upsert({**existing, **{key: fields[key] for key in SYNCED_FIELDS}})
+            report.updated.append(slug)
+            if slug in compiled_slugs:
+                report.compiled.append(slug)
+        else:
+            report.unchanged.append(slug)
+
+    for slug in registry.slugs():
+        if slug in seen or slug in compiled_slugs:
+            continue
+        if delete_stale:
+            registry.delete(slug)
+            report.deleted.append(slug)
+        else:
+            report.stale.append(slug)
+
+    if report.changed:
+        report.written = registry_manager.write_global_registry(
+            registry.to_dict(), registry_path=registry_path, skip_unchanged=True
+        )
+    if report.compiled:
+        # The cached metadata no longer matches the registry entry
+        manifest_path = compile_manifest.get_manifest_path(registry_path)
+        try:
+            compile_manifest.invalidate_slugs(manifest_path, agent_config_dir, report.compiled)
+        except OSError as e:
+            # The next compile then reuses the cached metadata, with the same result
+            logger.warning(f"Could not update compile manifest {manifest_path}: {e}")
+    return report
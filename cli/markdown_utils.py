@@ -0,0 +1,238 @@
+# cli/markdown_utils.py
+"""
+Single-pass markdown section tokenizer for agent prompts (`prompt.md`).
+
+`tokenize_markdown` walks a document once and builds a heading tree. Each
+section records its level, title and byte offsets; a section runs until the
+next heading of the same or a higher level (or EOF). Extracting the name,
+role definition and custom instructions is then a lookup on that tree
+instead of a rescan of the document per candidate heading.
+
+Headings are ATX headings (`#`, `##`, ...) at the start of a line; lines
+inside fenced code blocks (``` or ~~~) are never treated as headings.
+Section lookups match on the heading title, regardless of its level, so
+both `# Persona` and `## Persona` satisfy `constants.MD_HEADING_PERSONA`.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from . import constants
+
+logger = logging.getLogger(__name__)
+
+# One match per heading or code-fence line; everything else is skipped by the regex engine
+_LINE = re.compile(
+    rb'^[ \t]*(?:(?P<hashes>#+)[ \t]+(?P<title>[^\r\n]*)|(?P<fence>`{3,}|~{3,}))',
+    re.MULTILINE,
+)
+_CLOSING_HASHES = re.compile(r'[ \t]+#+$')
+
+
+def _normalize_title(title: str) -> str:
+    """Strips surrounding whitespace and an optional closing `#` sequence."""
+    return _CLOSING_HASHES.sub('', title.strip()).strip()
+
+
+def heading_title(heading: str) -> str:
+    """Returns the title of a heading string such as '## Custom Instructions'."""
+    return _normalize_title(heading.lstrip().lstrip('#'))
+
+
+@dataclass
+class MarkdownSection:
+    """A heading and the content up to the next heading of the same or higher level."""
+    level: int
+    title: str
+    start: int       # Byte offset of the heading line
+    body_start: int  # Byte offset just after the heading line
+    end: int         # Byte offset where the section ends
+    children: List["MarkdownSection"] = field(default_factory=list, repr=False)
+
+
+class MarkdownDocument:
+    """
+    A tokenized markdown document: its source bytes plus a heading tree.
+
+    Attributes:
+        source: The UTF-8 encoded document.
+        sections: Every section, in document order.
+        roots: The top-level sections (those without a parent heading).
+    """
+
+    def __init__(self, source: bytes, sections: List[MarkdownSection], roots: List[MarkdownSection]):
+        self.source = source
+        self.sections = sections
+        self.roots = roots
+        self._by_title: Dict[str, List[MarkdownSection]] = {}
+        for section in sections:
+            self._by_title.setdefault(section.title, []).append(section)
+
+    def text(self, section: MarkdownSection) -> str:
+        """Returns the section, including its heading line, with surrounding whitespace stripped."""
+        return self.source[section.start:section.end].decode('utf-8').strip()
+
+    def body(self, section: MarkdownSection) -> str:
+        """Returns the section content after its heading line, with surrounding whitespace stripped."""
+        return self.source[section.body_start:section.end].decode('utf-8').strip()
+
+    def find_all(self, headings: Iterable[str]) -> List[MarkdownSection]:
+        """Returns every section whose title matches one of the headings, in document order."""
+        matches = [
+            section
+            for title in {heading_title(heading) for heading in headings}
+            for section in self._by_title.get(title, ())
+        ]
+        return sorted(matches, key=lambda section: section.start)
+
+    def find_first(self, headings: Iterable[str]) -> Optional[MarkdownSection]:
+        """Returns the earliest section whose title matches one of the headings, or None."""
+        matches = self.find_all(headings)
+        return matches[0] if matches else None
+
+    def iter_level(self, level: int) -> Iterator[MarkdownSection]:
+        """Yields the sections at the given heading level, in document order."""
+        return (section for section in self.sections if section.level == level)
+
+
+def tokenize_markdown(content: Union[str, bytes]) -> MarkdownDocument:
+    """
+    Tokenizes a markdown document into a heading tree in a single pass.
+
+    Args:
+        content: The document text. `str` input is UTF-8 encoded first, so all
+                 offsets are byte offsets into `MarkdownDocument.source`.
+
+    Returns:
+        The tokenized MarkdownDocument.
+    """
+    source = content.encode('utf-8') if isinstance(content, str) else content
+    sections: List[MarkdownSection] = []
+    roots: List[MarkdownSection] = []
+    open_sections: List[MarkdownSection] = [] # Stack of sections still awaiting their end
+    fence: Optional[bytes] = None
+
+    for match in _LINE.finditer(source):
+        marker = match.group('fence')
+        if marker is not None:
+            if fence is None:
+                fence = marker
+            elif marker[:1] == fence[:1] and len(marker) >= len(fence):
+                fence = None
+            continue
+        if fence is not None:
+            continue # Headings inside code blocks are content
+
+        level = len(match.group('hashes'))
+        # A heading closes every open section at the same or a deeper level
+        while open_sections and open_sections[-1].level >= level:
+            open_sections.pop().end = match.start()
+        line_end = source.find(b'\n', match.end())
+        section = MarkdownSection(
+            level=level,
+            title=_normalize_title(match.group('title').decode('utf-8')),
+            start=match.start(),
+            body_start=len(source) if line_end == -1 else line_end + 1,
+            end=len(source),
+        )
+        (open_sections[-1].children if open_sections else roots).append(section)
+        sections.append(section)
+        open_sections.append(section)
+
+    return MarkdownDocument(source, sections, roots)
+
+
+def extract_name(document: MarkdownDocument) -> Optional[str]:
+    """Returns the title of the first H1 heading, or None."""
+    first_h1 = next(document.iter_level(1), None)
+    return first_h1.title if first_h1 else None
+
+
+def extract_role_definition(
+    document: MarkdownDocument,
+    headings: Iterable[str] = constants.ROLE_DEFINITION_HEADINGS
+) -> Optional[str]:
+    """Returns the first role-definition section (heading included), or None."""
+    section = document.find_first(headings)
+    return document.text(section) if section else None
+
+
+def extract_custom_instructions(
+    document: MarkdownDocument,
+    headings: Iterable[str] = constants.CUSTOM_INSTRUCTIONS_HEADINGS
+) -> Optional[str]:
+    """
+    Concatenates every custom-instruction section into one string.
+
+    The first section keeps its heading; later sections contribute only their
+    content. Matching sections nested inside an earlier match are already part
+    of it and are not repeated.
+
+    Returns:
+        The concatenated instructions, or None if no section matches.
+    """
+    parts: List[str] = []
+    covered_until = -1
+    for section in document.find_all(headings):
+        if section.start < covered_until:
+            continue
+        covered_until = section.end
+        if not parts:
+            parts.append(document.text(section))
+        else:
+            content = document.body(section)
+            if content: # Only append if there's actual content after the heading
+                parts.append(content)
+    return "\n\n".join(parts).strip() if parts else None
+
+
+def parse_markdown(markdown_path: Path) -> Dict[str, Any]:
+    """
+    Parses an agent prompt markdown file into agent config fields.
+
+    The slug is the name of the file's parent directory and the name is the
+    first H1 heading.
+
+    Args:
+        markdown_path: The path to the markdown file (e.g. 'ai/agents/debug/prompt.md').
+
+    Returns:
+        A dictionary with 'slug', 'name' and 'roleDefinition', plus
+        'customInstructions' when the document has custom-instruction sections.
+
+    Raises:
+        FileNotFoundError: If the markdown file does not exist.
+        ValueError: If the slug, name or role definition cannot be determined.
+    """
+    if not markdown_path.is_file():
+        raise FileNotFoundError(f"Markdown file not found: {markdown_path}")
+
+    logger.info(f"Parsing Markdown file: {markdown_path}")
+    document = tokenize_markdown(markdown_path.read_bytes())
+
+    slug = markdown_path.parent.name
+    if not slug:
+        raise ValueError(f"Could not determine slug from path: {markdown_path}")
+
+    name = extract_name(document)
+    if not name:
+        raise ValueError(f"Could not find H1 heading for 'name' in: {markdown_path}")
+
+    role_definition = extract_role_definition(document)
+    if not role_definition:
+        raise ValueError(
+            f"Could not find any role definition heading ({', '.join(constants.ROLE_DEFINITION_HEADINGS)}) in: {markdown_path}"
+        )
+
+    fields = {
+        constants.SLUG: slug,
+        constants.NAME: name,
+        constants.ROLE_DEFINITION: role_definition,
+    }
+    custom_instructions = extract_custom_instructions(document)
+    if custom_instructions:
+        fields[constants.CUSTOM_INSTRUCTIONS] = custom_instructions
+    logger.debug(f"Parsed {len(document.sections)} sections for slug: {slug}")
+    return fields
@@ -1,7 +1,10 @@
 # cli/models.py
 
 from typing import List, Optional, Union, Dict, Any, Tuple
-from pydantic import BaseModel, HttpUrl, Field, Extra
+import re
+from pydantic import BaseModel, HttpUrl, Field, Extra, field_validator
+
+from .permissions import compile_file_regex
 
 # Model for Group Restrictions (as defined in step_01_definition.md)
 class GroupRestriction(BaseModel):
@@ -9,6 +12,16 @@ class GroupRestriction(BaseModel):
     fileRegex: str = Field(..., description="Regex pattern for allowed files.")
     description: Optional[str] = Field(None, description="Optional description for the restriction.")
 
+    @field_validator("fileRegex")
+    @classmethod
+    def _check_file_regex(cls, value: str) -> str:
+        # Reject invalid patterns at compile time; the compiled pattern is cached for permission checks
+        try:
+            compile_file_regex(value)
+        except re.error as e:
+            raise ValueError(f"invalid regular expression: {e}") from e
+        return value
+
     class Config:
         extra = Extra.forbid # Ensure no extra fields are allowed
 
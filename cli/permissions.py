@@ -0,0 +1,168 @@
+# cli/permissions.py
+"""
+File permission evaluation for agent groups.
+
+A mode's `groups` list grants tool groups either unconditionally (`"edit"`)
+or limited to paths matching a `fileRegex` (`["edit", {"fileRegex": ...}]`).
+As in the editor, a restriction matches when the pattern is found anywhere
+in the (forward-slash) relative path, i.e. `re.search` semantics.
+
+`PermissionEngine` compiles every agent's restrictions once. All patterns
+for the same agent and group are merged into a single alternation where
+that is safe, so each path costs one regex scan per (agent, group). Compiled
+patterns are also cached process-wide by pattern text.
+"""
+import functools
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+# Returned for groups granted without a fileRegex restriction
+ALLOW_ALL = None
+
+_GLOBAL_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_file_regex(pattern: str) -> Pattern:
+    """
+    Compiles a `fileRegex` pattern, caching the result.
+
+    Raises:
+        re.error: If the pattern is not a valid regular expression.
+    """
+    return re.compile(pattern)
+
+
+def _can_merge(pattern: str, compiled: Pattern) -> bool:
+    # Capture groups would renumber backreferences; global flags only apply at the start
+    return compiled.groups == 0 and not _GLOBAL_FLAGS.search(pattern)
+
+
+def _merge_patterns(patterns: Sequence[str]) -> List[Pattern]:
+    """
+    Merges patterns into one compiled alternation where that preserves their meaning.
+
+    Patterns that use capture groups or inline global flags are kept as
+    separate compiled patterns.
+    """
+    compiled = [compile_file_regex(pattern) for pattern in patterns]
+    mergeable = [p for p, c in zip(patterns, compiled) if _can_merge(p, c)]
+    if len(mergeable) < 2:
+        return compiled
+    try:
+        merged = compile_file_regex("|".join(f"(?:{p})" for p in mergeable))
+    except re.error:
+        return compiled
+    return [merged] + [c for p, c in zip(patterns, compiled) if not _can_merge(p, c)]
+
+
+def parse_groups(groups: Iterable) -> Dict[str, Optional[List[str]]]:
+    """
+    Collects the fileRegex restrictions per group name from a mode's `groups` list.
+
+    Returns:
+        A mapping of group name to its list of patterns, or ALLOW_ALL if the
+        group is granted without restriction anywhere in the list.
+    """
+    restrictions: Dict[str, Optional[List[str]]] = {}
+    for group in groups or []:
+        if isinstance(group, str):
+            restrictions[group] = ALLOW_ALL
+        elif isinstance(group, (list, tuple)) and len(group) == 2 and isinstance(group[0], str):
+            name, restriction = group
+            pattern = restriction.get("fileRegex") if isinstance(restriction, dict) else None
+            if pattern is None:
+                restrictions[name] = ALLOW_ALL
+            elif name not in restrictions or restrictions[name] is not ALLOW_ALL:
+                restrictions.setdefault(name, []).append(pattern)
+    return restrictions
+
+
+def normalize_path(path: str) -> str:
+    """Converts a path to the forward-slash form patterns are written against."""
+    return path.replace(os.sep, "/") if os.sep != "/" else path
+
+
+class PermissionEngine:
+    """
+    Answers "may agent X use group G on path P" for every mode in a registry.
+
+    Build it once (e.g. with `from_registry`) and reuse it for all queries;
+    patterns are compiled and merged at construction time.
+    """
+
+    def __init__(self, modes: Iterable[dict]):
+        """
+        Raises:
+            ValueError: If a mode has a fileRegex that is not a valid regular expression.
+        """
+        # slug -> group -> ALLOW_ALL or the compiled (merged) patterns
+        self._matchers: Dict[str, Dict[str, Optional[List[Pattern]]]] = {}
+        for mode in modes:
+            if not isinstance(mode, dict) or "slug" not in mode or mode["slug"] in self._matchers:
+                continue # First entry wins for duplicate slugs, as in the registry
+            try:
+                self._matchers[mode["slug"]] = {
+                    group: ALLOW_ALL if patterns is ALLOW_ALL else _merge_patterns(patterns)
+                    for group, patterns in parse_groups(mode.get("groups")).items()
+                }
+            except re.error as e:
+                raise ValueError(f"Invalid fileRegex for agent '{mode['slug']}': {e}") from e
+
+    @classmethod
+    def from_registry(cls, registry_data: dict) -> "PermissionEngine":
+        """Builds an engine for the `customModes` of registry data."""
+        return cls(registry_data.get("customModes", []))
+
+    def slugs(self) -> List[str]:
+        return list(self._matchers)
+
+    def groups(self, slug: str) -> List[str]:
+        """
+        Returns the group names granted to an agent.
+
+        Raises:
+            KeyError: If the agent is not in the registry.
+        """
+        return list(self._matchers[slug])
+
+    def is_allowed(self, slug: str, group: str, path: str) -> bool:
+        """
+        Returns True if the agent may use the group on the path.
+
+        Raises:
+            KeyError: If the agent is not in the registry.
+        """
+        agent = self._matchers[slug]
+        if group not in agent:
+            return False
+        matchers = agent[group]
+        if matchers is ALLOW_ALL:
+            return True
+        path = normalize_path(path)
+        return any(matcher.search(path) for matcher in matchers)
+
+    def check_paths(self, slug: str, group: str, paths: Iterable[str]) -> List[Tuple[str, bool]]:
+        """
+        Evaluates a batch of paths for one agent and group.
+
+        Returns:
+            (path, allowed) pairs in input order.
+
+        Raises:
+            KeyError: If the agent is not in the registry.
+        """
+        agent = self._matchers[slug]
+        matchers = agent.get(group, [])
+        if matchers is ALLOW_ALL:
+            return [(path, True) for path in paths]
+        return [(path, any(m.search(normalize_path(path)) for m in matchers)) for path in paths]
+
+    def allowed_agents(self, group: str, path: str) -> List[str]:
+        """Returns the slugs of every agent that may use the group on the path, in registry order."""
+        path = normalize_path(path)
+        return [
+            slug for slug, agent in self._matchers.items()
+            if group in agent and (agent[group] is ALLOW_ALL or any(m.search(path) for m in agent[group]))
+        ]
@@ -0,0 +1,194 @@
+# cli/profiling.py
+"""
+Lightweight stage timing for `rawr compile --profile`.
+
+Hot paths wrap their stages in `profiling.stage("name")`. While no profiler
+is active this returns a shared no-op context manager, so the instrumentation
+costs one global lookup per stage. `activate` installs a CompileProfiler for
+the duration of a compile; it collects:
+
+- wall-clock spans of whole-run stages (registry read, directory scan,
+  registry write, ...), and
+- per-file stage durations ('read', 'parse', 'validate', 'extract'), taken
+  from the compile report's agent events. They are measured where the file
+  was compiled, including worker processes.
+
+`CompileProfiler.format_report` summarizes both, and `write_chrome_trace`
+writes them as Chrome trace-event JSON (viewable in chrome://tracing or
+Perfetto).
+"""
+import contextlib
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+_active: Optional["CompileProfiler"] = None
+_NO_OP = contextlib.nullcontext()
+
+
+def stage(name: str, **args):
+    """Times a stage on the active profiler. A no-op when profiling is off."""
+    if _active is None:
+        return _NO_OP
+    return _active.stage(name, **args)
+
+
+def is_active() -> bool:
+    return _active is not None
+
+
+@contextlib.contextmanager
+def activate(profiler: Optional["CompileProfiler"]) -> Iterator[None]:
+    """Makes the profiler the target of `stage` for the duration of the block. None leaves profiling off."""
+    global _active
+    previous, _active = _active, profiler if profiler is not None else _active
+    try:
+        yield
+    finally:
+        _active = previous
+
+
+def trace_info(started: float) -> Dict[str, Any]:
+    """Returns where and when a file's compile started, for placing it on the trace timeline."""
+    return {"start": started, "pid": os.getpid()}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Returns the nearest-rank percentile of the values (0.0 if there are none)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class CompileProfiler:
+    """Collects stage spans and per-file timings for one compile."""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self.spans: List[Dict[str, Any]] = []  # Whole-run stages: name, start, duration (seconds), args
+        self.files: List[Dict[str, Any]] = []  # path, slug, status, timings (ms), total_ms, trace
+        self.info: Dict[str, str] = {}  # Run details shown in the report header, e.g. the YAML backend
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **args) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({"name": name, "start": started, "duration": time.perf_counter() - started, "args": args})
+
+    def record_agent(self, event: Dict[str, Any], trace: Optional[Dict[str, Any]] = None):
+        """
+        Records the per-file timings of an agent event (see `compile_report.agent_event`).
+
+        Events without timings, such as configs reused from the compile
+        manifest, are not recorded.
+        """
+        timings = event.get("timings_ms") or {}
+        if not timings:
+            return
+        self.files.append({
+            "path": event["path"],
+            "slug": event["slug"],
+            "status": event["status"],
+            "timings": dict(timings),
+            "total_ms": sum(timings.values()),
+            "trace": trace,
+        })
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Returns the total wall time in ms per whole-run stage, in first-seen order."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration"] * 1000
+        return totals
+
+    def file_stage_totals(self) -> Dict[str, float]:
+        """Returns the per-file stage durations in ms, summed over all files."""
+        totals: Dict[str, float] = {}
+        for record in self.files:
+            for name, ms in record["timings"].items():
+                totals[name] = totals.get(name, 0.0) + ms
+        return totals
+
+    def slowest(self, count: int) -> List[Dict[str, Any]]:
+        return sorted(self.files, key=lambda record: record["total_ms"], reverse=True)[:count]
+
+    def format_report(self, top: int) -> str:
+        """Returns the human-readable profile: stage totals, per-file latency percentiles and the slowest files."""
+        elapsed_ms = (time.perf_counter() - self._origin) * 1000
+        lines = [f"⏱️ Compile profile ({elapsed_ms:.2f} ms since start)"]
+        lines.extend(f"{key.replace('_', ' ').capitalize()}: {value}" for key, value in self.info.items())
+        lines.append("Stages (wall time):")
+        for name, ms in self.stage_totals().items():
+            lines.append(f"  {name:<24}{ms:>12.3f} ms")
+
+        latencies = [record["total_ms"] for record in self.files]
+        lines.append(f"Per-file stages (summed over {len(self.files)} compiled file(s)):")
+        for name, ms in self.file_stage_totals().items():
+            lines.append(f"  {name:<24}{ms:>12.3f} ms")
+        if latencies:
+            lines.append(
+                f"Per-file latency: p50 {percentile(latencies, 50):.3f} ms, "
+                f"p95 {percentile(latencies, 95):.3f} ms, max {max(latencies):.3f} ms"
+            )
+            lines.append(f"Slowest {min(top, len(latencies))} file(s):")
+            for record in self.slowest(top):
+                lines.append(f"  {record['total_ms']:>10.3f} ms  {record['path']} ({record['status']})")
+        return "\n".join(lines)
+
+    def _us(self, seconds: float) -> float:
+        return round((seconds - self._origin) * 1_000_000, 3)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the profile as Chrome trace-event JSON.
+
+        Whole-run stages are on the compiling process's row. Each file's
+        stages are laid out back to back from the moment its compile started,
+        on the row of the process that compiled it.
+        """
+        events = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": self._pid, "args": {"name": "rawr compile"}}]
+        for span in self.spans:
+            events.append({
+                "name": span["name"], "cat": "stage", "ph": "X", "pid": self._pid, "tid": self._pid,
+                "ts": self._us(span["start"]), "dur": round(span["duration"] * 1_000_000, 3), "args": span["args"],
+            })
+        workers = set()
+        for record in self.files:
+            trace = record["trace"]
+            if trace is None:
+                continue
+            if trace["pid"] != self._pid and trace["pid"] not in workers:
+                workers.add(trace["pid"])
+                events.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": trace["pid"],
+                               "args": {"name": f"worker {trace['pid']}"}})
+            ts = self._us(trace["start"])
+            events.append({
+                "name": record["slug"], "cat": "file", "ph": "X", "pid": self._pid, "tid": trace["pid"],
+                "ts": ts, "dur": round(record["total_ms"] * 1000, 3),
+                "args": {"path": record["path"], "status": record["status"]},
+            })
+            for name, ms in record["timings"].items():
+                events.append({
+                    "name": name, "cat": "file-stage", "ph": "X", "pid": self._pid, "tid": trace["pid"],
+                    "ts": ts, "dur": round(ms * 1000, 3),
+                })
+                ts = round(ts + ms * 1000, 3)
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": dict(self.info)}
+
+    def write_chrome_trace(self, path: Path):
+        """
+        Writes the Chrome trace-event JSON file.
+
+        Raises:
+            OSError: If the file cannot be written.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,211 @@
+# cli/prompt_includes.py
+"""
+Shared prompt fragments pulled into agent prompts at compile time.
+
+A line consisting only of an include directive
+
+    <!-- @include sop/review.md -->
+
+is replaced by the rendered text of that fragment. Fragments live under
+`<agent config dir>/_fragments/` (`constants.FRAGMENTS_DIRNAME`), are named
+by their path relative to it, and may include other fragments. The directive
+is an HTML comment so prompts stay valid markdown either way.
+
+Rendering reports the fragments each prompt depends on (transitively), keyed
+by name with the SHA-256 digest of the fragment's source. The compile
+manifest stores these dependencies next to each config, so editing a fragment
+recompiles exactly the agents that include it (see `compile_manifest.lookup`).
+
+Rendered fragments are cached by a hash of their source and of everything
+they include, so a fragment shared by many agents is rendered once per
+process. Sources are re-read whenever their size or mtime change.
+"""
+import hashlib
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import constants
+from .exceptions import FragmentIncludeError
+
+# Config fields whose text may contain include directives
+RENDERED_FIELDS = (constants.ROLE_DEFINITION, constants.CUSTOM_INSTRUCTIONS)
+INCLUDE_MARKER = "@include"
+_INCLUDE_DIRECTIVE = re.compile(r'^[ \t]*<!--[ \t]*@include[ \t]+(?P<name>[^\s>]+)[ \t]*-->[ \t]*$', re.MULTILINE)
+
+# Sources modified this recently may change again within the same mtime tick,
+# so their stat data alone is not trusted (as in compile_manifest)
+_RACY_WINDOW_NS = 2_000_000_000
+# Rendered fragments kept per process before the cache is cleared
+_RENDER_CACHE_LIMIT = 4096
+
+
+def has_includes(text: str) -> bool:
+    """Cheap pre-check: False means the text certainly contains no include directive."""
+    return INCLUDE_MARKER in text
+
+
+def include_names(text: str) -> List[str]:
+    """Returns the fragment names of the include directives in the text, in order."""
+    if not has_includes(text):
+        return []
+    return [match.group("name") for match in _INCLUDE_DIRECTIVE.finditer(text)]
+
+
+def get_fragments_dir(agent_config_dir: Path) -> Path:
+    """Returns the fragment directory of an agent config directory."""
+    return agent_config_dir / constants.FRAGMENTS_DIRNAME
+
+
+class FragmentRenderer:
+    """Renders include directives against one fragment directory."""
+
+    def __init__(self, fragments_dir: Path):
+        self.fragments_dir = fragments_dir
+        self._root = fragments_dir.resolve()
+        self._sources: Dict[str, Tuple[int, int, str, str]] = {} # name -> (size, mtime_ns, text, digest)
+        # render hash -> (rendered text, transitive dependencies)
+        self._rendered: Dict[str, Tuple[str, Dict[str, str]]] = {}
+
+    def _path(self, name: str) -> Path:
+        path = (self.fragments_dir / name).resolve()
+        if path == self._root or self._root not in path.parents:
+            raise FragmentIncludeError(f"Fragment '{name}' is outside the fragment directory {self.fragments_dir}.")
+        return path
+
+    def source(self, name: str) -> Tuple[str, str]:
+        """
+        Returns a fragment's source text and SHA-256 digest.
+
+        Raises:
+            FragmentIncludeError: If the fragment does not exist or cannot be read.
+        """
+        path = self._path(name)
+        try:
+            stat = path.stat()
+            cached = self._sources.get(name)
+            racy = stat.st_mtime_ns >= time.time_ns() - _RACY_WINDOW_NS
+            if cached is not None and not racy and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                return cached[2], cached[3]
+            data = path.read_bytes()
+            text = data.decode('utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            raise FragmentIncludeError(f"Cannot read fragment '{name}' from {path}: {e}") from e
+        fragment_digest = hashlib.sha256(data).hexdigest()
+        self._sources[name] = (stat.st_size, stat.st_mtime_ns, text, fragment_digest)
+        return text, fragment_digest
+
+    def source_digest(self, name: str) -> Optional[str]:
+        """Returns the digest of a fragment's source, or None if it cannot be read."""
+        try:
+            return self.source(name)[1]
+        except FragmentIncludeError:
+            return None
+
+    def _render_fragment(self, name: str, stack: List[str]) -> Tuple[str, str, Dict[str, str]]:
+        """Returns a fragment's rendered text, render hash and dependencies (including itself)."""
+        if name in stack:
+            raise FragmentIncludeError(f"Fragment include cycle: {' -> '.join(stack + [name])}")
+        text, fragment_digest = self.source(name)
+        stack = stack + [name]
+        children = [self._render_fragment(child, stack) for child in include_names(text)]
+        render_hash = hashlib.sha256(
+            "\0".join([fragment_digest] + [child_hash for _, child_hash, _ in children]).encode('ascii')
+        ).hexdigest()
+        cached = self._rendered.get(render_hash)
+        if cached is None:
+            rendered = _substitute(text, iter(child_text for child_text, _, _ in children))
+            dependencies = {name: fragment_digest}
+            for _, _, child_dependencies in children:
+                dependencies.update(child_dependencies)
+            if len(self._rendered) >= _RENDER_CACHE_LIMIT:
+                self._rendered.clear()
+            cached = self._rendered[render_hash] = (rendered, dependencies)
+        return cached[0], render_hash, cached[1]
+
+    def render(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Expands every include directive in the text.
+
+        Returns:
+            A tuple containing:
+                - rendered: The text with directives replaced by the rendered fragments.
+                - dependencies: Fragment name -> source digest of every fragment
+                                used, including nested includes.
+
+        Raises:
+            FragmentIncludeError: If a fragment is missing, unreadable, outside
+                                  the fragment directory or includes itself.
+        """
+        names = include_names(text)
+        if not names:
+            return text, {}
+        children = [self._render_fragment(name, []) for name in names]
+        dependencies: Dict[str, str] = {}
+        for _, _, child_dependencies in children:
+            dependencies.update(child_dependencies)
+        return _substitute(text, iter(child_text for child_text, _, _ in children)), dependencies
+
+
+def _substitute(text: str, rendered_children) -> str:
+    """Replaces each directive line, in order, with the next rendered fragment (minus one trailing newline)."""
+    return _INCLUDE_DIRECTIVE.sub(lambda match: _strip_newline(next(rendered_children)), text)
+
+
+def _strip_newline(text: str) -> str:
+    # The directive's own line break follows the substituted text
+    return text[:-1] if text.endswith("\n") else text
+
+
+_renderers: Dict[Path, FragmentRenderer] = {}
+
+
+def get_renderer(fragments_dir: Path) -> FragmentRenderer:
+    """Returns the process-wide renderer (and its caches) for a fragment directory."""
+    renderer = _renderers.get(fragments_dir)
+    if renderer is None:
+        renderer = _renderers[fragments_dir] = FragmentRenderer(fragments_dir)
+    return renderer
+
+
+def referenced_fragments(text: str, fragments_dir: Path) -> Set[str]:
+    """
+    Returns the names of all fragments the text includes, directly or through other fragments.
+
+    Only the directives are followed; nothing is rendered. Fragments that
+    cannot be read are listed but not followed.
+    """
+    renderer = get_renderer(fragments_dir)
+    names: Set[str] = set()
+    pending = include_names(text)
+    while pending:
+        name = pending.pop()
+        if name in names:
+            continue
+        names.add(name)
+        try:
+            pending.extend(include_names(renderer.source(name)[0]))
+        except FragmentIncludeError:
+            pass
+    return names
+
+
+def render_config(config_data: dict, fragments_dir: Path) -> Dict[str, str]:
+    """
+    Expands include directives in the prompt fields of parsed config data, in place.
+
+    Returns:
+        Fragment name -> source digest of every fragment used (empty if the
+        config has no include directives).
+
+    Raises:
+        FragmentIncludeError: If a directive cannot be resolved.
+    """
+    dependencies: Dict[str, str] = {}
+    for field in RENDERED_FIELDS:
+        value = config_data.get(field)
+        if isinstance(value, str) and has_includes(value):
+            config_data[field], field_dependencies = get_renderer(fragments_dir).render(value)
+            dependencies.update(field_dependencies)
+    return dependencies
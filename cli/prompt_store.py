@@ -0,0 +1,350 @@
+# cli/prompt_store.py
+"""
+Content-addressed storage for the prompt fields of the global registry.
+
+Many modes share large blocks of prompt text: SOP sections, the
+"Core Identity & Purpose" scaffolding, boilerplate instructions. With the
+prompt store enabled, each mode's `roleDefinition` and `customInstructions`
+are split into fragments at markdown headings, and every distinct fragment is
+kept once, as a blob named by the SHA-256 digest of its text:
+
+    <registry dir>/prompt_store/registry.json        # Registry with fragment references
+    <registry dir>/prompt_store/blobs/ab/ab12...ef   # One UTF-8 fragment per file
+
+In `registry.json` a prompt field is stored as `{"$fragments": [digest, ...]}`;
+concatenating the fragments gives back the original text exactly. A write
+only creates blobs that do not exist yet, so unchanged prompts cost no blob
+writes, and inflating the store reuses one string per distinct fragment.
+
+While the store exists it is the source of truth for `registry_manager`:
+reads inflate it and writes go to it. The registry JSON read by the editor
+extension is then no longer rewritten on every compile; `materialize_registry`
+(`rawr materialize`) writes it on demand.
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Set
+
+from . import constants
+from . import profiling
+from . import registry_manager
+from .exceptions import RegistryReadError
+
+logger = logging.getLogger(__name__)
+
+# Registry fields whose text is split into fragments and stored as blobs
+PROMPT_FIELDS = (constants.ROLE_DEFINITION, constants.CUSTOM_INSTRUCTIONS)
+FRAGMENTS_KEY = "$fragments"
+STORE_REGISTRY_FILENAME = "registry.json"
+BLOBS_DIRNAME = "blobs"
+
+# Zero-width split points: the start of every markdown heading line
+_HEADING_START = re.compile(r'^(?=#{1,6}[ \t])', re.MULTILINE)
+
+
+def get_store_dir(registry_path: Path) -> Path:
+    """Returns the prompt store directory that belongs to the given registry file."""
+    return registry_path.with_name(constants.PROMPT_STORE_DIRNAME)
+
+
+def get_store_registry_path(registry_path: Path) -> Path:
+    """Returns the path of the store's registry (with fragment references)."""
+    return get_store_dir(registry_path) / STORE_REGISTRY_FILENAME
+
+
+def is_enabled(registry_path: Path) -> bool:
+    """Returns True if the registry is kept in the prompt store."""
+    return get_store_registry_path(registry_path).is_file()
+
+
+def split_fragments(text: str) -> List[str]:
+    """
+    Splits prompt text into fragments, each starting at a markdown heading.
+
+    Text before the first heading is its own fragment. The fragments
+    concatenate to the original text.
+    """
+    return [fragment for fragment in _HEADING_START.split(text) if fragment]
+
+
+def digest(text: str) -> str:
+    """Returns the hex SHA-256 digest that names a fragment's blob."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PromptStore:
+    """The fragment blobs of one prompt store, with an in-memory cache of fragments already read or written."""
+
+    def __init__(self, store_dir: Path):
+        self.store_dir = store_dir
+        self.blobs_dir = store_dir / BLOBS_DIRNAME
+        self._fragments: Dict[str, str] = {} # digest -> fragment text
+        self._dirty_dirs: Set[Path] = set() # Shard directories with blobs not yet fsync'd
+        self.blobs_written = 0
+
+    def blob_path(self, fragment_digest: str) -> Path:
+        # Sharded by the first two hex digits, like git objects
+        return self.blobs_dir / fragment_digest[:2] / fragment_digest
+
+    def put(self, fragment: str) -> str:
+        """
+        Stores a fragment unless a blob with its digest already exists.
+
+        Returns:
+            The fragment's digest.
+
+        Raises:
+            OSError: If the blob cannot be written.
+        """
+        fragment_digest = digest(fragment)
+        if fragment_digest in self._fragments:
+            return fragment_digest
+        path = self.blob_path(fragment_digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{fragment_digest}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+            try:
+                with open(tmp_path, 'xb') as f:
+                    f.write(fragment.encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+                raise
+            self._dirty_dirs.add(path.parent)
+            self.blobs_written += 1
+        self._fragments[fragment_digest] = fragment
+        return fragment_digest
+
+    def get(self, fragment_digest: str) -> str:
+        """
+        Returns a fragment's text.
+
+        Raises:
+            RegistryReadError: If the blob is missing, unreadable or does not match its digest.
+        """
+        fragment = self._fragments.get(fragment_digest)
+        if fragment is not None:
+            return fragment
+        path = self.blob_path(fragment_digest)
+        try:
+            fragment = path.read_bytes().decode('utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            raise RegistryReadError(f"Cannot read prompt fragment {fragment_digest} from {path}: {e}") from e
+        if digest(fragment) != fragment_digest:
+            raise RegistryReadError(f"Prompt fragment {path} does not match its digest.")
+        self._fragments[fragment_digest] = fragment
+        return fragment
+
+    def flush(self):
+        """Makes the directory entries of newly written blobs durable (not supported on Windows)."""
+        if hasattr(os, "O_DIRECTORY"):
+            for directory in sorted(self._dirty_dirs):
+                dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+        self._dirty_dirs.clear()
+
+    def deflate(self, registry_data: dict) -> dict:
+        """Returns registry data with every string prompt field replaced by a fragment reference, storing new fragments."""
+        modes = []
+        for mode in registry_data.get(constants.CUSTOM_MODES, []):
+            if isinstance(mode, dict):
+                mode = dict(mode)
+                for field in PROMPT_FIELDS:
+                    if isinstance(mode.get(field), str):
+                        mode[field] = {FRAGMENTS_KEY: [self.put(fragment) for fragment in split_fragments(mode[field])]}
+            modes.append(mode)
+        return {**registry_data, constants.CUSTOM_MODES: modes}
+
+    def inflate(self, store_data: dict) -> dict:
+        """
+        Returns registry data with every fragment reference replaced by its text.
+
+        Raises:
+            RegistryReadError: If a referenced fragment cannot be read.
+        """
+        modes = []
+        for mode in store_data.get(constants.CUSTOM_MODES, []):
+            if isinstance(mode, dict):
+                for field in PROMPT_FIELDS:
+                    reference = mode.get(field)
+                    if isinstance(reference, dict) and FRAGMENTS_KEY in reference:
+                        fragments = [self.get(fragment_digest) for fragment_digest in reference[FRAGMENTS_KEY]]
+                        # A single-fragment prompt shares the cached string instead of copying it
+                        mode[field] = fragments[0] if len(fragments) == 1 else "".join(fragments)
+            modes.append(mode)
+        return {**store_data, constants.CUSTOM_MODES: modes}
+
+    def iter_blob_digests(self) -> Iterator[str]:
+        """Yields the digest of every blob in the store."""
+        if not self.blobs_dir.is_dir():
+            return
+        for shard in os.scandir(self.blobs_dir):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.is_file() and not entry.name.startswith("."):
+                        yield entry.name
+
+
+def referenced_digests(store_data: dict) -> Set[str]:
+    """Returns the digests of all fragments referenced by store registry data."""
+    digests = set()
+    for mode in store_data.get(constants.CUSTOM_MODES, []):
+        if isinstance(mode, dict):
+            for field in PROMPT_FIELDS:
+                reference = mode.get(field)
+                if isinstance(reference, dict):
+                    digests.update(reference.get(FRAGMENTS_KEY, []))
+    return digests
+
+
+def _read_store_data(registry_path: Path) -> dict:
+    """Reads the store's registry file with fragment references left in place."""
+    store_registry_path = get_store_registry_path(registry_path)
+    try:
+        with open(store_registry_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RegistryReadError(f"Cannot read prompt store registry {store_registry_path}: {e}") from e
+    if not isinstance(data, dict) or not isinstance(data.get(constants.CUSTOM_MODES), list):
+        raise RegistryReadError(f"Invalid structure in prompt store registry {store_registry_path}.")
+    return data
+
+
+def read_store_registry(registry_path: Path) -> dict:
+    """
+    Reads the registry from the prompt store, with every prompt field inflated.
+
+    Unlike a broken registry JSON file, which reads as an empty registry, an
+    unreadable store raises: the prompt text it references cannot be
+    recovered from anywhere else.
+
+    Args:
+        registry_path: The path to the global registry JSON file.
+
+    Raises:
+        RegistryReadError: If the store registry or a fragment it references cannot be read.
+    """
+    data = _read_store_data(registry_path)
+    with profiling.stage("prompt_store.inflate"):
+        return PromptStore(get_store_dir(registry_path)).inflate(data)
+
+
+def write_store_registry(registry_data: dict, registry_path: Path, skip_unchanged: bool = False) -> bool:
+    """
+    Writes registry data into the prompt store, creating the store if needed.
+
+    New fragments are written (and made durable) before the store registry
+    that references them is atomically replaced.
+
+    Args:
+        registry_data: The registry data to write.
+        registry_path: The path to the global registry JSON file.
+        skip_unchanged: If True, the store registry is not rewritten when its
+                        bytes would be identical.
+
+    Returns:
+        True if the store registry was written, False if the write was skipped.
+
+    Raises:
+        OSError: If a blob or the store registry cannot be written.
+    """
+    store = PromptStore(get_store_dir(registry_path))
+    with profiling.stage("prompt_store.deflate"):
+        payload = registry_manager.serialize_registry(store.deflate(registry_data))
+        store.flush()
+    store_registry_path = get_store_registry_path(registry_path)
+    if skip_unchanged:
+        with profiling.stage("registry.compare"):
+            try:
+                current = store_registry_path.read_bytes()
+            except FileNotFoundError:
+                current = None
+        if current == payload:
+            logger.info(f"Prompt store registry at {store_registry_path} is unchanged. Skipping write.")
+            return False
+    with profiling.stage("registry.write", bytes=len(payload), blobs=store.blobs_written):
+        registry_manager.atomic_write_bytes(store_registry_path, payload)
+    logger.info(f"Wrote registry to prompt store {store_registry_path} ({store.blobs_written} new fragment(s))")
+    return True
+
+
+def materialize_registry(registry_path: Path) -> bool:
+    """
+    Writes the full registry JSON for the editor extension from the prompt store.
+
+    Pending journal records are included, as in `registry_manager.read_global_registry`.
+
+    Returns:
+        True if the JSON file was written, False if it was already up to date.
+
+    Raises:
+        RegistryReadError: If the prompt store cannot be read.
+        OSError: If the JSON file cannot be written.
+    """
+    payload = registry_manager.serialize_registry(registry_manager.read_global_registry(registry_path))
+    try:
+        if registry_path.read_bytes() == payload:
+            return False
+    except FileNotFoundError:
+        pass
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+    registry_manager.atomic_write_bytes(registry_path, payload)
+    logger.info(f"Materialized registry from the prompt store into {registry_path}")
+    return True
+
+
+def disable_prompt_store(registry_path: Path):
+    """
+    Moves the registry back into its JSON file and removes the prompt store.
+
+    The JSON file is written before the store is removed, so a crash in
+    between loses nothing.
+
+    Raises:
+        RegistryReadError: If the prompt store cannot be read.
+        OSError: If the JSON file cannot be written or the store removed.
+    """
+    materialize_registry(registry_path)
+    shutil.rmtree(get_store_dir(registry_path))
+    # The JSON file already includes any journal records; replaying them is idempotent
+    registry_manager.compact_registry(registry_path)
+    logger.info(f"Removed prompt store for {registry_path}")
+
+
+def prune_blobs(registry_path: Path) -> int:
+    """
+    Removes blobs no longer referenced by the store registry.
+
+    Journal records hold full prompt text, so they never reference blobs.
+    Do not run this while a compile may be writing to the store.
+
+    Returns:
+        The number of blobs removed.
+
+    Raises:
+        RegistryReadError: If the store registry cannot be read.
+    """
+    referenced = referenced_digests(_read_store_data(registry_path))
+    store = PromptStore(get_store_dir(registry_path))
+    removed = 0
+    for fragment_digest in list(store.iter_blob_digests()):
+        if fragment_digest not in referenced:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(store.blob_path(fragment_digest))
+                removed += 1
+    if removed:
+        logger.info(f"Pruned {removed} unreferenced prompt fragment(s) from {store.blobs_dir}")
+    return removed
@@ -0,0 +1,178 @@
+# cli/registry_diff.py
+"""
+Structural diff of two registry states, per slug and per field.
+
+`diff_registries` indexes both `customModes` lists by slug in one pass each
+(first entry wins for duplicate slugs, as in `registry_manager.SlugIndexedRegistry`)
+and compares matching entries field by field, so the cost is linear in the
+size of the registries. Entries that are not indexed (not a dict, no slug,
+duplicate slug) and top-level keys other than `customModes` are compared as
+a whole.
+
+An empty diff means the two registries are equal, so it also tells the
+compiler whether a registry write is needed at all.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import constants
+
+# Field values shorter than this are shown in full in text output
+_MAX_INLINE_VALUE = 60
+
+
+class _Missing:
+    """Marks a field that is absent on one side of a change."""
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+
+MISSING = _Missing()
+
+
+@dataclass
+class RegistryDiff:
+    """What changed between two registry states."""
+    added: List[str] = field(default_factory=list)  # Slugs only in the new registry, in its order
+    removed: List[str] = field(default_factory=list)  # Slugs only in the old registry, in its order
+    changed: Dict[str, Dict[str, Tuple[Any, Any]]] = field(default_factory=dict)  # Slug -> field -> (old, new)
+    reordered: bool = False  # Slugs present in both are in a different order
+    layout: List[str] = field(default_factory=list)  # Changed top-level keys other than customModes
+    unindexed_changed: bool = False  # Entries without a usable slug differ
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.reordered or self.layout or self.unindexed_changed)
+
+    def summary(self) -> str:
+        """Returns a one-line count of the changes."""
+        return f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the diff as JSON-compatible data (changed slugs map to their changed field names)."""
+        return {
+            "added": list(self.added),
+            "removed": list(self.removed),
+            "changed": {slug: list(fields) for slug, fields in self.changed.items()},
+            "reordered": self.reordered,
+            "layout": list(self.layout),
+            "unindexed_changed": self.unindexed_changed,
+        }
+
+    def format_lines(self) -> List[str]:
+        """Returns the diff as human-readable lines: '+' added, '~' changed, '-' removed."""
+        if self.is_empty:
+            return ["Registry diff: no changes."]
+        lines = [f"Registry diff: {self.summary()}"]
+        lines.extend(f"  + {slug}" for slug in self.added)
+        for slug, fields in self.changed.items():
+            lines.append(f"  ~ {slug}")
+            lines.extend(f"      {_describe_change(name, old, new)}" for name, (old, new) in fields.items())
+        lines.extend(f"  - {slug}" for slug in self.removed)
+        if self.reordered:
+            lines.append("  ~ (order of modes changed)")
+        if self.layout:
+            lines.append(f"  ~ (top-level keys changed: {', '.join(self.layout)})")
+        if self.unindexed_changed:
+            lines.append("  ~ (entries without a unique slug changed)")
+        return lines
+
+
+def _inline(value: Any) -> Optional[str]:
+    """Returns the JSON text of a short value, or None if it is too long to show inline."""
+    if value is MISSING:
+        return "(absent)"
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= _MAX_INLINE_VALUE else None
+
+
+def _describe_change(name: str, old: Any, new: Any) -> str:
+    old_text, new_text = _inline(old), _inline(new)
+    if old_text is not None and new_text is not None:
+        return f"{name}: {old_text} -> {new_text}"
+    if isinstance(old, str) and isinstance(new, str):
+        return f"{name}: {len(old)} -> {len(new)} chars"
+    return name
+
+
+def _index_modes(modes: List[Any]) -> Tuple[Dict[str, Any], List[Optional[str]], List[Any]]:
+    """
+    Indexes entries by slug in one pass.
+
+    Returns:
+        A tuple of (slug -> entry, the slug of each position or None if the
+        entry is not indexed, the entries that are not indexed).
+    """
+    by_slug: Dict[str, Any] = {}
+    order: List[Optional[str]] = []
+    unindexed: List[Any] = []
+    for mode in modes:
+        slug = mode.get(constants.SLUG) if isinstance(mode, dict) else None
+        if isinstance(slug, str) and slug not in by_slug:
+            by_slug[slug] = mode
+            order.append(slug)
+        else:
+            unindexed.append(mode)
+            order.append(None)
+    return by_slug, order, unindexed
+
+
+def _modes(registry_data: Optional[dict]) -> List[Any]:
+    modes = (registry_data or {}).get(constants.CUSTOM_MODES, [])
+    return modes if isinstance(modes, list) else []
+
+
+def diff_registries(old: Optional[dict], new: Optional[dict]) -> RegistryDiff:
+    """
+    Compares two registry states.
+
+    Args:
+        old: The current registry data (e.g. as read from disk). None or {}
+             is treated as an empty registry.
+        new: The registry data that would be written.
+
+    Returns:
+        A RegistryDiff; `is_empty` is True exactly when the two are equal
+        (a missing `customModes` list counts as an empty one).
+    """
+    old_by_slug, old_order, old_unindexed = _index_modes(_modes(old))
+    new_by_slug, new_order, new_unindexed = _index_modes(_modes(new))
+    diff = RegistryDiff()
+
+    for slug in new_order:
+        if slug is None:
+            continue
+        new_mode = new_by_slug[slug]
+        old_mode = old_by_slug.get(slug)
+        if old_mode is None:
+            diff.added.append(slug)
+        elif old_mode != new_mode:
+            fields = {
+                name: (old_mode.get(name, MISSING), value)
+                for name, value in new_mode.items() if old_mode.get(name, MISSING) != value
+            }
+            fields.update((name, (value, MISSING)) for name, value in old_mode.items() if name not in new_mode)
+            diff.changed[slug] = fields
+    diff.removed = [slug for slug in old_order if slug is not None and slug not in new_by_slug]
+
+    common_old = [slug for slug in old_order if slug is not None and slug in new_by_slug]
+    common_new = [slug for slug in new_order if slug is not None and slug in old_by_slug]
+    diff.reordered = common_old != common_new
+
+    # Unindexed entries are compared as a list, along with where they sit (which
+    # only says something when no indexed entries were added or removed)
+    old_positions = [position for position, slug in enumerate(old_order) if slug is None]
+    new_positions = [position for position, slug in enumerate(new_order) if slug is None]
+    diff.unindexed_changed = old_unindexed != new_unindexed or (
+        not diff.added and not diff.removed and old_positions != new_positions
+    )
+
+    old_layout = {key: value for key, value in (old or {}).items() if key != constants.CUSTOM_MODES}
+    new_layout = {key: value for key, value in (new or {}).items() if key != constants.CUSTOM_MODES}
+    diff.layout = sorted(
+        key for key in old_layout.keys() | new_layout.keys()
+        if old_layout.get(key, MISSING) != new_layout.get(key, MISSING)
+    )
+    return diff
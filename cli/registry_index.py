@@ -0,0 +1,192 @@
+# cli/registry_index.py
+"""
+Reverse index of the global registry: group name -> slugs and fileRegex pattern -> slugs.
+
+The index is rebuilt whenever the registry is written and stored next to it
+(`constants.REGISTRY_INDEX_FILENAME`), so "which modes have edit access" or
+"which modes are restricted to `\\.md$`" are dictionary lookups instead of a
+scan over every mode's heterogeneous `groups` list.
+
+The index records the stat data of the registry file and the size of its
+journal. If either no longer matches, e.g. after a journal append or a
+hand edit, `load_registry_index` rebuilds the index from the registry.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import constants
+from . import permissions
+from . import prompt_store
+from . import registry_manager
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+
+def get_index_path(registry_path: Path) -> Path:
+    """Returns the index path that belongs to the given registry file."""
+    return registry_path.with_name(constants.REGISTRY_INDEX_FILENAME)
+
+
+def _registry_stamp(registry_path: Path) -> Optional[Dict[str, int]]:
+    """
+    Returns the registry file's stat data and journal size, or None if the registry does not exist.
+
+    With the prompt store enabled, the store's registry file is stamped instead.
+    """
+    source_path = registry_path
+    if prompt_store.is_enabled(registry_path):
+        source_path = prompt_store.get_store_registry_path(registry_path)
+    try:
+        stat = source_path.stat()
+    except FileNotFoundError:
+        return None
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "journal_size": registry_manager.journal_size(registry_path),
+        "prompt_store": source_path != registry_path,
+    }
+
+
+def build_registry_index(registry_data: dict) -> Dict[str, Any]:
+    """
+    Builds the reverse index for registry data.
+
+    Returns:
+        A dictionary with:
+            - groups: group name -> slugs with any access to the group.
+            - unrestricted: group name -> slugs granted the group without a fileRegex.
+            - restrictions: fileRegex pattern -> group name -> slugs restricted by it.
+        Slug lists are in registry order.
+    """
+    groups: Dict[str, List[str]] = {}
+    unrestricted: Dict[str, List[str]] = {}
+    restrictions: Dict[str, Dict[str, List[str]]] = {}
+    seen = set()
+    for mode in registry_data.get("customModes", []):
+        if not isinstance(mode, dict) or "slug" not in mode or mode["slug"] in seen:
+            continue # First entry wins for duplicate slugs, as in the registry
+        slug = mode["slug"]
+        seen.add(slug)
+        for group, patterns in permissions.parse_groups(mode.get("groups")).items():
+            groups.setdefault(group, []).append(slug)
+            if patterns is permissions.ALLOW_ALL:
+                unrestricted.setdefault(group, []).append(slug)
+                continue
+            for pattern in dict.fromkeys(patterns): # Deduplicated, in order
+                restrictions.setdefault(pattern, {}).setdefault(group, []).append(slug)
+    return {
+        "version": INDEX_VERSION,
+        "groups": groups,
+        "unrestricted": unrestricted,
+        "restrictions": restrictions,
+    }
+
+
+def write_registry_index(registry_path: Path, registry_data: dict) -> Dict[str, Any]:
+    """
+    Builds the index for registry data and writes it next to the registry.
+
+    Call this after the registry file itself has been written, so the stamp
+    matches it.
+
+    Returns:
+        The written index.
+
+    Raises:
+        OSError: If the index cannot be written.
+    """
+    index = build_registry_index(registry_data)
+    index["registry"] = _registry_stamp(registry_path)
+    payload = json.dumps(index, indent=2, sort_keys=True).encode('utf-8')
+    registry_manager.atomic_write_bytes(get_index_path(registry_path), payload)
+    logger.info(f"Wrote registry index for {registry_path}")
+    return index
+
+
+def refresh_registry_index(registry_path: Path, registry_data: dict) -> bool:
+    """
+    Rewrites the index after a registry write, unless it is already current.
+
+    Failures are logged and ignored: a missing or stale index is rebuilt on
+    the next `load_registry_index`.
+
+    Returns:
+        True if the index was written.
+    """
+    try:
+        with open(get_index_path(registry_path), 'r', encoding='utf-8') as f:
+            current = json.load(f)
+        if isinstance(current, dict) and current.get("registry") == _registry_stamp(registry_path) \
+                and current.get("version") == INDEX_VERSION:
+            return False
+    except (OSError, json.JSONDecodeError):
+        pass
+    try:
+        write_registry_index(registry_path, registry_data)
+        return True
+    except OSError as e:
+        logger.warning(f"Could not write registry index for {registry_path}: {e}")
+        return False
+
+
+def load_registry_index(registry_path: Path) -> Dict[str, Any]:
+    """
+    Returns the registry index, rebuilding (and rewriting) it if it is missing or stale.
+
+    Args:
+        registry_path: The path to the global registry JSON file.
+    """
+    index_path = get_index_path(registry_path)
+    stamp = _registry_stamp(registry_path)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if isinstance(index, dict) and index.get("version") == INDEX_VERSION and index.get("registry") == stamp:
+            return index
+        logger.info(f"Registry index {index_path} is stale. Rebuilding it.")
+    except FileNotFoundError:
+        logger.info(f"No registry index found at {index_path}. Building it.")
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not read registry index {index_path}: {e}. Rebuilding it.")
+
+    registry_data = registry_manager.read_global_registry(registry_path)
+    if stamp is None:
+        return build_registry_index(registry_data) # Nothing on disk to index against
+    try:
+        return write_registry_index(registry_path, registry_data)
+    except OSError as e:
+        logger.warning(f"Could not write registry index {index_path}: {e}")
+        return build_registry_index(registry_data)
+
+
+def slugs_with_group(index: Dict[str, Any], group: str, unrestricted_only: bool = False) -> List[str]:
+    """Returns the slugs with access to a group (only those without a fileRegex if `unrestricted_only`)."""
+    return list(index["unrestricted" if unrestricted_only else "groups"].get(group, []))
+
+
+def slugs_with_restriction(index: Dict[str, Any], pattern: str, group: Optional[str] = None) -> List[str]:
+    """Returns the slugs restricted by an exact fileRegex pattern, optionally for one group only."""
+    by_group = index["restrictions"].get(pattern, {})
+    if group is not None:
+        return list(by_group.get(group, []))
+    return list(dict.fromkeys(slug for slugs in by_group.values() for slug in slugs))
+
+
+def slugs_for_path(index: Dict[str, Any], group: str, path: str) -> List[str]:
+    """
+    Returns the slugs that may use a group on a path, in registry order.
+
+    Each distinct pattern is evaluated once (compiled patterns are cached),
+    however many agents share it.
+    """
+    path = permissions.normalize_path(path)
+    allowed = set(index["unrestricted"].get(group, []))
+    for pattern, by_group in index["restrictions"].items():
+        if group in by_group and permissions.compile_file_regex(pattern).search(path):
+            allowed.update(by_group[group])
+    return [slug for slug in index["groups"].get(group, []) if slug in allowed]
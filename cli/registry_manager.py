@@ -1,10 +1,14 @@
+import contextlib
 import json
 import os
 import pathlib
 import shutil
 import tempfile
 import logging
+import uuid
 from . import config_loader # Import the new global config loader
+from . import constants
+from . import profiling
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,6 +23,10 @@ def read_global_registry(registry_path: pathlib.Path = None) -> dict:
     """
     Reads the global custom modes registry JSON file.
 
+    Any pending entries in the registry journal (see `append_registry_journal`)
+    are replayed on top of the materialized JSON, so callers always see the
+    current registry state.
+
     Args:
         registry_path: The path to the global registry JSON file.
 
@@ -26,6 +34,26 @@ def read_global_registry(registry_path: pathlib.Path = None) -> dict:
         A dictionary containing the registry data. Returns a default structure
         if the file is not found or is invalid JSON.
     """
+    with profiling.stage("registry.read"):
+        data = _read_materialized_registry(registry_path)
+    journal_entries = read_registry_journal(registry_path)
+    if journal_entries:
+        with profiling.stage("registry.journal_replay", entries=len(journal_entries)):
+            data = _replay_journal(data, journal_entries)
+    return data
+
+
+def _read_materialized_registry(registry_path: pathlib.Path) -> dict:
+    """
+    Reads the registry JSON file itself, without replaying the journal.
+
+    If the prompt store is enabled (see cli/prompt_store.py), the registry is
+    read from the store instead; its errors are raised rather than returning
+    the default structure.
+    """
+    from . import prompt_store # Imported here as prompt_store depends on this module
+    if prompt_store.is_enabled(registry_path):
+        return prompt_store.read_store_registry(registry_path)
     default_registry = {"customModes": []}
     try:
         if not registry_path.exists():
@@ -51,6 +79,147 @@ def read_global_registry(registry_path: pathlib.Path = None) -> dict:
         return default_registry
 
 
+# --- Registry Journal ---
+# Single-agent updates can be appended to a small write-ahead journal next to
+# the registry instead of rewriting the whole (large) JSON file. The journal is
+# newline-delimited JSON, one {"op": "upsert", "mode": {...}} or
+# {"op": "delete", "slug": "..."} record per line. Compaction folds it back
+# into the materialized JSON that the editor extension reads.
+
+def get_journal_path(registry_path: pathlib.Path) -> pathlib.Path:
+    """Returns the journal path that belongs to the given registry file."""
+    return registry_path.with_name(registry_path.name + constants.REGISTRY_JOURNAL_SUFFIX)
+
+
+def journal_size(registry_path: pathlib.Path) -> int:
+    """Returns the size of the registry journal in bytes (0 if there is none)."""
+    try:
+        return get_journal_path(registry_path).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def append_registry_journal(registry_path: pathlib.Path, entries: list):
+    """
+    Appends upsert/delete records to the registry journal and fsyncs it.
+
+    Args:
+        registry_path: The path to the global registry JSON file.
+        entries: Journal records, e.g. {"op": "upsert", "mode": {...}} or
+                 {"op": "delete", "slug": "..."}. Upserted modes have
+                 'customInstructions' removed, as in `update_global_registry`.
+
+    Raises:
+        ValueError: If a record has an unknown op or is missing its payload.
+        OSError: If the journal cannot be written.
+    """
+    lines = []
+    for entry in entries:
+        if entry.get("op") == "upsert" and isinstance(entry.get("mode"), dict) and "slug" in entry["mode"]:
+            mode = {k: v for k, v in entry["mode"].items() if k != "customInstructions"}
+            lines.append(json.dumps({"op": "upsert", "mode": mode}))
+        elif entry.get("op") == "delete" and isinstance(entry.get("slug"), str):
+            lines.append(json.dumps({"op": "delete", "slug": entry["slug"]}))
+        else:
+            raise ValueError(f"Invalid registry journal entry: {entry!r}")
+    if not lines:
+        return
+
+    journal_path = get_journal_path(registry_path)
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+    # One write() per batch in append mode keeps concurrent appends from interleaving
+    with profiling.stage("registry.journal_append"), open(journal_path, 'ab') as f:
+        f.write(("\n".join(lines) + "\n").encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+    logging.info(f"Appended {len(lines)} entr{'y' if len(lines) == 1 else 'ies'} to registry journal {journal_path}")
+
+
+def read_registry_journal(registry_path: pathlib.Path) -> list:
+    """
+    Reads the pending journal records for a registry.
+
+    A torn trailing line (e.g. from a crash mid-append) or any other malformed
+    record is skipped with a warning.
+
+    Returns:
+        The list of valid journal records, oldest first.
+    """
+    if not journal_size(registry_path):
+        return []
+    journal_path = get_journal_path(registry_path)
+    entries = []
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                entry = None
+            if not isinstance(entry, dict) or entry.get("op") not in ("upsert", "delete"):
+                logging.warning(f"Skipping invalid entry on line {line_number} of registry journal {journal_path}.")
+                continue
+            entries.append(entry)
+    return entries
+
+
+def _discard_journal(registry_path: pathlib.Path):
+    """Removes the registry journal once the materialized JSON reflects it."""
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(get_journal_path(registry_path))
+
+
+def _replay_journal(registry_data: dict, entries: list) -> dict:
+    """Applies journal records to registry data, returning the resulting registry data."""
+    registry = SlugIndexedRegistry(registry_data)
+    for entry in entries:
+        if entry["op"] == "upsert":
+            registry.upsert(entry.get("mode"))
+        else:
+            registry.delete(entry.get("slug"))
+    return registry.to_dict()
+
+
+def compact_registry(registry_path: pathlib.Path = None) -> bool:
+    """
+    Folds any pending journal records into the materialized registry JSON.
+
+    The registry is rewritten atomically before the journal is removed, so a
+    crash in between only means the (idempotent) records are replayed again.
+
+    Args:
+        registry_path: The path to the global registry JSON file.
+
+    Returns:
+        True if there was a journal to compact, False otherwise.
+    """
+    if registry_path is None:
+        registry_path = config_loader.get_global_registry_path()
+    if not journal_size(registry_path):
+        return False
+    # write_global_registry removes the journal once the new registry is in place
+    write_global_registry(read_global_registry(registry_path), registry_path)
+    logging.info(f"Compacted registry journal into {registry_path}")
+    return True
+
+
+def compact_registry_if_needed(registry_path: pathlib.Path = None, threshold_bytes: int = None) -> bool:
+    """
+    Compacts the registry journal once it grows past `threshold_bytes`.
+
+    Returns:
+        True if the journal was compacted, False otherwise.
+    """
+    if registry_path is None:
+        registry_path = config_loader.get_global_registry_path()
+    if threshold_bytes is None:
+        threshold_bytes = constants.REGISTRY_JOURNAL_COMPACT_THRESHOLD_BYTES
+    if journal_size(registry_path) < threshold_bytes:
+        return False
+    return compact_registry(registry_path)
+
+
 def update_global_registry(registry_data: dict, agent_metadata: dict) -> dict:
     """
     Updates the registry data dictionary with new or modified agent metadata.
@@ -94,34 +263,223 @@ def update_global_registry(registry_data: dict, agent_metadata: dict) -> dict:
     return registry_data
 
 
-def write_global_registry(registry_data: dict, registry_path: pathlib.Path = None):
+# Marks a deleted position in SlugIndexedRegistry without shifting the list
+_DELETED = object()
+
+
+class SlugIndexedRegistry:
+    """
+    In-memory view of the global registry with a slug -> position index.
+
+    Keeps the `customModes` list in its original order alongside an index so
+    lookups, upserts and deletes by slug are O(1) instead of a linear scan.
+    Deleted positions are left as tombstones and dropped on serialization,
+    so deleting never shifts the positions recorded in the index.
+
+    Like `update_global_registry`, upserts exclude 'customInstructions' and
+    update the first entry with a matching slug if the registry contains
+    duplicates. Entries that are not dicts or have no slug are preserved but
+    not indexed.
+    """
+
+    def __init__(self, registry_data: dict = None):
+        if registry_data is None:
+            registry_data = {}
+        if not isinstance(registry_data, dict) or not isinstance(registry_data.get("customModes", []), list):
+            logging.error("Invalid registry_data structure passed to SlugIndexedRegistry. Initializing.")
+            registry_data = {"customModes": []}
+
+        # Keep any other top-level keys (and their order) so serialization round-trips them
+        self._layout = dict(registry_data)
+        self._modes = list(registry_data.get("customModes", []))
+        self._index = {}
+        self._deleted = 0
+        for position, mode in enumerate(self._modes):
+            if isinstance(mode, dict) and "slug" in mode:
+                self._index.setdefault(mode["slug"], position)
+
+    def __len__(self) -> int:
+        return len(self._modes) - self._deleted
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._index
+
+    def slugs(self) -> list:
+        """Returns the indexed slugs in registry order."""
+        return [slug for slug, _ in sorted(self._index.items(), key=lambda item: item[1])]
+
+    def get(self, slug: str):
+        """Returns the mode entry for a slug, or None if it is not present."""
+        position = self._index.get(slug)
+        return None if position is None else self._modes[position]
+
+    def upsert(self, agent_metadata: dict) -> bool:
+        """
+        Adds or replaces the entry for an agent.
+
+        Args:
+            agent_metadata: The metadata for the agent to add or update.
+
+        Returns:
+            True if an existing entry was updated, False if a new one was added
+            (or the metadata was invalid and skipped).
+        """
+        if not isinstance(agent_metadata, dict) or "slug" not in agent_metadata:
+            logging.error("Invalid agent_metadata passed to SlugIndexedRegistry.upsert. Skipping update.")
+            return False
+
+        agent_slug = agent_metadata["slug"]
+        metadata_to_store = {k: v for k, v in agent_metadata.items() if k != "customInstructions"}
+        position = self._index.get(agent_slug)
+        if position is not None:
+            self._modes[position] = metadata_to_store
+            logging.debug(f"Updated agent '{agent_slug}' in the registry.")
+            return True
+
+        self._index[agent_slug] = len(self._modes)
+        self._modes.append(metadata_to_store)
+        logging.debug(f"Added new agent '{agent_slug}' to the registry.")
+        return False
+
+    def upsert_many(self, agents_metadata) -> int:
+        """Upserts each agent in order. Returns the number of updated (pre-existing) entries."""
+        return sum(1 for metadata in agents_metadata if self.upsert(metadata))
+
+    def delete(self, slug: str) -> bool:
+        """Removes the entry for a slug. Returns True if it was present."""
+        position = self._index.pop(slug, None)
+        if position is None:
+            return False
+        self._modes[position] = _DELETED # Tombstone; dropped by to_dict()
+        self._deleted += 1
+        logging.debug(f"Deleted agent '{slug}' from the registry.")
+        return True
+
+    def to_dict(self) -> dict:
+        """Serializes to the `{"customModes": [...]}` layout read by the editor extension."""
+        modes = [mode for mode in self._modes if mode is not _DELETED]
+        return {**self._layout, "customModes": modes}
+
+
+def atomic_write_bytes(target_path: pathlib.Path, payload: bytes):
+    """
+    Atomically replaces `target_path` with `payload`.
+
+    The bytes are written to a temporary file in the same directory, flushed
+    and fsync'd, then moved over the target with `os.replace`. Readers (and a
+    crash at any point) therefore see either the old file or the complete new
+    one, never a truncated file. The containing directory is fsync'd
+    afterwards so the rename itself is durable.
+
+    Args:
+        target_path: The file to create or replace. Its parent must exist.
+        payload: The complete new file contents.
+
+    Raises:
+        OSError: If any file operation fails. The temporary file is removed.
+    """
+    tmp_path = target_path.with_name(f".{target_path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    try:
+        # 'x' creates the file with the process umask, like a plain open(..., 'w')
+        with open(tmp_path, 'xb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if target_path.exists():
+            shutil.copymode(target_path, tmp_path) # Keep the existing file's permissions
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+
+    # Persist the directory entry for the rename (not supported on Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(target_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def serialize_registry(registry_data: dict) -> bytes:
+    """Serializes registry data to the exact bytes written to the registry file."""
+    return json.dumps(registry_data, indent=2).encode('utf-8') # Use indent=2 for readability
+
+
+def _refresh_index(registry_path: pathlib.Path, registry_data: dict):
+    """Keeps the reverse index next to the registry in step with it (see cli/registry_index.py)."""
+    from . import registry_index # Imported here as registry_index depends on this module
+    with profiling.stage("registry.index"):
+        registry_index.refresh_registry_index(registry_path, registry_data)
+
+
+def write_global_registry(
+    registry_data: dict,
+    registry_path: pathlib.Path = None,
+    skip_unchanged: bool = False,
+    use_prompt_store: bool = False
+) -> bool:
     # Fetch default path from config loader if not provided
     if registry_path is None:
         registry_path = config_loader.get_global_registry_path()
     """
     Writes the updated registry data back to the global JSON file safely.
 
-    Uses a temporary file and atomic rename operation to prevent corruption.
+    Uses a temporary file, fsync and an atomic rename (`atomic_write_bytes`) so
+    an interrupted write can never leave a truncated registry behind.
 
     Args:
         registry_data: The dictionary containing the registry data to write.
         registry_path: The path to the global registry JSON file.
+        skip_unchanged: If True, the write is skipped when the serialized bytes
+                        are identical to the current file contents, so file
+                        watchers are not triggered by no-op compiles.
+        use_prompt_store: Write into the content-addressed prompt store,
+                          enabling it. Once enabled, the store is written
+                          regardless of this flag and the JSON file is only
+                          updated by `prompt_store.materialize_registry`.
+
+    Returns:
+        True if the file was written, False if the write was skipped.
 
     Raises:
         OSError: If file I/O operations fail.
         Exception: For any other unexpected errors during the write process.
     """
-    # Simplified write logic: write directly to the target file.
-    # Note: This is less safe against corruption if the process is interrupted.
     try:
         # Ensure the parent directory exists
         registry_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Write directly to the final destination file
-        with open(registry_path, 'w', encoding='utf-8') as f:
-            json.dump(registry_data, f, indent=2) # Use indent=2 for readability
-        
+        from . import prompt_store # Imported here as prompt_store depends on this module
+        if use_prompt_store or prompt_store.is_enabled(registry_path):
+            written = prompt_store.write_store_registry(registry_data, registry_path, skip_unchanged=skip_unchanged)
+            _discard_journal(registry_path)
+            _refresh_index(registry_path, registry_data)
+            return written
+
+        with profiling.stage("registry.serialize"):
+            payload = serialize_registry(registry_data)
+
+        if skip_unchanged:
+            with profiling.stage("registry.compare"):
+                try:
+                    current = registry_path.read_bytes()
+                except FileNotFoundError:
+                    current = None
+            if current == payload:
+                logging.info(f"Registry at {registry_path} is unchanged. Skipping write.")
+                _discard_journal(registry_path)
+                _refresh_index(registry_path, registry_data)
+                return False
+
+        with profiling.stage("registry.write", bytes=len(payload)):
+            atomic_write_bytes(registry_path, payload)
         logging.info(f"Successfully wrote updated registry to {registry_path}")
+        # The full registry now supersedes any pending journal records
+        _discard_journal(registry_path)
+        _refresh_index(registry_path, registry_data)
+        return True
 
     except OSError as e:
         logging.exception(f"OS error writing registry file {registry_path}: {e}")
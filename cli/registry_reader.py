@@ -0,0 +1,262 @@
+# cli/registry_reader.py
+"""
+Lazy, memory-mapped access to the global registry.
+
+`read_global_registry` decodes the whole registry, including every mode's
+(potentially very large) prompt strings. `LazyRegistryReader` instead maps
+the file into memory and scans it once to build a byte-offset index of the
+entries in `customModes`. Listing slugs or fetching a single mode then only
+decodes the bytes of that one entry, which keeps memory flat for registries
+of tens of megabytes.
+
+With the prompt store enabled (see cli/prompt_store.py) the registry JSON
+file is only the last materialized copy, so the reader decodes the registry
+from the store instead, like `read_global_registry`, and nothing is mapped.
+"""
+import json
+import logging
+import mmap
+import pathlib
+import re
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from . import constants
+from . import prompt_store
+from . import registry_manager
+from .exceptions import RegistryReadError
+
+logger = logging.getLogger(__name__)
+
+# Structural characters the index scanner has to look at. Everything else
+# (numbers, literals, whitespace) is skipped by the regex engine.
+_STRUCTURAL = re.compile(rb'[{}\[\],:"]')
+# A complete JSON string token, starting at its opening quote
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+
+_SLUG_KEY = b'"slug"'
+_CUSTOM_MODES_KEY = b'"customModes"'
+
+
+class _EntryRef(dict):
+    """Stand-in for an undecoded registry entry while replaying the journal."""
+
+    def __init__(self, position: int, slug: Optional[str]):
+        super().__init__({} if slug is None else {"slug": slug})
+        self.position = position
+
+
+class LazyRegistryReader:
+    """
+    Read-only, memory-mapped view of a registry file with a per-entry offset index.
+
+    Pending registry journal records (see `registry_manager.append_registry_journal`)
+    are applied as a small overlay, so results match `read_global_registry`;
+    with the prompt store enabled, the registry is read from the store.
+
+    Use as a context manager, or call `close()` when done:
+
+        with LazyRegistryReader(path) as registry:
+            mode = registry.get("debug")
+    """
+
+    def __init__(self, registry_path: pathlib.Path):
+        self.registry_path = registry_path
+        self._file = None
+        self._map = None
+        # (start, end, slug) byte ranges of each materialized customModes entry, in file order
+        self._entries: List[Tuple[int, int, Optional[str]]] = []
+        # Resolved registry order: an int refers to a materialized entry (decoded
+        # lazily), a dict is a mode taken from the journal overlay
+        self._modes: List[Union[int, dict]] = []
+        self._index: Dict[str, int] = {}
+
+        if prompt_store.is_enabled(registry_path):
+            # Raises RegistryReadError if the store cannot be read
+            self._modes = list(registry_manager.read_global_registry(registry_path)[constants.CUSTOM_MODES])
+            self._index_slugs()
+            return
+        try:
+            self._file = open(registry_path, 'rb')
+            if registry_path.stat().st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._build_index()
+        except OSError as e:
+            self.close()
+            raise RegistryReadError(f"Could not open registry file {registry_path}: {e}") from e
+        except RegistryReadError:
+            self.close()
+            raise
+        self._resolve(registry_manager.read_registry_journal(registry_path))
+
+    # --- Context management ---
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Releases the memory map and file handle."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Queries ---
+
+    def __len__(self) -> int:
+        """Returns the number of entries in `customModes`."""
+        return len(self._modes)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._index
+
+    def slugs(self) -> List[str]:
+        """Returns the slug of every mode in registry order, without decoding any entry."""
+        return [slug for slug, _ in sorted(self._index.items(), key=lambda item: item[1])]
+
+    def get(self, slug: str) -> Optional[dict]:
+        """Decodes and returns a single mode entry, or None if the slug is not present."""
+        position = self._index.get(slug)
+        return None if position is None else self._materialize(self._modes[position])
+
+    def get_bytes(self, slug: str) -> Optional[bytes]:
+        """Returns the raw JSON bytes of a mode entry, re-encoding it if it came from the journal or the prompt store."""
+        position = self._index.get(slug)
+        if position is None:
+            return None
+        mode = self._modes[position]
+        if isinstance(mode, int):
+            start, end, _ = self._entries[mode]
+            return self._map[start:end]
+        return json.dumps(mode).encode('utf-8')
+
+    def iter_modes(self) -> Iterator[dict]:
+        """Yields every mode in registry order, decoding one entry at a time."""
+        for mode in self._modes:
+            yield self._materialize(mode)
+
+    # --- Internals ---
+
+    def _materialize(self, mode: Union[int, dict]):
+        if isinstance(mode, int):
+            start, end, _ = self._entries[mode]
+            return json.loads(self._map[start:end])
+        return mode
+
+    def _resolve(self, journal_entries: list):
+        """Computes the registry order, replaying any pending journal records like read_global_registry."""
+        if journal_entries:
+            # Replay over lightweight references so materialized entries stay undecoded
+            refs = [_EntryRef(position, slug) for position, (_, _, slug) in enumerate(self._entries)]
+            replayed = registry_manager._replay_journal({"customModes": refs}, journal_entries)
+            self._modes = [mode.position if isinstance(mode, _EntryRef) else mode for mode in replayed["customModes"]]
+        else:
+            self._modes = list(range(len(self._entries)))
+        self._index_slugs()
+
+    def _index_slugs(self):
+        """Maps each slug to its first position in the registry order."""
+        for position, mode in enumerate(self._modes):
+            if isinstance(mode, int):
+                slug = self._entries[mode][2]
+            else:
+                slug = mode.get("slug") if isinstance(mode, dict) else None
+            if slug is not None:
+                self._index.setdefault(slug, position)
+
+    def _build_index(self):
+        """Scans the mapped file once, recording the byte range and slug of each customModes entry."""
+        buf = self._map
+        if buf is None:
+            raise RegistryReadError(f"Invalid structure in registry file {self.registry_path}: file is empty.")
+
+        depth = 0
+        in_modes = False        # Inside the top-level customModes array
+        modes_found = False
+        last_string = None      # (start, end) of the most recent string token
+        pending_key = None      # Object key awaiting its value
+        entry_start = None
+        entry_slug = None
+        expect_slug = False
+        expect_modes = False
+        entries: List[Tuple[int, int, Optional[str]]] = []
+
+        pos = 0
+        while True:
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                break
+            char = buf[match.start()]
+            pos = match.end()
+
+            if char == 0x22: # '"'
+                token = _STRING.match(buf, match.start())
+                if token is None:
+                    raise RegistryReadError(f"Error decoding JSON from {self.registry_path}: unterminated string.")
+                pos = token.end()
+                if expect_modes:
+                    raise RegistryReadError(f"Invalid structure in registry file {self.registry_path}: 'customModes' is not a list.")
+                if expect_slug and depth == 3:
+                    entry_slug = json.loads(buf[token.start():token.end()])
+                expect_slug = False
+                last_string = (token.start(), token.end())
+                continue
+
+            if char == 0x3A: # ':'
+                pending_key = buf[last_string[0]:last_string[1]] if last_string else None
+                if depth == 1 and pending_key == _CUSTOM_MODES_KEY:
+                    expect_modes = True
+                elif depth == 3 and in_modes and pending_key == _SLUG_KEY:
+                    expect_slug = True
+                last_string = None
+                continue
+
+            expect_slug = False
+            last_string = None
+            if expect_modes:
+                if char != 0x5B:
+                    raise RegistryReadError(f"Invalid structure in registry file {self.registry_path}: 'customModes' is not a list.")
+                expect_modes = False
+                in_modes, modes_found = True, True
+                entries = [] # A repeated key replaces earlier values, as in json.load
+                depth += 1
+                entry_start = self._start_of_value(pos)
+                entry_slug = None
+                continue
+
+            if char in (0x7B, 0x5B): # '{' or '['
+                depth += 1
+            elif char in (0x7D, 0x5D): # '}' or ']'
+                if in_modes and depth == 2:
+                    # End of the customModes array
+                    self._close_entry(entries, entry_start, match.start(), entry_slug)
+                    in_modes = False
+                depth -= 1
+            elif char == 0x2C: # ','
+                if in_modes and depth == 2:
+                    self._close_entry(entries, entry_start, match.start(), entry_slug)
+                    entry_start = self._start_of_value(pos)
+                    entry_slug = None
+
+        if depth != 0:
+            raise RegistryReadError(f"Error decoding JSON from {self.registry_path}: unbalanced brackets.")
+        if not modes_found:
+            raise RegistryReadError(f"Invalid structure in registry file {self.registry_path}: missing 'customModes' list.")
+
+        self._entries = entries
+        logger.debug(f"Indexed {len(entries)} registry entries in {self.registry_path}")
+
+    def _start_of_value(self, pos: int) -> int:
+        return _WHITESPACE.match(self._map, pos).end()
+
+    def _close_entry(self, entries, start, end, slug):
+        # Trim trailing whitespace; an empty range means an empty array
+        while end > start and self._map[end - 1] in b' \t\r\n':
+            end -= 1
+        if end > start:
+            entries.append((start, end, slug))
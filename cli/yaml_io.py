@@ -0,0 +1,125 @@
+# cli/yaml_io.py
+"""
+Shared YAML loading and dumping.
+
+Uses PyYAML's libyaml bindings (`CSafeLoader` / `CSafeDumper`) when PyYAML
+was built with them, and the pure-Python `SafeLoader` / `SafeDumper`
+otherwise. Both backends accept the same documents and, for the plain
+JSON-like data agent configs hold, emit the same text.
+
+Dumping uses the repo's config style: multi-line strings are written as
+literal blocks (`|`), everything else as PyYAML's default plain scalars.
+
+`load_with_marks` also keeps the parsed node tree, so the source location of
+any value (e.g. one named in a validation error) can be looked up later
+without parsing the document again.
+"""
+from typing import IO, Any, Optional, Sequence, Tuple, Union
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as _BaseDumper
+    BACKEND = "libyaml"
+except ImportError: # PyYAML built without libyaml
+    from yaml import SafeLoader, SafeDumper as _BaseDumper
+    BACKEND = "python"
+
+YAMLError = yaml.YAMLError
+
+
+def represent_literal_block(dumper: yaml.BaseDumper, data: str) -> yaml.ScalarNode:
+    """Represents multi-line strings as literal blocks in YAML."""
+    if '\n' in data:
+        return dumper.represent_scalar('tag:yaml.org,2002:str', data, style='|')
+    return dumper.represent_scalar('tag:yaml.org,2002:str', data)
+
+
+class Dumper(_BaseDumper):
+    """The backend's safe dumper with literal-block strings."""
+
+
+Dumper.add_representer(str, represent_literal_block)
+
+
+def load(stream: Union[str, bytes, IO]) -> Any:
+    """
+    Parses a YAML document with the fastest available safe loader.
+
+    Raises:
+        yaml.YAMLError: If the document is not valid YAML.
+    """
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+class SourceMarks:
+    """
+    Source locations of the values in a parsed YAML document.
+
+    Holds the document's node tree and walks it only when a location is
+    asked for, so documents that are never asked about cost nothing extra.
+    """
+
+    def __init__(self, root: Optional[yaml.Node]):
+        self.root = root
+
+    def locate(self, path: Sequence[Any]) -> Optional[Tuple[int, int]]:
+        """
+        Returns the 1-based (line, column) of the deepest node along a path of keys and indexes.
+
+        Path parts that do not name a key or index of the current node (such
+        as the union member names pydantic puts in error locations) are
+        skipped. A mapping entry is located at its key, a sequence item at
+        the item itself.
+
+        Returns:
+            The location, or None if the document is empty.
+        """
+        node = self.root
+        if node is None:
+            return None
+        mark = node.start_mark
+        for part in path:
+            child = None
+            if isinstance(node, yaml.MappingNode):
+                for key_node, value_node in node.value:
+                    if isinstance(key_node, yaml.ScalarNode) and key_node.value == str(part):
+                        child, mark = value_node, key_node.start_mark
+                        break
+            elif isinstance(node, yaml.SequenceNode) and isinstance(part, int) and 0 <= part < len(node.value):
+                child = node.value[part]
+                mark = child.start_mark
+            if child is not None:
+                node = child
+        return mark.line + 1, mark.column + 1
+
+
+def load_with_marks(stream: Union[str, bytes, IO]) -> Tuple[Any, SourceMarks]:
+    """
+    Parses a YAML document like `load`, also returning the source locations of its values.
+
+    The document is parsed once: the data is constructed from the same node
+    tree that SourceMarks looks locations up in.
+
+    Raises:
+        yaml.YAMLError: If the document is not valid YAML.
+    """
+    loader = SafeLoader(stream)
+    try:
+        root = loader.get_single_node()
+        data = loader.construct_document(root) if root is not None else None
+    finally:
+        loader.dispose()
+    return data, SourceMarks(root)
+
+
+def dump(data: Any, stream: Optional[IO] = None, **kwargs) -> Optional[str]:
+    """
+    Dumps data as YAML with the fastest available safe dumper and literal-block strings.
+
+    Keyword arguments are passed to `yaml.dump` (e.g. `sort_keys`, `width`).
+
+    Returns:
+        The YAML text if no stream is given, otherwise None.
+    """
+    return yaml.dump(data, stream, Dumper=Dumper, **kwargs)
@@ -0,0 +1,195 @@
+"""
+Compile and registry I/O benchmarks over synthetic agent fleets.
+
+For each fleet size, a fleet is generated with `fleet_generator.py` in a
+throwaway directory and these scenarios are timed in-process (median of
+--runs):
+
+    compile_full         Compile every agent from scratch (no registry, no manifest).
+    compile_incremental  Compile all after one config changed (manifest hit for the rest).
+    compile_noop         Compile all with nothing changed.
+    compile_single       Compile one slug into the fleet's registry.
+    registry_read        Read the fleet's registry.
+    registry_write       Rewrite the fleet's registry.
+    markdown_parse       Parse every agent's prompt.md.
+
+Results are written as JSON (--output). Given a --baseline file from an
+earlier run, every scenario is compared against it and the script exits
+non-zero if any median is more than --threshold slower (and slower by more
+than --min-delta-ms, to ignore noise on tiny timings).
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+for path in (PROJECT_ROOT, SCRIPTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import fleet_generator  # noqa: E402 (sits next to this script)
+from cli import compile_manifest, compiler, config_loader, markdown_utils, registry_manager  # noqa: E402
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = "10,1000"  # 10k and 100k fleets are opt-in: --sizes 10,1000,10000,100000
+
+
+def _time_runs(func: Callable[[], None], runs: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, object]:
+    """Times `func` `runs` times (calling `setup` untimed before each run)."""
+    timings = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "runs_s": timings}
+
+
+@contextlib.contextmanager
+def _silenced():
+    """Discards the compiler's console output."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+def _compile(**kwargs):
+    with _silenced():
+        compiler.compile_agents(quiet=True, **kwargs)
+
+
+def benchmark_fleet(size: int, runs: int, jobs: int, work_dir: Path) -> Dict[str, Dict[str, object]]:
+    """Generates a fleet of `size` agents in `work_dir` and times every scenario on it."""
+    agents_dir = work_dir / "agents"
+    registry_path = work_dir / "registry" / "custom_modes.json"
+    manifest_path = compile_manifest.get_manifest_path(registry_path)
+    slugs = fleet_generator.generate_fleet(agents_dir, size)
+    config = config_loader.ConfigResolver(agent_config_dir=agents_dir, global_registry_path=registry_path)
+
+    def reset_registry():
+        shutil.rmtree(registry_path.parent, ignore_errors=True)
+
+    results = {}
+    results["compile_full"] = _time_runs(lambda: _compile(jobs=jobs, full=True, config=config), runs, setup=reset_registry)
+
+    # One config changes between runs; every other config is a manifest hit
+    edited = agents_dir / slugs[len(slugs) // 2] / fleet_generator.CONFIG_FILENAME
+    original = edited.read_text(encoding='utf-8')
+    edits = iter(range(runs))
+
+    def edit_one():
+        edited.write_text(original.replace("name: Agent", f"name: Edited{next(edits)} Agent", 1), encoding='utf-8')
+
+    _compile(jobs=jobs, config=config)
+    results["compile_incremental"] = _time_runs(lambda: _compile(jobs=jobs, config=config), runs, setup=edit_one)
+    results["compile_noop"] = _time_runs(lambda: _compile(jobs=jobs, config=config), runs)
+
+    # A single-slug compile reads `<slug>.yaml` from the config dir, so it gets its own
+    # directory holding one fleet config; the registry is the full fleet registry
+    single_dir = work_dir / "single"
+    single_dir.mkdir()
+    shutil.copy(edited, single_dir / f"{slugs[len(slugs) // 2]}.yaml")
+    single_config = config.with_overrides(agent_config_dir=single_dir)
+    results["compile_single"] = _time_runs(
+        lambda: _compile(agent_slug=slugs[len(slugs) // 2], config=single_config), runs
+    )
+
+    registry_data = registry_manager.read_global_registry(registry_path)
+    results["registry_read"] = _time_runs(lambda: registry_manager.read_global_registry(registry_path), runs)
+    results["registry_write"] = _time_runs(
+        lambda: registry_manager.write_global_registry(registry_data, registry_path=registry_path), runs
+    )
+
+    prompt_paths = sorted(agents_dir.glob(f"*/{fleet_generator.PROMPT_FILENAME}"))
+    results["markdown_parse"] = _time_runs(
+        lambda: [markdown_utils.parse_markdown(path) for path in prompt_paths], runs
+    )
+    manifest_path.unlink(missing_ok=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Compares two result files.
+
+    Returns:
+        One message per scenario whose median regressed past the threshold.
+        Scenarios missing from either file are skipped.
+    """
+    regressions = []
+    for size, scenarios in results["results"].items():
+        for name, current in scenarios.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            delta_ms = (current["median_s"] - previous["median_s"]) * 1000
+            if current["median_s"] > previous["median_s"] * (1 + threshold) and delta_ms > min_delta_ms:
+                regressions.append(
+                    f"{name} ({size} agents): {current['median_s'] * 1000:.1f} ms vs baseline "
+                    f"{previous['median_s'] * 1000:.1f} ms (+{current['median_s'] / previous['median_s'] - 1:.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compile and registry I/O on synthetic agent fleets.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated fleet sizes (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per scenario (default: 3).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Compile worker processes (default: CPU count).")
+    parser.add_argument("--output", type=Path, help="Write the results JSON here.")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs the baseline (default: 0.25 = 25%%).")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this (default: 5 ms).")
+    args = parser.parse_args()
+
+    # Per-agent INFO logging would dominate the timings on large fleets
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jobs": args.jobs,
+        "runs": args.runs,
+        "results": {},
+    }
+    for size in (int(value) for value in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            scenarios = benchmark_fleet(size, args.runs, args.jobs, Path(tmp))
+        results["results"][str(size)] = scenarios
+        print(f"{size} agents ({time.perf_counter() - started:.1f}s including fleet generation):")
+        for name, timing in scenarios.items():
+            print(f"  {name:<20} median {timing['median_s'] * 1000:10.1f} ms  (min {timing['min_s'] * 1000:.1f} ms)")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(f"Results written to {args.output}")
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    if baseline.get("version") != RESULTS_VERSION:
+        print(f"FAIL: Baseline {args.baseline} has results version {baseline.get('version')}, expected {RESULTS_VERSION}")
+        return 1
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"FAIL: {regression}")
+    if not regressions:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
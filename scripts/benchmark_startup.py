@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark for the rawr CLI.
+
+Runs `--help`, `compile <slug>` and `compile` in fresh interpreters against a
+throwaway agent directory, reporting the median wall-clock time and the
+import-time of the heaviest modules (via `python -X importtime`).
+
+`--help` must not import the compiler stack (yaml, pydantic, cli.models,
+cli.compiler); the script exits non-zero if it does, or if any scenario's
+median exceeds --max-ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that only the compile path should pay for
+HEAVY_MODULES = ("yaml", "pydantic", "cli.models", "cli.compiler")
+
+AGENT_CONFIG = """slug: bench-agent
+name: Bench Agent
+roleDefinition: Benchmark agent
+groups:
+  - read
+"""
+
+SCENARIOS = {
+    "--help": ["--help"],
+    "compile <slug>": ["compile", "bench-agent", "--no-daemon"],
+    "compile": ["compile", "--no-daemon", "--jobs", "1"],
+}
+
+
+def run_once(args, env):
+    """Runs the CLI once with -X importtime; returns (seconds, {module: cumulative_us})."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "cli.main", *args],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rawr CLI cold-start latency.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario (default: 5).")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if any scenario's median exceeds this.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports to list per scenario.")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        agents_dir = Path(tmp) / "agents"
+        agents_dir.mkdir()
+        # Single-agent compiles look for <slug>.yaml directly in the config dir
+        (agents_dir / "bench-agent.yaml").write_text(AGENT_CONFIG)
+        env = dict(
+            os.environ,
+            RAWR_AGENT_CONFIG_DIR=str(agents_dir),
+            RAWR_GLOBAL_REGISTRY_PATH=str(Path(tmp) / "registry" / "custom_modes.json"),
+        )
+
+        for label, cli_args in SCENARIOS.items():
+            timings = []
+            modules = {}
+            for _ in range(args.runs):
+                elapsed, modules = run_once(cli_args, env)
+                timings.append(elapsed)
+            median_ms = statistics.median(timings) * 1000
+            print(f"{label:<16} median {median_ms:7.1f} ms  (min {min(timings) * 1000:.1f} ms, {args.runs} runs)")
+            top_level = sorted(
+                ((us, name) for name, us in modules.items() if "." not in name or name.startswith("cli.")),
+                reverse=True,
+            )
+            for us, name in top_level[:args.top]:
+                print(f"    {us / 1000:7.1f} ms  {name}")
+
+            if label == "--help":
+                leaked = [name for name in HEAVY_MODULES if name in modules]
+                if leaked:
+                    failures.append(f"--help imported {', '.join(leaked)}")
+            if args.max_ms is not None and median_ms > args.max_ms:
+                failures.append(f"{label} median {median_ms:.1f} ms exceeds {args.max_ms:.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Synthetic agent-fleet generator for benchmarks.
+
+Writes N agents in the layout used by the test helpers
+(`tests/helpers/registry_utils.create_mock_config`):
+
+    <agents_dir>/<slug>/config.yaml   # Valid GlobalAgentConfig
+    <agents_dir>/<slug>/prompt.md     # Parsable by cli.markdown_utils (optional)
+
+Configs are sized like the real agents under `ai/agents/`: a multi-paragraph
+role definition, several kilobytes of custom instructions and a mix of
+plain and fileRegex-restricted groups. Output is deterministic for a given
+seed.
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from cli import yaml_io  # noqa: E402 (needs PROJECT_ROOT on sys.path)
+from tests.helpers.registry_utils import CONFIG_FILENAME  # noqa: E402
+
+PROMPT_FILENAME = "prompt.md"
+
+_WORDS = (
+    "agent review plan code test deploy analyze document refactor design verify "
+    "module interface registry config schema workflow context task output input "
+    "constraint quality security performance release migration dependency build"
+).split()
+_RESTRICTIONS = ("\\.md$", "\\.ya?ml$", "\\.py$", "^docs/", "\\.(ts|tsx)$", "^tests/.*\\.py$")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, sentences: int) -> str:
+    return " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(sentences))
+
+
+def _groups(rng: random.Random) -> list:
+    groups = ["read"]
+    if rng.random() < 0.6:
+        groups.append("edit" if rng.random() < 0.4 else ["edit", {"fileRegex": rng.choice(_RESTRICTIONS)}])
+    for name in ("command", "browser", "mcp"):
+        if rng.random() < 0.3:
+            groups.append(name)
+    return groups
+
+
+def agent_slug(index: int) -> str:
+    return f"agent-{index:06d}"
+
+
+def generate_agent(index: int, seed: int = 0) -> dict:
+    """Returns the config data of the index-th synthetic agent."""
+    rng = random.Random(seed * 1_000_003 + index)
+    slug = agent_slug(index)
+    return {
+        "slug": slug,
+        "name": f"Agent {index:06d}",
+        "roleDefinition": "\n\n".join(_paragraph(rng, rng.randint(3, 6)) for _ in range(2)),
+        "customInstructions": "\n".join(
+            f"{n}. {_paragraph(rng, rng.randint(2, 4))}" for n in range(1, rng.randint(10, 20))
+        ),
+        "groups": _groups(rng),
+    }
+
+
+def render_prompt(config: dict) -> str:
+    """Renders the agent's prompt.md (name, role and custom-instruction sections)."""
+    return (
+        f"# {config['name']}\n\n"
+        f"## Role\n\n{config['roleDefinition']}\n\n"
+        f"## Custom Instructions\n\n{config['customInstructions']}\n"
+    )
+
+
+def generate_fleet(agents_dir: Path, count: int, seed: int = 0, prompts: bool = True) -> List[str]:
+    """
+    Writes `count` synthetic agents under `agents_dir`.
+
+    Returns:
+        The generated slugs, in order.
+    """
+    slugs = []
+    for index in range(count):
+        config = generate_agent(index, seed)
+        agent_dir = agents_dir / config["slug"]
+        agent_dir.mkdir(parents=True, exist_ok=True)
+        with open(agent_dir / CONFIG_FILENAME, 'w', encoding='utf-8') as f:
+            yaml_io.dump(config, f, sort_keys=False, default_flow_style=False)
+        if prompts:
+            (agent_dir / PROMPT_FILENAME).write_text(render_prompt(config), encoding='utf-8')
+        slugs.append(config["slug"])
+    return slugs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic agent fleet for benchmarks.")
+    parser.add_argument("agents_dir", type=Path, help="Directory to write the agents to.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of agents (default: 1000).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    parser.add_argument("--no-prompts", action="store_true", help="Only write config.yaml files.")
+    args = parser.parse_args()
+
+    generate_fleet(args.agents_dir, args.count, seed=args.seed, prompts=not args.no_prompts)
+    print(f"Generated {args.count} agents in {args.agents_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,12 @@
 import json
-import yaml
 import os
+import sys
 import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from cli import yaml_io # libyaml-backed dumper with the literal-block string style
+
 # --- Configuration ---
 # Use absolute path for the source JSON as it's outside the workspace
 SOURCE_JSON_PATH = Path('/Users/mateicanavra/Library/Application Support/Cursor/User/globalStorage/rooveterinaryinc.roo-cline/settings/custom_modes.json')
@@ -11,14 +14,6 @@ SOURCE_JSON_PATH = Path('/Users/mateicanavra/Library/Application Support/Cursor/
 TARGET_BASE_DIR = Path('ai/agents')
 # --- End Configuration ---
 
-def represent_literal_block(dumper, data):
-    """Helper to represent multi-line strings as literal blocks in YAML."""
-    if '\n' in data:
-        return dumper.represent_scalar('tag:yaml.org,2002:str', data, style='|')
-    return dumper.represent_scalar('tag:yaml.org,2002:str', data)
-
-yaml.add_representer(str, represent_literal_block)
-
 def generate_configs(include_custom_instructions=False):
     """Reads the source JSON and generates individual YAML config files."""
     print(f"Reading source JSON from: {SOURCE_JSON_PATH}")
@@ -74,7 +69,7 @@ def generate_configs(include_custom_instructions=False):
         try:
             with open(target_yaml_path, 'w', encoding='utf-8') as f:
                 # Use sort_keys=False to maintain order, allow_unicode for broader compatibility
-                yaml.dump(yaml_data, f, sort_keys=False, allow_unicode=True, default_flow_style=False, width=1000)
+                yaml_io.dump(yaml_data, f, sort_keys=False, allow_unicode=True, default_flow_style=False, width=1000)
             print(f"Successfully generated: {target_yaml_path}")
             generated_count += 1
         except Exception as e:
@@ -6,6 +6,9 @@ import os
 from pathlib import Path
 
 from cli import constants as cli_constants
+from tests.helpers.registry_utils import backdate, create_mock_config, valid_agent_config
+
+
 @pytest.fixture
 def cli_config_yaml(tmp_path, monkeypatch):
     agent_config_file_path = tmp_path / "agent_configs.json" # Define path first
@@ -44,4 +47,37 @@ def create_markdown_file_factory():
         with open(md_file, 'w') as f:
             f.write(content)
         return md_file
-    return _create
\ No newline at end of file
+    return _create
+
+
+@pytest.fixture
+def use_config_paths():
+    """
+    Points the process-wide config resolver at the given paths for one test
+    (see `config_loader.set_resolver`); paths left as None are resolved as usual.
+    """
+    from cli import config_loader
+    previous = config_loader.get_resolver()
+
+    def _use(agent_config_dir=None, global_registry_path=None):
+        return config_loader.set_resolver(previous.with_overrides(
+            agent_config_dir=agent_config_dir, global_registry_path=global_registry_path
+        ))
+
+    yield _use
+    config_loader.set_resolver(previous)
+
+
+@pytest.fixture
+def compile_env(tmp_path, use_config_paths):
+    """
+    Valid configs for agent-a and agent-b (backdated, so the compile manifest
+    trusts their mtimes) and a registry path that does not exist yet, both
+    used as the process-wide config paths. Returns (agents_dir, registry_path).
+    """
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "registry" / "custom_modes.json"
+    use_config_paths(agents_dir, registry_path)
+    for slug in ("agent-a", "agent-b"):
+        backdate(create_mock_config(agents_dir, slug, valid_agent_config(slug)))
+    return agents_dir, registry_path
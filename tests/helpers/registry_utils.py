@@ -1,4 +1,5 @@
 import json
+import os
 from pathlib import Path
 import yaml # Need to import yaml here now
 
@@ -24,6 +25,16 @@ def create_mock_config(agents_dir: Path, slug: str, config_data: dict):
         raise
     return config_path
 
+def valid_agent_config(slug: str, **fields) -> dict:
+    """Returns config data that passes validation for the given slug; fields override the defaults."""
+    return {"slug": slug, "name": f"Agent {slug}", "roleDefinition": f"Role for {slug}", "groups": ["read"], **fields}
+
+def backdate(path: Path, seconds: int = 60) -> Path:
+    """Moves a file's mtime into the past, out of the racy window of mtime-based caches."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+    return path
+
 def read_mock_registry(registry_path: Path) -> dict:
     """Reads the content of the mock registry file."""
     if not registry_path.exists():
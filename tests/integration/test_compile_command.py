@@ -64,7 +64,7 @@ MSG_ERR_SCAN_INDICATOR = "scan" # Generic indicator
 # --- Test Fixtures ---
 
 @pytest.fixture
-def setup_test_env(tmp_path, mocker):
+def setup_test_env(tmp_path, mocker, use_config_paths):
     """
     Sets up an isolated test environment in a temporary directory.
 
@@ -84,8 +84,7 @@ def setup_test_env(tmp_path, mocker):
     # Patching cli.constants.* was incorrect as these are defined locally in cli.main using getattr fallbacks.
     # mocker.patch('cli.constants.AGENT_CONFIG_DIR', agents_base_dir) # REMOVED - Attribute doesn't exist here
     # mocker.patch('cli.constants.GLOBAL_REGISTRY_PATH', mock_registry_path) # REMOVED - Attribute doesn't exist here
-    mocker.patch('cli.main.AGENT_CONFIG_DIR', agents_base_dir)
-    mocker.patch('cli.main.GLOBAL_REGISTRY_PATH', mock_registry_path)
+    use_config_paths(agents_base_dir, mock_registry_path)
 
     print(f"DEBUG: Fixture setup - tmp_path: {tmp_path}")
     print(f"DEBUG: Fixture setup - agents_base_dir: {agents_base_dir}")
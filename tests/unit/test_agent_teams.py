@@ -0,0 +1,99 @@
+# tests/unit/test_agent_teams.py
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import agent_teams
+from cli import compiler
+from cli.exceptions import TeamFileError
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+TEAMS = """\
+# Agent teams
+command:
+  - agent-a
+
+defense:
+  - agent-b
+  - agent-c
+  - agent-b
+"""
+
+
+def test_parse_teams_and_reverse_index():
+    teams = agent_teams.parse_teams(TEAMS + "support:\n  - agent-c\n")
+
+    assert teams == {"command": ["agent-a"], "defense": ["agent-b", "agent-c"], "support": ["agent-c"]}
+    assert agent_teams.teams_by_slug(teams)["agent-c"] == ["defense", "support"]
+    assert agent_teams.team_members(teams, "defense") == {"agent-b", "agent-c"}
+    with pytest.raises(TeamFileError, match="Available teams: command, defense, support"):
+        agent_teams.team_members(teams, "offense")
+
+
+@pytest.mark.parametrize("text, message", [
+    ("  - debug\n", ":1: Expected '<team>:' before"),
+    ("defense:\n  debug\n", ":2: Expected '<team>:' or '- <slug>'"),
+    ("defense:\ndefense:\n", ":2: Team 'defense' is listed twice"),
+    ("../escape:\n", ":1: Invalid team name"),
+])
+def test_parse_teams_rejects_malformed_lines(text, message):
+    with pytest.raises(TeamFileError, match=message):
+        agent_teams.parse_teams(text)
+
+
+@pytest.fixture
+def compile_env(compile_env):
+    agents_dir, registry_path = compile_env
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c"))
+    (agents_dir / "agent_teams.txt").write_text(TEAMS, encoding="utf-8")
+    compiler.compile_agents(jobs=1, quiet=True)
+    return compile_env
+
+
+def _names(registry_path):
+    return {mode["slug"]: mode["name"] for mode in json.loads(registry_path.read_text())["customModes"]}
+
+
+def test_team_compile_only_touches_the_team(compile_env, capsys):
+    agents_dir, registry_path = compile_env
+    for slug in ("agent-a", "agent-b", "agent-c"):
+        create_mock_config(agents_dir, slug, valid_agent_config(slug, name=f"{slug} v2"))
+    capsys.readouterr()
+
+    compiler.compile_agents(jobs=1, team="defense")
+    assert "2 of 3 agent configuration(s) in the selected team" in capsys.readouterr().out
+    assert _names(registry_path) == {"agent-a": "Agent agent-a", "agent-b": "agent-b v2", "agent-c": "agent-c v2"}
+
+    # The manifest kept the other team's entry, so a plain compile still picks up its change
+    compiler.compile_agents(jobs=1)
+    assert "Skipping 2 unchanged" in capsys.readouterr().out
+    assert _names(registry_path)["agent-a"] == "agent-a v2"
+
+    with pytest.raises(compiler.typer.Exit):
+        compiler.compile_agents(jobs=1, team="offense")
+    assert "Unknown team 'offense'" in capsys.readouterr().err
+
+
+def test_team_partitions(compile_env):
+    agents_dir, registry_path = compile_env
+    partitions_dir = agent_teams.get_partitions_dir(registry_path)
+    partitions_dir.mkdir()
+    (partitions_dir / "retired.json").write_text("{}", encoding="utf-8")
+
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--team-partitions", "--no-daemon", "--jobs", "1"])
+    assert result.exit_code == 0, result.stderr
+    assert "2 of 2 team partition(s) updated" in result.stdout
+    assert sorted(path.name for path in partitions_dir.iterdir()) == ["command.json", "defense.json"]
+    defense = json.loads((partitions_dir / "defense.json").read_text())
+    assert [mode["slug"] for mode in defense["customModes"]] == ["agent-b", "agent-c"]
+
+    # Unchanged partitions are not rewritten
+    before = (partitions_dir / "defense.json").stat().st_mtime_ns
+    teams = agent_teams.read_teams(agents_dir / "agent_teams.txt")
+    assert agent_teams.write_team_partitions(json.loads(registry_path.read_text()), teams, registry_path) == []
+    assert (partitions_dir / "defense.json").stat().st_mtime_ns == before
+
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "agent-b", "--team", "defense", "--no-daemon"])
+    assert result.exit_code != 0
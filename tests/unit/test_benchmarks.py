@@ -0,0 +1,66 @@
+# tests/unit/test_benchmarks.py
+import importlib
+from pathlib import Path
+
+import pytest
+
+from cli import compiler
+from cli import markdown_utils
+from cli import registry_manager
+from cli.models import GlobalAgentConfig
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+
+
+@pytest.fixture
+def scripts_on_path(monkeypatch):
+    """Puts scripts/ on sys.path for one test, so the scripts and their sibling imports resolve."""
+    monkeypatch.syspath_prepend(str(SCRIPTS_DIR))
+
+
+@pytest.fixture
+def fleet_generator(scripts_on_path):
+    return importlib.import_module("fleet_generator")
+
+
+@pytest.fixture
+def benchmark_compile(scripts_on_path):
+    return importlib.import_module("benchmark_compile")
+
+
+def test_generated_fleet_is_valid_and_deterministic(tmp_path, fleet_generator):
+    slugs = fleet_generator.generate_fleet(tmp_path / "agents", 5)
+
+    assert slugs == [fleet_generator.agent_slug(i) for i in range(5)]
+    assert fleet_generator.generate_agent(3) == fleet_generator.generate_agent(3)
+    for slug in slugs:
+        agent_dir = tmp_path / "agents" / slug
+        config = GlobalAgentConfig.model_validate(fleet_generator.generate_agent(slugs.index(slug)))
+        assert (agent_dir / "config.yaml").stat().st_size > 1000 # Realistically sized
+        parsed = markdown_utils.parse_markdown(agent_dir / "prompt.md")
+        assert parsed["slug"] == config.slug and parsed["name"] == config.name
+
+
+def test_generated_fleet_compiles(tmp_path, use_config_paths, fleet_generator):
+    fleet_generator.generate_fleet(tmp_path / "agents", 4, prompts=False)
+    registry_path = tmp_path / "custom_modes.json"
+    use_config_paths(tmp_path / "agents", registry_path)
+
+    compiler.compile_agents(jobs=1, quiet=True)
+
+    assert len(registry_manager.read_global_registry(registry_path)["customModes"]) == 4
+
+
+def _results(**medians):
+    return {"results": {"1000": {name: {"median_s": seconds} for name, seconds in medians.items()}}}
+
+
+def test_compare_flags_only_regressions_past_threshold_and_noise_floor(benchmark_compile):
+    baseline = _results(compile_full=1.0, registry_read=0.001, markdown_parse=0.5)
+    current = _results(compile_full=1.3, registry_read=0.002, markdown_parse=0.55, compile_noop=9.0)
+
+    regressions = benchmark_compile.compare(current, baseline, threshold=0.25, min_delta_ms=5.0)
+
+    # registry_read doubled but by only 1 ms; compile_noop has no baseline
+    assert len(regressions) == 1
+    assert regressions[0].startswith("compile_full (1000 agents)")
@@ -0,0 +1,86 @@
+# tests/unit/test_compile_manifest.py
+import json
+import os
+
+from cli import compile_manifest
+from cli import compiler
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+
+def test_manifest_written_next_to_registry(compile_env):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    manifest_path = compile_manifest.get_manifest_path(registry_path)
+    manifest = json.loads(manifest_path.read_text())
+    assert manifest_path.parent == registry_path.parent
+    assert set(manifest["entries"]) == {"agent-a/config.yaml", "agent-b/config.yaml"}
+    entry = manifest["entries"]["agent-a/config.yaml"]
+    assert entry["metadata"]["slug"] == "agent-a"
+    assert {"size", "mtime_ns", "sha256"} <= set(entry)
+
+
+def test_incremental_compile_only_reprocesses_changed_files(compile_env, mocker):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b", name="Agent B v2"))
+    spy = mocker.spy(compiler, "_compile_specific_agent")
+    compiler.compile_agents(jobs=1)
+
+    assert [c.args[0].parent.name for c in spy.call_args_list] == ["agent-b"]
+    registry = json.loads(registry_path.read_text())
+    assert [m["name"] for m in registry["customModes"]] == ["Agent agent-a", "Agent B v2"]
+
+
+def test_noop_compile_skips_parsing_and_registry_write(compile_env, mocker, capsys):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    spy = mocker.spy(compiler, "_compile_specific_agent")
+    write = mocker.spy(compiler.registry_manager, "write_global_registry")
+    compiler.compile_agents(jobs=1)
+
+    spy.assert_not_called()
+    write.assert_not_called()
+    assert "already up to date" in capsys.readouterr().out
+
+
+def test_touched_but_identical_file_is_not_recompiled(compile_env, mocker):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    os.utime(agents_dir / "agent-a" / "config.yaml") # New mtime, same content
+    spy = mocker.spy(compiler, "_compile_specific_agent")
+    compiler.compile_agents(jobs=1)
+    spy.assert_not_called()
+
+
+def test_full_compile_bypasses_manifest(compile_env, mocker):
+    compiler.compile_agents(jobs=1)
+
+    spy = mocker.spy(compiler, "_compile_specific_agent")
+    compiler.compile_agents(jobs=1, full=True)
+    assert spy.call_count == 2
+
+
+def test_deleted_files_are_dropped_from_manifest(compile_env):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    (agents_dir / "agent-b" / "config.yaml").unlink()
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c"))
+    compiler.compile_agents(jobs=1)
+
+    manifest = json.loads(compile_manifest.get_manifest_path(registry_path).read_text())
+    assert set(manifest["entries"]) == {"agent-a/config.yaml", "agent-c/config.yaml"}
+
+
+def test_manifest_for_other_config_dir_is_ignored(tmp_path):
+    manifest_path = tmp_path / "compile_manifest.json"
+    stale = compile_manifest.new_manifest(tmp_path / "old_agents")
+    stale["entries"]["a/config.yaml"] = {"size": 1, "mtime_ns": 1, "sha256": "x", "metadata": {}}
+    compile_manifest.write_manifest(manifest_path, stale)
+
+    manifest = compile_manifest.read_manifest(manifest_path, tmp_path / "agents")
+    assert manifest["entries"] == {}
@@ -0,0 +1,83 @@
+# tests/unit/test_compile_report.py
+import json
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from cli import compile_report
+from cli import compiler
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config
+
+
+def _records(output: str) -> list:
+    return [json.loads(line) for line in output.splitlines()]
+
+
+@pytest.fixture
+def compile_env(compile_env):
+    agents_dir, registry_path = compile_env
+    create_mock_config(agents_dir, "agent-c", {"slug": "agent-c"}) # Missing required fields
+    return compile_env
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_ndjson_emits_one_record_per_agent_and_a_summary(compile_env, capsys, jobs):
+    compiler.compile_agents(jobs=jobs, output_format="ndjson")
+    out = capsys.readouterr()
+
+    records = _records(out.out)
+    assert out.err == ""
+    assert [(r["event"], r.get("slug"), r.get("status")) for r in records] == [
+        ("agent", "agent-a", "compiled"),
+        ("agent", "agent-b", "compiled"),
+        ("agent", "config", "failed"), # Unvalidated configs are named by their file stem
+        ("summary", None, None),
+    ]
+    assert set(records[0]["timings_ms"]) == {"read", "parse", "validate", "extract"}
+    assert records[0]["error"] is None
+    assert records[2]["error"]["class"] == "AgentValidationError"
+    summary = records[-1]
+    assert (summary["compiled"], summary["unchanged"], summary["failed"]) == (2, 0, 1)
+    assert summary["exit_code"] == 0 and summary["registry"] == "written"
+
+
+def test_ndjson_reports_manifest_hits_as_unchanged(compile_env, capsys):
+    compiler.compile_agents(jobs=1)
+    capsys.readouterr()
+
+    compiler.compile_agents(jobs=1, output_format="ndjson")
+    records = _records(capsys.readouterr().out)
+
+    assert [r.get("status") for r in records[:-1]] == ["unchanged", "unchanged", "failed"]
+    assert records[-1]["registry"] == "unchanged"
+
+
+def test_ndjson_single_agent_failure_still_emits_summary(compile_env, capsys):
+    with pytest.raises(typer.Exit):
+        compiler.compile_agents("agent-c", output_format="ndjson")
+    records = _records(capsys.readouterr().out)
+
+    assert records[0]["status"] == "failed"
+    assert records[1] == {**records[1], "event": "summary", "exit_code": 1, "failed": 1, "registry": "not_written"}
+
+
+def test_quiet_prints_only_the_summary(compile_env):
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--no-daemon", "--jobs", "1", "--quiet"])
+
+    assert result.exit_code == 0
+    assert result.stdout.splitlines() == [result.stdout.strip()]
+    assert result.stdout.startswith("⚠️ Compiled 2, unchanged 0, failed 1")
+    assert "Registry written." in result.stdout
+    assert result.stderr == ""
+
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--no-daemon", "--format", "ndjson", "-q"])
+    assert [r["event"] for r in _records(result.stdout)] == ["summary"]
+
+
+def test_unknown_output_format_is_rejected(compile_env):
+    with pytest.raises(ValueError):
+        compile_report.CompileReporter("xml")
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--no-daemon", "--format", "xml"])
+    assert result.exit_code == 2
@@ -9,6 +9,7 @@ import builtins # Needed for mocking builtins.open
 
 # Module to test
 from cli import config_loader
+from tests.helpers.registry_utils import backdate
 
 # --- Test Constants ---
 DEFAULT_AGENT_DIR_NAME = "cli/agent_config"
@@ -33,15 +34,12 @@ def reload_config_loader():
     """Ensures config_loader is reloaded before each test."""
     # Store original state if necessary, e.g., original sys.path or env vars
     original_env = os.environ.copy()
-    original_settings = config_loader.settings.copy() if hasattr(config_loader, 'settings') else None
 
     importlib.reload(config_loader)
     yield
     # Restore original state after test
     os.environ.clear()
     os.environ.update(original_env)
-    if original_settings is not None:
-         config_loader.settings = original_settings # Restore if needed, though reload might suffice
     importlib.reload(config_loader) # Reload again to clean up module state
 
 def test_load_config_defaults(monkeypatch):
@@ -505,19 +503,100 @@ def test_get_global_registry_path(monkeypatch, tmp_path):
     assert retrieved_path == env_path.resolve()
     assert retrieved_path.is_absolute()
 
-def test_getters_fallback_to_defaults(monkeypatch):
+def test_getters_fallback_to_defaults(tmp_path):
     """
-    LOADER_UT_NEW_103: Verify getters fall back to defaults if settings are somehow empty/invalid.
+    LOADER_UT_NEW_103: Verify getters fall back to defaults if no config file or env var sets the paths.
     """
-    # Simulate settings being empty or corrupted *after* initial load
-    # The fixture reloads, so we need to patch 'settings' *after* the reload within the test
-    importlib.reload(config_loader) # Initial load via fixture
-    monkeypatch.setattr(config_loader, 'settings', {}) # Corrupt settings
+    config_loader.set_resolver(config_loader.ConfigResolver(
+        tmp_path / "missing.yaml", tmp_path / "missing.local.yaml", environ={}
+    ))
 
-    # We don't need to reload again, just call getters on the corrupted state
     project_root = config_loader.PROJECT_ROOT
     expected_agent_dir = (project_root / DEFAULT_AGENT_DIR_NAME).resolve()
     expected_registry_path = (project_root / DEFAULT_REGISTRY_NAME).resolve()
 
     assert config_loader.get_agent_config_dir() == expected_agent_dir
-    assert config_loader.get_global_registry_path() == expected_registry_path
\ No newline at end of file
+    assert config_loader.get_global_registry_path() == expected_registry_path
+
+def test_set_resolver_redirects_getters_and_compile(tmp_path):
+    """
+    LOADER_UT_NEW_104: Verify set_resolver replaces the process-wide paths, and None restores the default.
+    """
+    from cli import compiler
+    from tests.helpers.registry_utils import create_mock_config, read_mock_registry
+
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "custom_modes.json"
+    create_mock_config(agents_dir, "agent-a", {"slug": "agent-a", "name": "A", "roleDefinition": "Role.", "groups": []})
+    default = config_loader.get_resolver()
+    resolver = default.with_overrides(agent_config_dir=agents_dir, global_registry_path=registry_path)
+
+    assert config_loader.set_resolver(resolver) is default
+    assert config_loader.get_agent_config_dir() == agents_dir.resolve()
+    assert compiler.GLOBAL_REGISTRY_PATH == registry_path.resolve()
+    compiler.compile_agents(jobs=1, quiet=True)
+    assert [mode["slug"] for mode in read_mock_registry(registry_path)["customModes"]] == ["agent-a"]
+
+    assert config_loader.set_resolver(None) is resolver
+    assert config_loader.get_resolver() is not resolver
+
+# --- Tests for ConfigResolver ---
+
+def test_resolver_memoizes_until_inputs_change(monkeypatch, tmp_path):
+    """
+    LOADER_UT_NEW_201: Verify the resolver re-reads config only when a file or env var changes.
+    """
+    main_config_path = tmp_path / MAIN_CONFIG_FILENAME
+    create_config_file(main_config_path, {'agent_config_dir': "agents_v1"})
+    backdate(main_config_path)
+    monkeypatch.setattr(config_loader, 'PROJECT_ROOT', tmp_path)
+    resolve_calls = []
+    original = config_loader._resolve_settings
+    monkeypatch.setattr(config_loader, '_resolve_settings', lambda *args: resolve_calls.append(args) or original(*args))
+    environ = {}
+    resolver = config_loader.ConfigResolver(main_config_path, tmp_path / LOCAL_CONFIG_FILENAME, environ)
+
+    assert resolver.agent_config_dir == (tmp_path / "agents_v1").resolve()
+    assert resolver.global_registry_path == config_loader.DEFAULT_GLOBAL_REGISTRY_PATH.resolve()
+    assert len(resolve_calls) == 1
+
+    create_config_file(main_config_path, {'agent_config_dir': "agents_v2"})
+    backdate(main_config_path, seconds=30)
+    assert resolver.agent_config_dir == (tmp_path / "agents_v2").resolve()
+    environ['RAWR_GLOBAL_REGISTRY_PATH'] = str(tmp_path / "env.json")
+    assert resolver.global_registry_path == (tmp_path / "env.json").resolve()
+    assert len(resolve_calls) == 3
+
+
+def test_resolver_overrides_skip_config_files(monkeypatch, tmp_path):
+    """
+    LOADER_UT_NEW_202: Verify overridden settings are returned without resolving the config.
+    """
+    monkeypatch.setattr(config_loader, '_resolve_settings', lambda *args: pytest.fail("config was resolved"))
+    resolver = config_loader.ConfigResolver().with_overrides(
+        agent_config_dir=tmp_path / "agents", global_registry_path=None
+    )
+
+    assert resolver.agent_config_dir == (tmp_path / "agents").resolve()
+    assert resolver.with_overrides(global_registry_path=tmp_path / "r.json").settings() == {
+        'agent_config_dir': (tmp_path / "agents").resolve(),
+        'global_registry_path': (tmp_path / "r.json").resolve(),
+    }
+    with pytest.raises(TypeError, match="Unknown setting"):
+        config_loader.ConfigResolver(agents=tmp_path)
+
+
+def test_compile_agents_uses_given_resolver(tmp_path):
+    """
+    LOADER_UT_NEW_203: Verify compile_agents compiles the paths of the resolver it is given.
+    """
+    from cli import compiler
+    from tests.helpers.registry_utils import create_mock_config, read_mock_registry
+
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "custom_modes.json"
+    create_mock_config(agents_dir, "agent-a", {"slug": "agent-a", "name": "A", "roleDefinition": "Role.", "groups": []})
+    config = config_loader.ConfigResolver(agent_config_dir=agents_dir, global_registry_path=registry_path)
+
+    compiler.compile_agents(jobs=1, quiet=True, config=config)
+    assert [mode["slug"] for mode in read_mock_registry(registry_path)["customModes"]] == ["agent-a"]
@@ -0,0 +1,86 @@
+# tests/unit/test_config_scan.py
+import json
+
+import pytest
+
+from cli import compiler
+from cli import config_scan
+from cli import daemon
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+
+@pytest.fixture
+def tree(tmp_path):
+    base = tmp_path / "agents"
+    for relative in [
+        "alpha/config.yaml",
+        "beta/config.yaml",
+        "beta/notes.yaml",
+        "beta/config.bak.yaml",
+        "drafts/gamma/config.yaml",
+        "team/old/delta/config.yaml",
+        "team/epsilon/config.yaml",
+        "vendor/lib/config.yaml",
+        "top.yaml",
+        "readme.md",
+    ]:
+        path = base / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("slug: x\n", encoding="utf-8")
+    return base
+
+
+def _relative(base, paths):
+    return [path.relative_to(base).as_posix() for path in paths]
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_default_scan_matches_rglob(tree, threads):
+    assert config_scan.scan_configs(tree, threads=threads) == sorted(tree.rglob("*.yaml"))
+
+
+@pytest.mark.parametrize("threads", [1, 3])
+def test_ignore_file_and_include_glob(tree, threads):
+    (tree / ".rawrignore").write_text("# Work in progress\ndrafts/\n*.bak.yaml\n/vendor\nteam/old\n", encoding="utf-8")
+
+    found = config_scan.scan_configs(tree, threads=threads)
+    assert _relative(tree, found) == [
+        "alpha/config.yaml", "beta/config.yaml", "beta/notes.yaml", "team/epsilon/config.yaml", "top.yaml"
+    ]
+    assert _relative(tree, config_scan.scan_configs(tree, include="*/config.yaml", threads=threads)) == [
+        "alpha/config.yaml", "beta/config.yaml"
+    ]
+
+
+def test_excluded_subtrees_are_never_entered(tree, mocker):
+    (tree / ".rawrignore").write_text("drafts/\n", encoding="utf-8")
+    scandir = mocker.spy(config_scan.os, "scandir")
+
+    config_scan.scan_configs(tree, include="*/config.yaml")
+    scanned = {str(call.args[0]) for call in scandir.call_args_list}
+    # The glob cannot match below depth one, and drafts/ is ignored
+    assert scanned == {str(tree), str(tree / "alpha"), str(tree / "beta"), str(tree / "team"), str(tree / "vendor")}
+
+
+def test_path_glob_pruning():
+    glob = config_scan.PathGlob("*/config.yaml")
+    assert glob.may_contain(("alpha",)) and not glob.may_contain(("alpha", "nested"))
+    assert config_scan.PathGlob("team/*/config.yaml").may_contain(("team", "x"))
+    assert not config_scan.PathGlob("team/*/config.yaml").may_contain(("other",))
+    assert config_scan.PathGlob("**/*.yaml").may_contain(("a", "b", "c"))
+
+
+def test_compile_and_watch_honour_ignore_file(tmp_path, use_config_paths):
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "custom_modes.json"
+    use_config_paths(agents_dir, registry_path)
+    for slug in ("agent-a", "agent-b"):
+        create_mock_config(agents_dir, slug, valid_agent_config(slug))
+    ignore_path = agents_dir / ".rawrignore"
+    ignore_path.write_text("agent-b/\n", encoding="utf-8")
+
+    compiler.compile_agents(jobs=1, quiet=True)
+    assert [mode["slug"] for mode in json.loads(registry_path.read_text())["customModes"]] == ["agent-a"]
+
+    snapshot = daemon.snapshot_configs(agents_dir)
+    assert sorted(_relative(agents_dir, snapshot)) == [".rawrignore", "agent-a/config.yaml"]
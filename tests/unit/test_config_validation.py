@@ -0,0 +1,89 @@
+# tests/unit/test_config_validation.py
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import compiler
+from cli import config_validation
+from cli import yaml_io
+from cli.exceptions import AgentValidationError
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+
+def test_valid_batch_returns_models_in_order(tmp_path):
+    configs = [(tmp_path / f"{slug}.yaml", valid_agent_config(slug), None) for slug in ("a", "b", "c")]
+    models, report = config_validation.validate_configs(configs)
+
+    assert report.ok and report.validated == 3
+    assert [model.slug for model in models] == ["a", "b", "c"]
+    assert report.format_lines() == ["✅ Validated 3 config(s)."]
+
+
+def test_errors_are_collected_per_file_with_locations(tmp_path):
+    bad_source = "slug: b\nname: B\nroleDefinition: Role.\ngroups:\n  - read\n  - - edit\n    - fileRegex: '('\ncolour: red\n"
+    missing_source = "slug: d\nname: D\ngroups: []\n"
+    configs = [
+        (tmp_path / "a.yaml", valid_agent_config("a"), None),
+        (tmp_path / "b.yaml", *yaml_io.load_with_marks(bad_source)),
+        (tmp_path / "c.yaml", valid_agent_config("c"), None),
+        (tmp_path / "d.yaml", *yaml_io.load_with_marks(missing_source)),
+    ]
+    models, report = config_validation.validate_configs(configs)
+
+    assert [model.slug if model else None for model in models] == ["a", None, "c", None]
+    assert report.failed_paths == [tmp_path / "b.yaml", tmp_path / "d.yaml"]
+    # Union member names in pydantic locations are skipped when locating the error
+    assert [(issue.loc[0], issue.loc[-1], issue.line, issue.column) for issue in report.issues_for(tmp_path / "b.yaml")] == [
+        ("groups", "str", 6, 5), ("groups", "fileRegex", 7, 7), ("colour", "colour", 8, 1)
+    ]
+    # Missing fields are located at the mapping that lacks them
+    missing = report.issues_for(tmp_path / "d.yaml")[0]
+    assert missing.loc == ("roleDefinition",) and (missing.line, missing.column) == (1, 1)
+    lines = report.format_lines()
+    assert lines[0] == "❌ Validation failed for 2 of 4 config(s):"
+    assert lines[1].startswith(f"  {tmp_path / 'b.yaml'}:6:5: groups.1.str: ")
+
+
+def test_per_file_compile_reports_source_locations(tmp_path, capsys):
+    config_path = tmp_path / "agent-x.yaml"
+    config_path.write_text("slug: agent-x\nname: X\nroleDefinition: Role.\ngroups:\n  - read\n  - 42\n", encoding="utf-8")
+
+    with pytest.raises(AgentValidationError):
+        compiler._compile_specific_agent(config_path, {}, fragments_dir=tmp_path / "_fragments")
+    assert f"  - {config_path}:6:5: groups.1.str: Input should be a valid string" in capsys.readouterr().err
+
+
+@pytest.fixture
+def compile_env(compile_env):
+    agents_dir, registry_path = compile_env
+    create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b", groups="read"))
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c", extra=True))
+    create_mock_config(agents_dir, "agent-d", valid_agent_config("agent-d"))
+    return compile_env
+
+
+def test_batch_compile_matches_per_file_compile(compile_env, capsys):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1, full=True, output_format="ndjson")
+    per_file = registry_path.read_bytes()
+    per_file_events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    registry_path.unlink()
+    compiler.compile_agents(full=True, output_format="ndjson", batch_validate=True)
+    batch_events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert registry_path.read_bytes() == per_file
+    assert [(e.get("slug"), e.get("status")) for e in batch_events] == [(e.get("slug"), e.get("status")) for e in per_file_events]
+    assert batch_events[-1]["failed"] == 2
+
+
+def test_batch_validate_cli_reports_all_errors_together(compile_env):
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--batch-validate", "--no-daemon"])
+
+    assert "❌ Validation failed for 2 of 4 config(s):" in result.stderr
+    # Config files are written with sorted keys
+    assert "agent-b/config.yaml:1:1: groups: " in result.stderr
+    assert "agent-c/config.yaml:1:1: extra: Extra inputs are not permitted" in result.stderr
+    assert result.exit_code == 0 # Failing agents are skipped, as in per-file compiles
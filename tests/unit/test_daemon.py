@@ -0,0 +1,128 @@
+# tests/unit/test_daemon.py
+import threading
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import daemon
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config, read_mock_registry, valid_agent_config
+
+pytestmark = pytest.mark.skipif(not daemon.is_supported(), reason="Unix domain sockets are not available")
+
+
+@pytest.fixture
+def compile_env(tmp_path, monkeypatch):
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "registry" / "custom_modes.json"
+    # The process-wide config points elsewhere; the daemon must compile the paths it was given
+    monkeypatch.setenv("RAWR_AGENT_CONFIG_DIR", str(tmp_path / "other-agents"))
+    monkeypatch.setenv("RAWR_GLOBAL_REGISTRY_PATH", str(tmp_path / "other" / "custom_modes.json"))
+    create_mock_config(agents_dir, "agent-a", valid_agent_config("agent-a"))
+    return agents_dir, registry_path
+
+
+def test_changed_paths_detects_add_modify_delete(tmp_path):
+    agents_dir = tmp_path / "agents"
+    a = create_mock_config(agents_dir, "agent-a", valid_agent_config("agent-a"))
+    b = create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b"))
+    before = daemon.snapshot_configs(agents_dir)
+
+    a.write_text(a.read_text() + "# edited\n")
+    b.unlink()
+    c = create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c"))
+
+    assert daemon.changed_paths(before, daemon.snapshot_configs(agents_dir)) == [a, b, c]
+    assert daemon.snapshot_configs(tmp_path / "missing") == {}
+
+
+def test_poll_debounces_bursts_into_one_compile(compile_env, mocker):
+    agents_dir, registry_path = compile_env
+    run_compile = mocker.patch('cli.daemon.run_compile', return_value=(0, "", ""))
+    watcher = daemon.CompileDaemon(agents_dir, registry_path, debounce=1.0)
+    watcher._snapshot = daemon.snapshot_configs(agents_dir)
+
+    create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b"))
+    assert watcher.poll(now=10.0) is False
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c"))
+    assert watcher.poll(now=10.5) is False # Second save restarts the debounce window
+    assert watcher.poll(now=11.2) is False
+    assert watcher.poll(now=11.6) is True
+    assert watcher.poll(now=20.0) is False # Nothing new to compile
+
+    run_compile.assert_called_once_with(jobs=None, config=watcher.config)
+    assert watcher.config.agent_config_dir == agents_dir.resolve()
+
+
+def test_compile_request_is_served_by_running_daemon(compile_env):
+    agents_dir, registry_path = compile_env
+    server = daemon.CompileDaemon(agents_dir, registry_path, jobs=1, debounce=0.0, poll_interval=0.05)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not server.socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b"))
+        response = daemon.request_compile(registry_path, agents_dir, agent_slug=None, jobs=1)
+        assert response["exit_code"] == 0
+        assert "Compiling All Agents" in response["stdout"]
+        slugs = {mode["slug"] for mode in read_mock_registry(registry_path)["customModes"]}
+        assert slugs == {"agent-a", "agent-b"}
+        assert not (registry_path.parent.parent / "other").exists()
+
+        # A client for a different registry is turned away and compiles locally
+        assert daemon.request_compile(registry_path, agents_dir / "other") is None
+    finally:
+        server.stop()
+        thread.join(timeout=5)
+    assert not server.socket_path.exists()
+
+
+def test_request_compile_without_daemon(tmp_path):
+    registry_path = tmp_path / "custom_modes.json"
+    assert daemon.request_compile(registry_path, tmp_path) is None
+
+    # A socket file left behind by a crashed daemon is ignored
+    daemon.get_socket_path(registry_path).write_text("")
+    assert daemon.request_compile(registry_path, tmp_path) is None
+
+
+def test_compile_options_reach_the_daemon_compile(tmp_path, mocker):
+    compile_agents = mocker.patch('cli.compiler.compile_agents')
+    server = daemon.CompileDaemon(tmp_path, tmp_path / "custom_modes.json", jobs=2)
+    request = {
+        "command": "compile", "agent_config_dir": str(server.agent_config_dir),
+        "registry_path": str(server.registry_path), "scan_threads": 8, "quiet": True,
+    }
+
+    assert server.handle_request(request)["exit_code"] == 0
+    kwargs = compile_agents.call_args.kwargs
+    assert (kwargs["scan_threads"], kwargs["jobs"], kwargs["quiet"]) == (8, 2, True)
+    assert kwargs["config"] is server.config
+
+    # `rawr compile` hands the option to the daemon instead of dropping it
+    request_compile = mocker.patch('cli.daemon.request_compile', return_value={"exit_code": 0, "stdout": "", "stderr": ""})
+    assert CliRunner().invoke(app, ["compile", "--scan-threads", "8"]).exit_code == 0
+    assert request_compile.call_args.kwargs["scan_threads"] == 8
+
+
+def test_handle_request_rejects_unknown_commands(tmp_path):
+    server = daemon.CompileDaemon(tmp_path, tmp_path / "custom_modes.json")
+    assert server.handle_request({"command": "shutdown"})["status"] == "rejected"
+
+
+@pytest.mark.parametrize("field", [{"scan_threads": "x"}, {"scan_threads": 0}, {"jobs": [2]}, {"jobs": True}])
+def test_handle_request_rejects_malformed_counts(tmp_path, mocker, field):
+    compile_agents = mocker.patch('cli.compiler.compile_agents')
+    server = daemon.CompileDaemon(tmp_path, tmp_path / "custom_modes.json")
+    request = {
+        "command": "compile", "agent_config_dir": str(server.agent_config_dir),
+        "registry_path": str(server.registry_path), **field,
+    }
+
+    response = server.handle_request(request)
+    assert response["status"] == "rejected" and "Invalid" in response["reason"]
+    compile_agents.assert_not_called()
@@ -0,0 +1,92 @@
+# tests/unit/test_git_changes.py
+import json
+import shutil
+import subprocess
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import compiler
+from cli import git_changes
+from cli.exceptions import ChangeDetectionError
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+SLUGS = ("agent-a", "agent-b", "agent-c")
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path, use_config_paths):
+    agents_dir = tmp_path / "repo" / "agents"
+    registry_path = tmp_path / "custom_modes.json"
+    use_config_paths(agents_dir, registry_path)
+    (agents_dir / "_fragments").mkdir(parents=True)
+    (agents_dir / "_fragments" / "sop.md").write_text("1. Plan.\n", encoding="utf-8")
+    (agents_dir / "_fragments" / "core.md").write_text("<!-- @include sop.md -->\n", encoding="utf-8")
+    create_mock_config(agents_dir, "agent-a", valid_agent_config("agent-a"))
+    create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b", roleDefinition="<!-- @include core.md -->\n"))
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c"))
+    (agents_dir / "agent-c" / "prompt.md").write_text("# C\n", encoding="utf-8")
+    _git(agents_dir.parent, "init", "-q")
+    _git(agents_dir.parent, "add", ".")
+    _git(agents_dir.parent, "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", "init")
+    compiler.compile_agents(jobs=1, quiet=True)
+    return agents_dir, registry_path
+
+
+def _affected(agents_dir):
+    changed = git_changes.changed_paths(agents_dir, "HEAD")
+    configs = sorted(agents_dir.glob("*/config.yaml"))
+    return [path.parent.name for path in git_changes.affected_configs(configs, changed, agents_dir)]
+
+
+def test_changes_map_to_affected_configs(repo):
+    agents_dir, _ = repo
+    assert _affected(agents_dir) == []
+
+    (agents_dir / "agent-c" / "prompt.md").write_text("# C v2\n", encoding="utf-8")
+    assert _affected(agents_dir) == ["agent-c"]
+
+    # A nested fragment change reaches the config that includes it indirectly
+    (agents_dir / "_fragments" / "sop.md").write_text("1. Plan twice.\n", encoding="utf-8")
+    assert _affected(agents_dir) == ["agent-b", "agent-c"]
+
+    # Untracked configs count as changed
+    create_mock_config(agents_dir, "agent-d", valid_agent_config("agent-d"))
+    assert _affected(agents_dir) == ["agent-b", "agent-c", "agent-d"]
+
+
+def test_changed_since_compiles_only_affected_agents(repo, mocker):
+    agents_dir, registry_path = repo
+    create_mock_config(agents_dir, "agent-a", valid_agent_config("agent-a", roleDefinition="Role v2."))
+    spy = mocker.spy(compiler, "_compile_specific_agent")
+
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--changed-since", "HEAD", "--jobs", "1"])
+
+    assert result.exit_code == 0, result.stderr
+    assert "1 of 3 agent configuration(s) affected" in result.stdout
+    assert [call.args[0].parent.name for call in spy.call_args_list] == ["agent-a"]
+    modes = json.loads(registry_path.read_text())["customModes"]
+    assert [(mode["slug"], mode["roleDefinition"]) for mode in modes] == [
+        ("agent-a", "Role v2."), ("agent-b", "1. Plan.\n"), ("agent-c", "Role for agent-c")
+    ]
+
+
+def test_changed_since_errors(repo):
+    agents_dir, _ = repo
+    with pytest.raises(ChangeDetectionError, match="failed"):
+        git_changes.changed_paths(agents_dir, "no-such-rev")
+    with pytest.raises(ChangeDetectionError, match="Invalid revision"):
+        git_changes.changed_paths(agents_dir, "--output=x")
+
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(app, ["compile", "--changed-since", "no-such-rev"])
+    assert result.exit_code == 1
+    assert "Could not list changes since 'no-such-rev'" in result.stderr
+    assert runner.invoke(app, ["compile", "agent-a", "--changed-since", "HEAD"]).exit_code == 2
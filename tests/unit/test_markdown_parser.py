@@ -1,12 +1,11 @@
 import pytest
 from pathlib import Path
-# Removed import: from cli.agent_config.markdown_utils import ( # Updated path
-#     parse_markdown,
-#     _find_section,
-#     ROLE_DEFINITION_HEADINGS,
-#     CUSTOM_INSTRUCTIONS_HEADINGS,
-# )
-# Removed import: from cli.agent_config.models import AgentConfig # Updated path
+from cli.markdown_utils import (
+    extract_custom_instructions,
+    extract_role_definition,
+    parse_markdown,
+    tokenize_markdown,
+)
 
 # --- Fixtures ---
 
@@ -124,13 +123,92 @@ def multiple_role_headings_file(tmp_path, multiple_role_headings_content):
     return p
 
 
-# --- Tests for _find_section ---
+# --- Tests for tokenize_markdown ---
 
+def test_tokenize_builds_heading_tree_with_byte_offsets(valid_markdown_content):
+    document = tokenize_markdown(valid_markdown_content)
+    source = valid_markdown_content.encode("utf-8")
+
+    assert [(s.level, s.title) for s in document.sections] == [
+        (1, "Test Agent Name"),
+        (1, "Core Identity & Purpose"),
+        (2, "Custom Instructions"),
+        (2, "Another Heading (H2)"),
+        (2, "Standard Operating Procedure (SOP) / Workflow"),
+        (3, "Sub Heading (H3)"),
+    ]
+    assert [s.title for s in document.roots] == ["Test Agent Name", "Core Identity & Purpose"]
+    core, custom, other, sop, sub = document.sections[1:]
+    assert core.children == [custom, other, sop]
+    assert sop.children == [sub]
+    assert source[custom.start:custom.body_start] == b"## Custom Instructions\n"
+    assert custom.end == other.start # Ends at the next heading of the same level
+    assert core.end == sop.end == sub.end == len(source)
+
+
+def test_tokenize_ignores_headings_in_code_fences_and_handles_unicode():
+    content = "# Agent ✏️\n```bash\n# not a heading\n```\n## Persona ##\nBody é\n~~~\n## also not\n~~~\n"
+    document = tokenize_markdown(content)
+
+    assert [(s.level, s.title) for s in document.sections] == [(1, "Agent ✏️"), (2, "Persona")]
+    persona = document.sections[1]
+    assert document.body(persona) == "Body é\n~~~\n## also not\n~~~"
+    assert document.source[persona.start:persona.start + 2] == b"##" # Offsets are byte offsets
+
+
+def test_lookups_match_titles_at_any_level():
+    document = tokenize_markdown("# Agent\n## Core Identity & Purpose\nRole.\n## Next\nOther.\n")
+    assert extract_role_definition(document) == "## Core Identity & Purpose\nRole."
+    assert extract_custom_instructions(document) is None
+
+
+def test_nested_custom_instruction_sections_are_not_repeated():
+    content = "# A\n## Custom Instructions\nOne.\n### Custom Instructions\nNested.\n## Mode-specific Instructions\nTwo.\n"
+    assert extract_custom_instructions(tokenize_markdown(content)) == (
+        "## Custom Instructions\nOne.\n### Custom Instructions\nNested.\n\nTwo."
+    )
 
 
 # --- Tests for parse_markdown ---
 
+def test_parse_markdown_valid(valid_markdown_file):
+    fields = parse_markdown(valid_markdown_file)
+
+    assert fields["slug"] == "test-agent"
+    assert fields["name"] == "Test Agent Name"
+    # A level-1 role section runs until the next level-1 heading (here: EOF)
+    assert fields["roleDefinition"].startswith("# Core Identity & Purpose\nThis is the role definition.\nIt spans multiple lines.")
+    assert fields["roleDefinition"].endswith("Details within section 2.")
+    assert fields["customInstructions"] == (
+        "## Custom Instructions\nInstruction section 1.\nMore instructions here."
+        "\n\nInstruction section 2.\nFinal instructions.\n\n### Sub Heading (H3)\nDetails within section 2."
+    )
+
+
+def test_parse_markdown_minimal(minimal_markdown_file):
+    fields = parse_markdown(minimal_markdown_file)
+    assert fields == {
+        "slug": "minimal-agent",
+        "name": "Minimal Agent",
+        "roleDefinition": "# Role\nThe minimal role definition.",
+    }
+
+
+def test_parse_markdown_first_role_heading_wins(multiple_role_headings_file):
+    fields = parse_markdown(multiple_role_headings_file)
+    assert fields["roleDefinition"] == "# Persona\nThis is the first role heading.\n\nSome text."
+
+
+def test_parse_markdown_missing_role(missing_role_file):
+    with pytest.raises(ValueError, match="Could not find any role definition heading"):
+        parse_markdown(missing_role_file)
+
+
+def test_parse_markdown_missing_name(missing_name_file):
+    with pytest.raises(ValueError, match="Could not find H1 heading"):
+        parse_markdown(missing_name_file)
+
 
-# Add a test case where Pydantic validation might fail if needed,
-# although the current parser structure makes this less likely if headings are found.
-# Example: If roleDefinition was somehow extracted as empty string and was required.
\ No newline at end of file
+def test_parse_markdown_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        parse_markdown(tmp_path / "agent" / "prompt.md")
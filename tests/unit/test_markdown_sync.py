@@ -0,0 +1,138 @@
+# tests/unit/test_markdown_sync.py
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import compile_manifest
+from cli import compiler
+from cli import config_loader
+from cli import markdown_sync
+from cli import registry_manager
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config
+
+
+def _write_prompt(agents_dir, slug, name, role="Role text."):
+    agent_dir = agents_dir / slug
+    agent_dir.mkdir(parents=True, exist_ok=True)
+    path = agent_dir / "prompt.md"
+    path.write_text(f"# {name}\n\n## Role\n{role}\n\n## Custom Instructions\nNever stored.\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def sync_env(tmp_path):
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "custom_modes.json"
+    _write_prompt(agents_dir, "alpha", "Alpha")                 # Unchanged
+    _write_prompt(agents_dir, "beta", "Beta v2")                # Updated
+    _write_prompt(agents_dir, "gamma", "Gamma")                 # Added
+    (agents_dir / "broken").mkdir()
+    (agents_dir / "broken" / "prompt.md").write_text("No headings at all.\n")
+    registry_path.write_text(json.dumps({"customModes": [
+        {"slug": "alpha", "name": "Alpha", "roleDefinition": "## Role\nRole text.", "groups": ["read"]},
+        {"slug": "beta", "name": "Beta", "roleDefinition": "## Role\nRole text.", "groups": ["edit"]},
+        {"slug": "broken", "name": "Broken", "roleDefinition": "Old", "groups": []},
+        {"slug": "orphan", "name": "Orphan", "roleDefinition": "Old", "groups": []},
+    ]}))
+    return agents_dir, registry_path
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_sync_applies_adds_and_updates_in_one_write(sync_env, mocker, jobs):
+    agents_dir, registry_path = sync_env
+    write = mocker.spy(registry_manager, "write_global_registry")
+
+    report = markdown_sync.sync_markdown_agents(agents_dir, registry_path, jobs=jobs)
+
+    assert report.added == ["gamma"]
+    assert report.updated == ["beta"]
+    assert report.unchanged == ["alpha"]
+    assert report.stale == ["orphan"] # The unparsable 'broken' prompt does not make its entry stale
+    assert report.deleted == []
+    assert list(report.failed) == [str(agents_dir / "broken" / "prompt.md")]
+    assert write.call_count == 1
+
+    modes = {mode["slug"]: mode for mode in registry_manager.read_global_registry(registry_path)["customModes"]}
+    assert list(modes) == ["alpha", "beta", "broken", "orphan", "gamma"]
+    assert modes["beta"] == {"slug": "beta", "name": "Beta v2", "roleDefinition": "## Role\nRole text.", "groups": ["edit"]}
+    assert modes["gamma"]["groups"] == []
+    assert all("customInstructions" not in mode for mode in modes.values())
+
+
+def test_sync_deletes_stale_entries_when_requested(sync_env):
+    agents_dir, registry_path = sync_env
+    report = markdown_sync.sync_markdown_agents(agents_dir, registry_path, delete_stale=True)
+
+    assert report.deleted == ["orphan"]
+    slugs = [mode["slug"] for mode in registry_manager.read_global_registry(registry_path)["customModes"]]
+    assert "orphan" not in slugs and "broken" in slugs
+
+
+def test_sync_without_changes_does_not_write(sync_env, mocker):
+    agents_dir, registry_path = sync_env
+    markdown_sync.sync_markdown_agents(agents_dir, registry_path)
+    write = mocker.spy(registry_manager, "write_global_registry")
+
+    report = markdown_sync.sync_markdown_agents(agents_dir, registry_path)
+
+    assert not report.changed and not report.written
+    write.assert_not_called()
+
+
+def test_sync_command_reports_changes(sync_env, use_config_paths):
+    agents_dir, registry_path = sync_env
+    use_config_paths(global_registry_path=registry_path)
+    result = CliRunner(mix_stderr=False).invoke(app, ["sync", str(agents_dir), "--jobs", "1"])
+
+    assert result.exit_code == 1 # One prompt failed to parse
+    assert "➕ Added (1): gamma" in result.stdout
+    assert "🔄 Updated (1): beta" in result.stdout
+    assert "--delete-stale" in result.stdout
+    assert "Error parsing" in result.stderr
+
+
+def test_sync_missing_directory(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        markdown_sync.sync_markdown_agents(tmp_path / "missing", tmp_path / "custom_modes.json")
+
+
+def test_sync_respects_agents_compiled_from_configs(sync_env, tmp_path, capsys):
+    agents_dir, registry_path = sync_env
+    config_dir = tmp_path / "configs"
+    for slug in ("beta", "orphan", "delta"):
+        create_mock_config(config_dir, slug, {"slug": slug, "name": slug.title(), "roleDefinition": "Compiled.", "groups": ["read"]})
+    config = config_loader.ConfigResolver(agent_config_dir=config_dir, global_registry_path=registry_path)
+    compiler.compile_agents(jobs=1, quiet=True, config=config)
+    _write_prompt(agents_dir, "beta", "Beta v3")
+    _write_prompt(agents_dir, "delta", "Delta")
+
+    report = markdown_sync.sync_markdown_agents(agents_dir, registry_path, delete_stale=True, agent_config_dir=config_dir)
+
+    # 'orphan' has no prompt but is compiled from a config, so it is not stale
+    assert report.deleted == [] and report.stale == []
+    assert report.updated == ["beta", "delta"] and report.compiled == ["beta", "delta"]
+    assert report.left_to_compile == []
+    manifest = compile_manifest.read_manifest(compile_manifest.get_manifest_path(registry_path), config_dir)
+    assert sorted(manifest["entries"]) == ["orphan/config.yaml"]
+
+    # The config takes precedence: the next compile re-processes it and replaces the synced fields
+    capsys.readouterr()
+    compiler.compile_agents(jobs=1, config=config, output_format="ndjson")
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    statuses = {record["slug"]: record["status"] for record in records if record.get("event") == "agent"}
+    assert statuses == {"beta": "compiled", "delta": "compiled", "orphan": "unchanged"}
+    modes = {mode["slug"]: mode for mode in registry_manager.read_global_registry(registry_path)["customModes"]}
+    assert modes["beta"]["name"] == "Beta" and modes["delta"]["groups"] == ["read"]
+
+
+def test_sync_leaves_new_compiled_agents_to_compile(sync_env, tmp_path):
+    agents_dir, registry_path = sync_env
+    config_dir = tmp_path / "configs"
+    create_mock_config(config_dir, "gamma", {"slug": "gamma", "name": "Gamma", "roleDefinition": "Compiled.", "groups": ["read"]})
+
+    report = markdown_sync.sync_markdown_agents(agents_dir, registry_path, agent_config_dir=config_dir)
+
+    assert report.added == [] and report.left_to_compile == ["gamma"]
+    assert "gamma" not in {mode["slug"] for mode in registry_manager.read_global_registry(registry_path)["customModes"]}
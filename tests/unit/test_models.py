@@ -41,6 +41,13 @@ def test_group_restriction_invalid_type_regex():
     errors = excinfo.value.errors()
     assert any(e['loc'] == ('fileRegex',) and 'string_type' in e['type'] for e in errors) # Check for string type error
 
+def test_group_restriction_invalid_regex_pattern():
+    """fileRegex must compile as a regular expression"""
+    with pytest.raises(ValidationError) as excinfo:
+        GroupRestriction(fileRegex="src/(unclosed")
+    errors = excinfo.value.errors()
+    assert any(e['loc'] == ('fileRegex',) and 'invalid regular expression' in e['msg'] for e in errors)
+
 def test_group_restriction_invalid_type_description():
     """Test Case GR-05"""
     data = {"fileRegex": ".*", "description": ["list", "is", "wrong"]}
@@ -0,0 +1,46 @@
+# tests/unit/test_parallel_compile.py
+import pytest
+
+from cli.compiler import _compile_all_agents
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+
+@pytest.fixture
+def mixed_agents_dir(tmp_path):
+    """An agent directory with valid, schema-invalid and unparsable configs."""
+    agents_dir = tmp_path / "agents"
+    for slug in ["agent-c", "agent-a", "agent-e", "agent-b"]:
+        create_mock_config(agents_dir, slug, valid_agent_config(slug))
+    create_mock_config(agents_dir, "agent-d", {"slug": "agent-d"}) # Missing required fields
+    bad_yaml_dir = agents_dir / "agent-f"
+    bad_yaml_dir.mkdir()
+    (bad_yaml_dir / "config.yaml").write_text("slug: agent-f\ngroups: [read")
+    return agents_dir
+
+
+def test_parallel_compile_matches_serial(mixed_agents_dir, capsys):
+    """The process-pool path produces the same registry, counts and output as the serial path."""
+    initial = {"customModes": []}
+
+    serial = _compile_all_agents(mixed_agents_dir, initial, jobs=1)
+    serial_out = capsys.readouterr()
+    parallel = _compile_all_agents(mixed_agents_dir, initial, jobs=3)
+    parallel_out = capsys.readouterr()
+
+    assert parallel == serial
+    assert serial[1:] == (4, 2)
+    assert parallel_out.out == serial_out.out
+    assert parallel_out.err == serial_out.err
+    assert initial == {"customModes": []} # Caller's registry data is not mutated
+
+
+def test_parallel_compile_merges_in_path_order(mixed_agents_dir):
+    """Successful agents are merged in sorted path order, after any existing entries."""
+    existing = {"slug": "agent-b", "name": "Old B", "roleDefinition": "Old", "groups": []}
+    registry, compiled, failed = _compile_all_agents(
+        mixed_agents_dir, {"customModes": [{"slug": "zeta"}, existing]}, jobs=2
+    )
+
+    slugs = [mode["slug"] for mode in registry["customModes"]]
+    assert slugs == ["zeta", "agent-b", "agent-a", "agent-c", "agent-e"]
+    assert registry["customModes"][1]["name"] == "Agent agent-b" # Updated in place
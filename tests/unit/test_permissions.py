@@ -0,0 +1,63 @@
+# tests/unit/test_permissions.py
+import pytest
+
+from cli import permissions
+from cli.permissions import PermissionEngine
+
+REGISTRY = {"customModes": [
+    {"slug": "docs", "groups": ["read", ["edit", {"fileRegex": "\\.md$", "description": "Markdown"}], ["edit", {"fileRegex": "^docs/"}]]},
+    {"slug": "coder", "groups": ["read", "edit", "command"]},
+    {"slug": "tester", "groups": [["edit", {"fileRegex": "(test|spec)_\\w+\\.py$"}], ["edit", {"fileRegex": "(?i)\\.SNAP$"}]]},
+    {"slug": "reader", "groups": ["read"]},
+]}
+
+
+@pytest.fixture
+def engine():
+    return PermissionEngine.from_registry(REGISTRY)
+
+
+def test_restricted_group_uses_search_semantics(engine):
+    assert engine.is_allowed("docs", "edit", "README.md")
+    assert engine.is_allowed("docs", "edit", "docs/api/index.rst")
+    assert not engine.is_allowed("docs", "edit", "src/main.py")
+    assert engine.is_allowed("docs", "read", "src/main.py") # Unrestricted group
+    assert not engine.is_allowed("reader", "edit", "README.md") # Group not granted
+
+
+def test_patterns_are_merged_only_when_safe(engine):
+    docs_edit = engine._matchers["docs"]["edit"]
+    assert len(docs_edit) == 1 # Both restrictions merged into one alternation
+    # Capture groups and inline global flags keep their own compiled pattern
+    assert len(engine._matchers["tester"]["edit"]) == 2
+    assert engine.is_allowed("tester", "edit", "tests/test_models.py")
+    assert engine.is_allowed("tester", "edit", "__snapshots__/a.snap")
+    assert not engine.is_allowed("tester", "edit", "cli/models.py")
+
+
+def test_batch_and_reverse_queries(engine):
+    paths = ["README.md", "src/app.py", "tests/spec_app.py"]
+    assert engine.check_paths("docs", "edit", paths) == [("README.md", True), ("src/app.py", False), ("tests/spec_app.py", False)]
+    assert engine.check_paths("coder", "edit", paths) == [(p, True) for p in paths]
+    assert engine.check_paths("reader", "edit", paths) == [(p, False) for p in paths]
+    assert engine.allowed_agents("edit", "README.md") == ["docs", "coder"]
+    with pytest.raises(KeyError):
+        engine.check_paths("missing", "edit", paths)
+
+
+def test_unrestricted_grant_overrides_restrictions():
+    groups = [["edit", {"fileRegex": "\\.md$"}], "edit", ["edit", {"fileRegex": "\\.py$"}]]
+    assert permissions.parse_groups(groups) == {"edit": permissions.ALLOW_ALL}
+
+
+def test_compiled_patterns_are_cached():
+    permissions.compile_file_regex.cache_clear()
+    PermissionEngine.from_registry(REGISTRY)
+    PermissionEngine.from_registry(REGISTRY)
+    info = permissions.compile_file_regex.cache_info()
+    assert info.hits > 0 and info.misses == info.currsize
+
+
+def test_invalid_pattern_in_registry_is_reported():
+    with pytest.raises(ValueError, match="Invalid fileRegex for agent 'bad'"):
+        PermissionEngine([{"slug": "bad", "groups": [["edit", {"fileRegex": "("}]]}])
@@ -0,0 +1,67 @@
+# tests/unit/test_profiling.py
+import json
+
+import pytest
+
+from cli import compiler
+from cli import profiling
+from cli import yaml_io
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+
+@pytest.fixture
+def compile_env(compile_env):
+    agents_dir, registry_path = compile_env
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c"))
+    return compile_env
+
+
+def test_stage_is_a_no_op_without_an_active_profiler():
+    assert not profiling.is_active()
+    with profiling.stage("anything"):
+        pass
+
+    profiler = profiling.CompileProfiler()
+    with profiling.activate(profiler):
+        with profiling.stage("work", items=2):
+            pass
+    assert [(span["name"], span["args"]) for span in profiler.spans] == [("work", {"items": 2})]
+    assert not profiling.is_active()
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 21)]
+    assert profiling.percentile(values, 50) == 10.0
+    assert profiling.percentile(values, 95) == 19.0
+    assert profiling.percentile([], 95) == 0.0
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_profiled_compile_reports_stages_and_writes_trace(compile_env, tmp_path, capsys, jobs):
+    trace_path = tmp_path / "trace.json"
+    compiler.compile_agents(jobs=jobs, quiet=True, trace_path=trace_path, profile_top=2)
+    err = capsys.readouterr().err
+
+    assert "Stages (wall time):" in err
+    assert f"Yaml backend: {yaml_io.BACKEND}" in err
+    for stage in ("registry.read", "scan", "compile", "merge", "registry.write", "manifest.write"):
+        assert f"  {stage} " in err
+    assert "Per-file stages (summed over 3 compiled file(s)):" in err
+    assert "p50" in err and "p95" in err
+    assert "Slowest 2 file(s):" in err
+
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    files = [event for event in events if event.get("cat") == "file"]
+    assert sorted(event["name"] for event in files) == ["agent-a", "agent-b", "agent-c"]
+    file_stages = [event["name"] for event in events if event.get("cat") == "file-stage"]
+    assert file_stages.count("validate") == 3
+    assert all(event["dur"] >= 0 for event in events if event["ph"] == "X")
+
+
+def test_profiling_does_not_leak_into_ndjson_events(compile_env, capsys):
+    compiler.compile_agents(jobs=1, output_format="ndjson", profile=True)
+    out = capsys.readouterr().out
+
+    records = [json.loads(line) for line in out.splitlines()]
+    assert all("trace" not in record for record in records)
+    assert records[-1]["event"] == "summary"
@@ -0,0 +1,117 @@
+# tests/unit/test_prompt_includes.py
+import json
+
+import pytest
+
+from cli import compile_manifest
+from cli import compiler
+from cli import markdown_sync
+from cli import prompt_includes
+from cli.exceptions import FragmentIncludeError
+from tests.helpers.registry_utils import backdate, create_mock_config, valid_agent_config
+
+SOP = "## SOP\n\n1. Plan.\n2. Act.\n"
+
+
+@pytest.fixture
+def fragments_dir(tmp_path):
+    fragments = tmp_path / "agents" / "_fragments"
+    (fragments / "persona").mkdir(parents=True)
+    (fragments / "sop.md").write_text(SOP, encoding="utf-8")
+    (fragments / "persona" / "core.md").write_text("# Core Identity\n<!-- @include sop.md -->\n", encoding="utf-8")
+    return fragments
+
+
+def test_render_expands_nested_includes(fragments_dir):
+    renderer = prompt_includes.FragmentRenderer(fragments_dir)
+    rendered, dependencies = renderer.render("Intro.\n  <!-- @include persona/core.md -->\nOutro.\n")
+
+    assert rendered == "Intro.\n# Core Identity\n" + SOP + "Outro.\n"
+    assert set(dependencies) == {"persona/core.md", "sop.md"}
+    assert dependencies["sop.md"] == prompt_includes.FragmentRenderer(fragments_dir).source_digest("sop.md")
+    # Text without directives is returned as is; inline mentions are not directives
+    assert renderer.render("See <!-- @include sop.md --> inline.") == ("See <!-- @include sop.md --> inline.", {})
+
+
+def test_shared_fragment_is_rendered_once(fragments_dir, mocker):
+    renderer = prompt_includes.FragmentRenderer(fragments_dir)
+    substitute = mocker.spy(prompt_includes, "_substitute")
+    for _ in range(3):
+        renderer.render("<!-- @include persona/core.md -->\n")
+
+    # core.md and sop.md once each, plus one substitution per rendered prompt
+    assert substitute.call_count == 2 + 3
+
+
+@pytest.mark.parametrize("name, message", [
+    ("missing.md", "Cannot read fragment"),
+    ("../secret.md", "outside the fragment directory"),
+    ("loop.md", "include cycle: loop.md -> loop.md"),
+])
+def test_render_errors(fragments_dir, name, message):
+    (fragments_dir / "loop.md").write_text("<!-- @include loop.md -->\n", encoding="utf-8")
+    with pytest.raises(FragmentIncludeError, match=message):
+        prompt_includes.FragmentRenderer(fragments_dir).render(f"<!-- @include {name} -->\n")
+
+
+@pytest.fixture
+def compile_env(compile_env, fragments_dir):
+    agents_dir, registry_path = compile_env
+    roles = {"agent-a": "<!-- @include sop.md -->\n", "agent-b": "<!-- @include persona/core.md -->\n", "agent-c": "Plain."}
+    for slug, role in roles.items():
+        backdate(create_mock_config(agents_dir, slug, valid_agent_config(slug, roleDefinition=role)))
+    for path in fragments_dir.rglob("*.md"):
+        backdate(path)
+    return compile_env
+
+
+def test_compile_renders_includes_and_records_dependencies(compile_env):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    roles = {mode["slug"]: mode["roleDefinition"] for mode in json.loads(registry_path.read_text())["customModes"]}
+    assert roles == {"agent-a": SOP, "agent-b": "# Core Identity\n" + SOP, "agent-c": "Plain."}
+    entries = json.loads(compile_manifest.get_manifest_path(registry_path).read_text())["entries"]
+    assert set(entries["agent-b/config.yaml"]["includes"]) == {"persona/core.md", "sop.md"}
+    assert "includes" not in entries["agent-c/config.yaml"]
+
+
+@pytest.mark.parametrize("fragment, recompiled", [
+    ("sop.md", ["agent-a", "agent-b"]),
+    ("persona/core.md", ["agent-b"]),
+])
+def test_fragment_edit_recompiles_exactly_its_dependents(compile_env, fragments_dir, mocker, fragment, recompiled):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+
+    path = fragments_dir / fragment
+    path.write_text(path.read_text(encoding="utf-8") + "Edited.\n", encoding="utf-8")
+    spy = mocker.spy(compiler, "_compile_specific_agent")
+    compiler.compile_agents(jobs=1)
+
+    assert [c.args[0].parent.name for c in spy.call_args_list] == recompiled
+    roles = {mode["slug"]: mode["roleDefinition"] for mode in json.loads(registry_path.read_text())["customModes"]}
+    assert all(roles[slug].endswith("Edited.\n") for slug in recompiled)
+
+
+def test_broken_include_fails_only_that_agent(compile_env, capsys):
+    agents_dir, registry_path = compile_env
+    create_mock_config(agents_dir, "agent-d", valid_agent_config("agent-d", roleDefinition="<!-- @include nope.md -->"))
+
+    compiler.compile_agents(jobs=1)
+    assert "Failed to render prompt includes" in capsys.readouterr().err
+    assert [mode["slug"] for mode in json.loads(registry_path.read_text())["customModes"]] == ["agent-a", "agent-b", "agent-c"]
+
+
+def test_sync_renders_prompt_includes(tmp_path, fragments_dir):
+    agents_dir = tmp_path / "agents"
+    (agents_dir / "writer").mkdir()
+    (agents_dir / "writer" / "prompt.md").write_text(
+        "# Writer\n\n## Role\nWrites.\n<!-- @include sop.md -->\n", encoding="utf-8"
+    )
+    registry_path = tmp_path / "custom_modes.json"
+
+    report = markdown_sync.sync_markdown_agents(agents_dir, registry_path)
+    assert report.added == ["writer"]
+    role = json.loads(registry_path.read_text())["customModes"][0]["roleDefinition"]
+    assert "<!-- @include" not in role and role.endswith("1. Plan.\n2. Act.")
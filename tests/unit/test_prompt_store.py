@@ -0,0 +1,132 @@
+# tests/unit/test_prompt_store.py
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import compiler
+from cli import prompt_store
+from cli import registry_index
+from cli import registry_manager
+from cli.exceptions import RegistryReadError
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config
+
+SHARED = "# Core Identity & Purpose\n\nYou are a careful agent.\n\n## SOP\n\n1. Plan.\n2. Act.\n"
+
+
+def _mode(slug: str, role: str) -> dict:
+    return {"slug": slug, "name": slug.title(), "roleDefinition": role, "customInstructions": "Be brief.", "groups": ["read"]}
+
+
+REGISTRY = {"customModes": [
+    _mode("alpha", "Alpha intro.\n\n" + SHARED),
+    _mode("beta", "Beta intro.\n\n" + SHARED),
+    _mode("gamma", SHARED),
+]}
+
+
+@pytest.fixture
+def registry_path(tmp_path):
+    path = tmp_path / "custom_modes.json"
+    registry_manager.write_global_registry(REGISTRY, registry_path=path, use_prompt_store=True)
+    return path
+
+
+def _blob_count(registry_path) -> int:
+    return len(list(prompt_store.PromptStore(prompt_store.get_store_dir(registry_path)).iter_blob_digests()))
+
+
+def test_split_fragments_round_trips():
+    text = "Intro\n# A\nbody\n## B\n#not a heading\n```\n# in code\n```\n"
+    fragments = prompt_store.split_fragments(text)
+
+    assert "".join(fragments) == text
+    assert fragments[:3] == ["Intro\n", "# A\nbody\n", "## B\n#not a heading\n```\n"]
+    assert prompt_store.split_fragments("") == []
+
+
+def test_store_deduplicates_shared_fragments(registry_path):
+    assert prompt_store.is_enabled(registry_path)
+    assert not registry_path.exists() # The editor JSON is only written on demand
+    # Two intros, two shared sections and one shared customInstructions blob
+    assert _blob_count(registry_path) == 5
+
+    stored = json.loads(prompt_store.get_store_registry_path(registry_path).read_text())
+    gamma = stored["customModes"][2]
+    assert list(gamma["roleDefinition"]) == [prompt_store.FRAGMENTS_KEY]
+    assert gamma["roleDefinition"][prompt_store.FRAGMENTS_KEY] == stored["customModes"][0]["roleDefinition"][prompt_store.FRAGMENTS_KEY][1:]
+
+    assert registry_manager.read_global_registry(registry_path) == REGISTRY
+
+
+def test_rewrite_only_writes_new_fragments(registry_path):
+    updated = {"customModes": REGISTRY["customModes"] + [_mode("delta", "Delta intro.\n\n" + SHARED)]}
+    store = prompt_store.PromptStore(prompt_store.get_store_dir(registry_path))
+    store.deflate(updated)
+
+    assert store.blobs_written == 1
+    assert registry_manager.write_global_registry(updated, registry_path=registry_path, skip_unchanged=True)
+    assert not registry_manager.write_global_registry(updated, registry_path=registry_path, skip_unchanged=True)
+    assert registry_manager.read_global_registry(registry_path) == updated
+
+
+def test_journal_replays_on_top_of_store(registry_path):
+    registry_manager.append_registry_journal(registry_path, [{"op": "delete", "slug": "beta"}])
+    assert [mode["slug"] for mode in registry_manager.read_global_registry(registry_path)["customModes"]] == ["alpha", "gamma"]
+
+    assert registry_manager.compact_registry(registry_path)
+    assert registry_manager.journal_size(registry_path) == 0
+    assert not registry_path.exists()
+    assert prompt_store.prune_blobs(registry_path) == 1 # beta's intro
+    assert [mode["slug"] for mode in registry_manager.read_global_registry(registry_path)["customModes"]] == ["alpha", "gamma"]
+
+
+def test_corrupt_blob_raises(registry_path):
+    store = prompt_store.PromptStore(prompt_store.get_store_dir(registry_path))
+    store.blob_path(prompt_store.digest("Be brief.")).write_text("tampered", encoding='utf-8')
+
+    with pytest.raises(RegistryReadError):
+        registry_manager.read_global_registry(registry_path)
+
+
+def test_index_follows_the_store(registry_path):
+    index = registry_index.load_registry_index(registry_path)
+    assert index["registry"]["prompt_store"] is True
+    assert registry_index.slugs_with_group(index, "read") == ["alpha", "beta", "gamma"]
+
+
+def test_materialize_and_disable(registry_path):
+    assert prompt_store.materialize_registry(registry_path)
+    assert json.loads(registry_path.read_text()) == REGISTRY
+    assert not prompt_store.materialize_registry(registry_path)
+
+    registry_manager.append_registry_journal(registry_path, [{"op": "delete", "slug": "gamma"}])
+    prompt_store.disable_prompt_store(registry_path)
+
+    assert not prompt_store.get_store_dir(registry_path).exists()
+    assert registry_manager.journal_size(registry_path) == 0
+    assert [mode["slug"] for mode in json.loads(registry_path.read_text())["customModes"]] == ["alpha", "beta"]
+
+
+def test_compile_enables_store_and_materialize_command(tmp_path, use_config_paths):
+    agents_dir = tmp_path / "agents"
+    registry_path = tmp_path / "custom_modes.json"
+    use_config_paths(agents_dir, registry_path)
+    for slug in ("alpha", "beta"):
+        create_mock_config(agents_dir, slug, {"slug": slug, "name": slug, "roleDefinition": SHARED, "groups": ["read"]})
+
+    compiler.compile_agents(jobs=1, quiet=True)
+    assert registry_path.exists() and not prompt_store.is_enabled(registry_path)
+
+    # Enabling the store rewrites the registry even though no config changed
+    compiler.compile_agents(jobs=1, quiet=True, prompt_store=True)
+    assert prompt_store.is_enabled(registry_path)
+    compiled = json.loads(registry_path.read_text())
+    assert registry_manager.read_global_registry(registry_path) == compiled
+
+    registry_path.unlink()
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(app, ["materialize"])
+    assert result.exit_code == 0, result.stderr
+    assert json.loads(registry_path.read_text()) == compiled
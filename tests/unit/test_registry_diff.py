@@ -0,0 +1,106 @@
+# tests/unit/test_registry_diff.py
+import json
+
+from typer.testing import CliRunner
+
+from cli import compiler
+from cli import registry_diff
+from cli.main import app
+from tests.helpers.registry_utils import create_mock_config, valid_agent_config
+
+
+def _mode(slug: str, **fields) -> dict:
+    return {"slug": slug, "name": slug.title(), "roleDefinition": "Role.", "groups": ["read"], **fields}
+
+
+OLD = {"customModes": [_mode("alpha"), _mode("beta"), _mode("gamma")]}
+
+
+def test_equal_registries_have_an_empty_diff():
+    diff = registry_diff.diff_registries(OLD, json.loads(json.dumps(OLD)))
+    assert diff.is_empty
+    assert diff.format_lines() == ["Registry diff: no changes."]
+    assert registry_diff.diff_registries(None, {"customModes": []}).is_empty
+
+
+def test_diff_per_slug_and_field():
+    new = {"customModes": [
+        _mode("alpha", name="Alpha v2"),
+        {"slug": "beta", "name": "Beta", "roleDefinition": "x" * 100},  # groups removed, long role
+        _mode("gamma"),
+        _mode("delta"),
+    ]}
+
+    diff = registry_diff.diff_registries(OLD, new)
+
+    assert diff.added == ["delta"] and diff.removed == []
+    assert diff.changed == {
+        "alpha": {"name": ("Alpha", "Alpha v2")},
+        "beta": {"roleDefinition": ("Role.", "x" * 100), "groups": (["read"], registry_diff.MISSING)},
+    }
+    assert not diff.reordered
+    assert diff.to_dict()["changed"] == {"alpha": ["name"], "beta": ["roleDefinition", "groups"]}
+    assert diff.format_lines() == [
+        "Registry diff: 1 added, 2 changed, 0 removed",
+        "  + delta",
+        "  ~ alpha",
+        '      name: "Alpha" -> "Alpha v2"',
+        "  ~ beta",
+        "      roleDefinition: 5 -> 100 chars",
+        '      groups: ["read"] -> (absent)',
+    ]
+
+
+def test_removed_reordered_and_unindexed_entries():
+    new = {"customModes": [_mode("gamma"), _mode("alpha"), "not-a-mode"], "version": 2}
+    diff = registry_diff.diff_registries(OLD, new)
+
+    assert diff.removed == ["beta"]
+    assert diff.reordered
+    assert diff.unindexed_changed
+    assert diff.layout == ["version"]
+    # Duplicate slugs: the first entry is the indexed one, later ones are compared as a whole
+    duplicated = {"customModes": OLD["customModes"] + [_mode("alpha", name="Shadow")]}
+    diff = registry_diff.diff_registries(OLD, duplicated)
+    assert not diff.changed and diff.unindexed_changed
+
+
+def test_dry_run_reports_diff_without_writing(compile_env, capsys):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+    before = registry_path.read_bytes()
+    create_mock_config(agents_dir, "agent-b", valid_agent_config("agent-b", name="B2"))
+    create_mock_config(agents_dir, "agent-c", valid_agent_config("agent-c", name="c", groups=[]))
+    capsys.readouterr()
+
+    compiler.compile_agents(jobs=1, dry_run=True, output_format="ndjson")
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    diff = next(record for record in records if record["event"] == "diff")
+    assert diff["added"] == ["agent-c"] and diff["changed"] == {"agent-b": ["name"]}
+    assert records[-1]["registry"] == "dry_run"
+    assert registry_path.read_bytes() == before
+
+    # The manifest was not updated either, so the real compile still sees both changes
+    compiler.compile_agents(jobs=1, quiet=True)
+    assert [mode["name"] for mode in json.loads(registry_path.read_text())["customModes"]] == ["Agent agent-a", "B2", "c"]
+
+
+def test_unchanged_single_agent_compile_skips_the_write(compile_env, mocker, capsys):
+    agents_dir, registry_path = compile_env
+    compiler.compile_agents(jobs=1)
+    (agents_dir / "agent-a" / "config.yaml").rename(agents_dir / "agent-a.yaml")
+    write = mocker.spy(compiler.registry_manager, "write_global_registry")
+
+    compiler.compile_agents(agent_slug="agent-a")
+    write.assert_not_called()
+    assert "already up to date" in capsys.readouterr().out
+
+
+def test_dry_run_cli_text_output(compile_env):
+    agents_dir, registry_path = compile_env
+    result = CliRunner(mix_stderr=False).invoke(app, ["compile", "--dry-run", "--no-daemon", "--jobs", "1"])
+
+    assert result.exit_code == 0, result.stderr
+    assert "Registry diff: 2 added, 0 changed, 0 removed" in result.stdout
+    assert "  + agent-a" in result.stdout
+    assert not registry_path.exists()
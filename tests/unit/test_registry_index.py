@@ -0,0 +1,88 @@
+# tests/unit/test_registry_index.py
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from cli import registry_index
+from cli import registry_manager
+from cli.main import app
+
+REGISTRY = {"customModes": [
+    {"slug": "docs", "name": "Docs", "roleDefinition": "r", "groups": ["read", ["edit", {"fileRegex": "\\.md$"}]]},
+    {"slug": "coder", "name": "Coder", "roleDefinition": "r", "groups": ["read", "edit", "command"]},
+    {"slug": "config", "name": "Config", "roleDefinition": "r",
+     "groups": [["edit", {"fileRegex": "\\.md$"}], ["edit", {"fileRegex": "\\.ya?ml$"}]]},
+]}
+
+
+@pytest.fixture
+def registry_path(tmp_path):
+    path = tmp_path / "custom_modes.json"
+    registry_manager.write_global_registry(REGISTRY, registry_path=path)
+    return path
+
+
+def test_build_registry_index():
+    index = registry_index.build_registry_index(REGISTRY)
+
+    assert index["groups"] == {"read": ["docs", "coder"], "edit": ["docs", "coder", "config"], "command": ["coder"]}
+    assert index["unrestricted"] == {"read": ["docs", "coder"], "edit": ["coder"], "command": ["coder"]}
+    assert index["restrictions"] == {"\\.md$": {"edit": ["docs", "config"]}, "\\.ya?ml$": {"edit": ["config"]}}
+
+
+def test_write_global_registry_writes_index(registry_path):
+    index_path = registry_index.get_index_path(registry_path)
+    assert index_path.exists()
+    stored = json.loads(index_path.read_text())
+    assert stored["groups"]["command"] == ["coder"]
+    assert stored["registry"]["size"] == registry_path.stat().st_size
+
+
+def test_query_helpers(registry_path):
+    index = registry_index.load_registry_index(registry_path)
+
+    assert registry_index.slugs_with_group(index, "edit") == ["docs", "coder", "config"]
+    assert registry_index.slugs_with_group(index, "edit", unrestricted_only=True) == ["coder"]
+    assert registry_index.slugs_with_group(index, "browser") == []
+    assert registry_index.slugs_with_restriction(index, "\\.md$") == ["docs", "config"]
+    assert registry_index.slugs_with_restriction(index, "\\.md$", group="read") == []
+    assert registry_index.slugs_for_path(index, "edit", "conf/app.yaml") == ["coder", "config"]
+    assert registry_index.slugs_for_path(index, "edit", "README.md") == ["docs", "coder", "config"]
+
+
+def test_stale_index_is_rebuilt_after_journal_append(registry_path, mocker):
+    registry_manager.append_registry_journal(registry_path, [
+        {"op": "upsert", "mode": {"slug": "shell", "name": "Shell", "roleDefinition": "r", "groups": ["command"]}},
+    ])
+    read = mocker.spy(registry_manager, "read_global_registry")
+
+    index = registry_index.load_registry_index(registry_path)
+
+    assert read.call_count == 1
+    assert index["groups"]["command"] == ["coder", "shell"]
+    # The rebuilt index is current again, so the next load does not reread the registry
+    registry_index.load_registry_index(registry_path)
+    assert read.call_count == 1
+
+
+def test_missing_registry_gives_empty_index(tmp_path):
+    index = registry_index.load_registry_index(tmp_path / "custom_modes.json")
+    assert index["groups"] == {}
+    assert not registry_index.get_index_path(tmp_path / "custom_modes.json").exists()
+
+
+def test_query_command(registry_path, use_config_paths):
+    use_config_paths(global_registry_path=registry_path)
+    runner = CliRunner(mix_stderr=False)
+
+    result = runner.invoke(app, ["query", "--group", "edit", "--path", "settings.yml"])
+    assert result.exit_code == 0
+    assert result.stdout.split() == ["coder", "config"]
+
+    result = runner.invoke(app, ["query", "--pattern", "\\.md$"])
+    assert result.stdout.split() == ["docs", "config"]
+
+    result = runner.invoke(app, ["query", "--pattern", "x", "--path", "a.md"])
+    assert result.exit_code == 2
+    assert "require --group" in result.stderr
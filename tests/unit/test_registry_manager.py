@@ -245,88 +245,206 @@ def test_update_registry_invalid_agent_metadata_input(mocker):
 
 # === Test Suite: write_global_registry ===
 
-def test_write_registry_success(mocker):
+def test_write_registry_success(tmp_path):
     """TC-WRITE-01: Successfully write valid data to a file."""
-    # Use helper
-    mock_mkdir, mock_open_call, mock_json_dump = mocking_utils.mock_file_write(mocker, MOCK_REGISTRY_PATH_STR)
-    # Get the file handle mock from the open call mock if needed for assertions
-    mock_open_func = mock_open_call.return_value
-
+    registry_path = tmp_path / "nested" / "custom_modes.json"
     registry_data = {"customModes": [{"slug": "test-agent", "name": "Test Agent"}]}
-    # No need to check exact string, just that dump is called correctly
-    # expected_json_str = json.dumps(registry_data, indent=4)
 
-    result = registry_manager.write_global_registry(registry_data, MOCK_REGISTRY_PATH)
+    result = registry_manager.write_global_registry(registry_data, registry_path)
 
-    # Assert parent directory creation was attempted (exist_ok=True handles existing dirs)
-    mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-    # Assert file was opened for writing (using the mock returned by the helper)
-    mock_open_call.assert_called_once_with(MOCK_REGISTRY_PATH, 'w', encoding='utf-8')
-    # Assert json.dump was called with correct data and formatting
-    mock_json_dump.assert_called_once_with(registry_data, mock_open_func, indent=2) # Pass the handle directly
-    # Function returns None on success, success is indicated by no exceptions raised
-    # and mocks being called correctly.
+    # Parent directory is created and the file holds the indented JSON
+    assert result is True
+    assert registry_path.read_text(encoding='utf-8') == json.dumps(registry_data, indent=2)
+    # No temporary files are left behind; the reverse index is written alongside
+    assert sorted(p.name for p in registry_path.parent.iterdir()) == ["custom_modes.json", "registry_index.json"]
 
-def test_write_registry_permission_error(mocker):
+def test_write_registry_permission_error(mocker, tmp_path):
     """TC-WRITE-02: Handle PermissionError during file write."""
-    # Use helper
-    mock_mkdir, mock_open_error, mock_json_dump = mocking_utils.mock_file_write(
-        mocker, MOCK_REGISTRY_PATH_STR, permission_error=True
-    )
+    registry_path = tmp_path / "custom_modes.json"
+    mocker.patch("builtins.open", side_effect=PermissionError(f"Permission denied: {registry_path}"))
     mock_log_exception = mocker.patch("logging.exception")
 
     registry_data = {"customModes": [{"slug": "test-agent", "name": "Test Agent"}]}
 
     # Expect PermissionError to be raised
     with pytest.raises(PermissionError, match="Permission denied"):
-        registry_manager.write_global_registry(registry_data, MOCK_REGISTRY_PATH)
+        registry_manager.write_global_registry(registry_data, registry_path)
 
-    mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-    mock_open_error.assert_called_once_with(MOCK_REGISTRY_PATH, 'w', encoding='utf-8')
     mock_log_exception.assert_called_once()
-    # Check the log message content (adjust based on actual log format if needed)
-    assert f"OS error writing registry file {MOCK_REGISTRY_PATH}" in mock_log_exception.call_args[0][0]
-    mock_json_dump.assert_not_called()
-
-def test_write_registry_other_os_error(mocker):
-    """TC-WRITE-03: Handle other OSErrors during file write."""
-    # Use helper
-    mock_mkdir, mock_open_error, mock_json_dump = mocking_utils.mock_file_write(
-        mocker, MOCK_REGISTRY_PATH_STR, write_error=OSError("Disk full")
-    )
+    assert f"OS error writing registry file {registry_path}" in mock_log_exception.call_args[0][0]
+    assert not registry_path.exists()
+
+def test_write_registry_other_os_error(mocker, tmp_path):
+    """TC-WRITE-03: A failed rename leaves the previous registry intact and no temp file behind."""
+    registry_path = tmp_path / "custom_modes.json"
+    original = json.dumps({"customModes": [{"slug": "old"}]}, indent=2)
+    registry_path.write_text(original)
+    mocker.patch("os.replace", side_effect=OSError("Disk full"))
     mock_log_exception = mocker.patch("logging.exception")
 
     registry_data = {"customModes": [{"slug": "test-agent", "name": "Test Agent"}]}
 
     # Expect OSError to be raised
     with pytest.raises(OSError, match="Disk full"):
-        registry_manager.write_global_registry(registry_data, MOCK_REGISTRY_PATH)
+        registry_manager.write_global_registry(registry_data, registry_path)
 
-    mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-    mock_open_error.assert_called_once_with(MOCK_REGISTRY_PATH, 'w', encoding='utf-8')
     mock_log_exception.assert_called_once()
-    assert f"OS error writing registry file {MOCK_REGISTRY_PATH}" in mock_log_exception.call_args[0][0]
-    mock_json_dump.assert_not_called()
+    assert f"OS error writing registry file {registry_path}" in mock_log_exception.call_args[0][0]
+    assert registry_path.read_text() == original
+    assert [p.name for p in tmp_path.iterdir()] == ["custom_modes.json"]
 
-def test_write_registry_invalid_data_type(mocker):
-    """TC-WRITE-04: Handle non-dict data passed for writing (should not happen with type hints but test defensively)."""
-    # Use helper
-    mock_mkdir, mock_open_call, mock_json_dump = mocking_utils.mock_file_write(
-        mocker, MOCK_REGISTRY_PATH_STR, serialization_error=TypeError("Not serializable")
-    )
-    mock_open_func = mock_open_call.return_value # Get handle for assertion
+def test_write_registry_invalid_data_type(mocker, tmp_path):
+    """TC-WRITE-04: Handle non-serializable data passed for writing (should not happen with type hints but test defensively)."""
+    registry_path = tmp_path / "custom_modes.json"
     mock_log_exception = mocker.patch("logging.exception")
 
-    invalid_data = ["list", "not", "dict"] # Example invalid data
+    invalid_data = {"customModes": [object()]} # Not JSON serializable
 
-    # Expect TypeError to be raised due to json.dump failure
-    with pytest.raises(TypeError, match="Not serializable"):
-        registry_manager.write_global_registry(invalid_data, MOCK_REGISTRY_PATH)
+    # Expect TypeError to be raised by the serializer before anything is written
+    with pytest.raises(TypeError):
+        registry_manager.write_global_registry(invalid_data, registry_path)
 
-    mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
-    mock_open_call.assert_called_once_with(MOCK_REGISTRY_PATH, 'w', encoding='utf-8') # Target the open mock itself
-    # json.dump was called (and raised the configured error)
-    mock_json_dump.assert_called_once_with(invalid_data, mock_open_func, indent=2) # Pass the mock handle directly
     mock_log_exception.assert_called_once()
-    # Check the log message content
-    assert f"Unexpected error writing registry file {MOCK_REGISTRY_PATH}" in mock_log_exception.call_args[0][0]
\ No newline at end of file
+    assert f"Unexpected error writing registry file {registry_path}" in mock_log_exception.call_args[0][0]
+    assert not registry_path.exists()
+
+def test_write_registry_skip_unchanged(mocker, tmp_path):
+    """With skip_unchanged, identical bytes are not rewritten; changed data still is."""
+    registry_path = tmp_path / "custom_modes.json"
+    registry_data = {"customModes": [{"slug": "test-agent", "name": "Test Agent"}]}
+    registry_manager.write_global_registry(registry_data, registry_path)
+
+    spy_replace = mocker.spy(registry_manager.os, "replace")
+    assert registry_manager.write_global_registry(registry_data, registry_path, skip_unchanged=True) is False
+    spy_replace.assert_not_called()
+
+    registry_data["customModes"][0]["name"] = "Renamed"
+    assert registry_manager.write_global_registry(registry_data, registry_path, skip_unchanged=True) is True
+    assert json.loads(registry_path.read_text())["customModes"][0]["name"] == "Renamed"
+
+def test_write_registry_preserves_file_mode(tmp_path):
+    """Replacing the registry keeps the existing file's permissions."""
+    registry_path = tmp_path / "custom_modes.json"
+    registry_path.write_text("{}")
+    os.chmod(registry_path, 0o640)
+
+    registry_manager.write_global_registry({"customModes": []}, registry_path)
+
+    assert (registry_path.stat().st_mode & 0o777) == 0o640
+
+
+# === Test Suite: SlugIndexedRegistry ===
+
+def test_slug_indexed_registry_lookup_and_upsert():
+    """Upserts replace in place or append, and lookups use the slug index."""
+    registry = registry_manager.SlugIndexedRegistry(
+        {"customModes": [{"slug": "agent1", "name": "Agent One"}, {"slug": "agent2", "name": "Agent Two"}]}
+    )
+
+    assert registry.upsert({"slug": "agent1", "name": "Agent One v2", "customInstructions": "SHOULD BE IGNORED"}) is True
+    assert registry.upsert({"slug": "agent3", "name": "Agent Three"}) is False
+
+    assert len(registry) == 3
+    assert "agent3" in registry
+    assert registry.get("agent1") == {"slug": "agent1", "name": "Agent One v2"}
+    assert registry.get("missing") is None
+    assert registry.slugs() == ["agent1", "agent2", "agent3"]
+
+
+def test_slug_indexed_registry_bulk_upsert_and_delete():
+    """Deletes leave the remaining order intact and re-adding a deleted slug appends it."""
+    registry = registry_manager.SlugIndexedRegistry()
+    updated = registry.upsert_many({"slug": f"agent{i}", "name": str(i)} for i in range(5))
+    assert updated == 0
+
+    assert registry.delete("agent1") is True
+    assert registry.delete("agent1") is False
+    assert registry.get("agent1") is None
+    registry.upsert({"slug": "agent1", "name": "back"})
+
+    assert [mode["slug"] for mode in registry.to_dict()["customModes"]] == ["agent0", "agent2", "agent3", "agent4", "agent1"]
+    assert len(registry) == 5
+
+
+def test_slug_indexed_registry_serializes_editor_layout():
+    """Serialization round-trips the registry layout, including unindexed entries and extra keys."""
+    original = {"customModes": [{"slug": "agent1"}, {"name": "No Slug"}, {"slug": "agent1", "name": "Duplicate"}], "version": 2}
+    registry = registry_manager.SlugIndexedRegistry(original)
+    assert registry.to_dict() == original
+
+    registry.upsert({"slug": "agent1", "name": "Updated"})
+    # Like update_global_registry, only the first matching entry is updated
+    assert registry.to_dict()["customModes"][0] == {"slug": "agent1", "name": "Updated"}
+    assert registry.to_dict()["customModes"][2] == {"slug": "agent1", "name": "Duplicate"}
+    assert original["customModes"][0] == {"slug": "agent1"} # Input is not mutated
+    assert json.loads(json.dumps(registry.to_dict())) == registry.to_dict()
+
+
+# === Test Suite: registry journal ===
+
+def test_journal_is_replayed_on_read(tmp_path):
+    """Pending journal upserts and deletes are visible through read_global_registry."""
+    registry_path = tmp_path / "custom_modes.json"
+    registry_manager.write_global_registry(
+        {"customModes": [{"slug": "agent1", "name": "One"}, {"slug": "agent2", "name": "Two"}]}, registry_path
+    )
+    materialized = registry_path.read_bytes()
+
+    registry_manager.append_registry_journal(registry_path, [
+        {"op": "upsert", "mode": {"slug": "agent1", "name": "One v2", "customInstructions": "SHOULD BE IGNORED"}},
+        {"op": "delete", "slug": "agent2"},
+    ])
+    registry_manager.append_registry_journal(registry_path, [{"op": "upsert", "mode": {"slug": "agent3", "name": "Three"}}])
+
+    assert registry_path.read_bytes() == materialized # The registry file itself is untouched
+    assert registry_manager.read_global_registry(registry_path) == {
+        "customModes": [{"slug": "agent1", "name": "One v2"}, {"slug": "agent3", "name": "Three"}]
+    }
+
+
+def test_journal_skips_torn_trailing_line(tmp_path, mocker):
+    """A partially written last record (e.g. after a crash) is ignored."""
+    registry_path = tmp_path / "custom_modes.json"
+    registry_manager.append_registry_journal(registry_path, [{"op": "upsert", "mode": {"slug": "agent1"}}])
+    with open(registry_manager.get_journal_path(registry_path), 'a') as f:
+        f.write('{"op": "upsert", "mode": {"slu')
+    mock_log_warning = mocker.patch("logging.warning")
+
+    result = registry_manager.read_global_registry(registry_path)
+
+    assert result == {"customModes": [{"slug": "agent1"}]}
+    assert any("Skipping invalid entry" in c.args[0] for c in mock_log_warning.call_args_list)
+
+
+def test_journal_rejects_invalid_entries(tmp_path):
+    registry_path = tmp_path / "custom_modes.json"
+    with pytest.raises(ValueError, match="Invalid registry journal entry"):
+        registry_manager.append_registry_journal(registry_path, [{"op": "rename", "slug": "agent1"}])
+    assert registry_manager.journal_size(registry_path) == 0
+
+
+def test_compact_registry_folds_journal(tmp_path):
+    """Compaction materializes the journal into the JSON and removes the journal."""
+    registry_path = tmp_path / "custom_modes.json"
+    registry_manager.write_global_registry({"customModes": [{"slug": "agent1"}]}, registry_path)
+    assert registry_manager.compact_registry(registry_path) is False
+
+    registry_manager.append_registry_journal(registry_path, [{"op": "upsert", "mode": {"slug": "agent2"}}])
+    assert registry_manager.compact_registry_if_needed(registry_path, threshold_bytes=10_000) is False
+    assert registry_manager.compact_registry_if_needed(registry_path, threshold_bytes=1) is True
+
+    assert not registry_manager.get_journal_path(registry_path).exists()
+    assert json.loads(registry_path.read_text()) == {"customModes": [{"slug": "agent1"}, {"slug": "agent2"}]}
+
+
+def test_full_write_supersedes_journal(tmp_path):
+    """Writing the full registry discards pending journal records, even when the bytes are unchanged."""
+    registry_path = tmp_path / "custom_modes.json"
+    registry_data = {"customModes": [{"slug": "agent1"}]}
+    registry_manager.write_global_registry(registry_data, registry_path)
+    registry_manager.append_registry_journal(registry_path, [{"op": "delete", "slug": "agent1"}])
+
+    assert registry_manager.write_global_registry(registry_data, registry_path, skip_unchanged=True) is False
+
+    assert registry_manager.journal_size(registry_path) == 0
+    assert registry_manager.read_global_registry(registry_path) == registry_data
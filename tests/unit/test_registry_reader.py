@@ -0,0 +1,113 @@
+# tests/unit/test_registry_reader.py
+import json
+
+import pytest
+
+from cli import prompt_store
+from cli import registry_manager
+from cli.exceptions import RegistryReadError
+from cli.registry_reader import LazyRegistryReader
+
+
+def _write(path, data, **dump_kwargs):
+    path.write_text(json.dumps(data, **dump_kwargs), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def registry_data():
+    return {
+        "version": 2, # Extra keys before and after customModes are tolerated
+        "customModes": [
+            {"slug": "alpha", "name": "Alpha", "roleDefinition": "Uses \"quotes\", [brackets] and {braces}: ok", "groups": ["read"]},
+            {"name": "Beta", "groups": [["edit", {"fileRegex": "\\.md$"}]], "slug": "beta", "roleDefinition": "β"},
+            {"slug": "gamma", "name": "Gamma", "roleDefinition": "", "groups": [], "apiConfiguration": {"model": "m", "slug": "not-this"}},
+        ],
+        "trailer": {"customModes": "ignored", "slug": "x"},
+    }
+
+
+@pytest.mark.parametrize("dump_kwargs", [{}, {"indent": 2}, {"separators": (",", ":")}])
+def test_lazy_reader_matches_full_read(tmp_path, registry_data, dump_kwargs):
+    """Slugs, single lookups and iteration agree with read_global_registry for any formatting."""
+    path = _write(tmp_path / "custom_modes.json", registry_data, **dump_kwargs)
+    expected = registry_manager.read_global_registry(path)["customModes"]
+
+    with LazyRegistryReader(path) as registry:
+        assert registry.slugs() == ["alpha", "beta", "gamma"]
+        assert len(registry) == 3
+        assert "beta" in registry and "delta" not in registry
+        assert registry.get("alpha") == expected[0]
+        assert registry.get("gamma") == expected[2] # Nested "slug" key is not mistaken for the mode's slug
+        assert registry.get("delta") is None
+        assert json.loads(registry.get_bytes("beta")) == expected[1]
+        assert list(registry.iter_modes()) == expected
+
+
+def test_lazy_reader_empty_modes_and_duplicates(tmp_path):
+    """An empty list has no entries; duplicate slugs resolve to the first occurrence."""
+    empty = _write(tmp_path / "empty.json", {"customModes": []}, indent=2)
+    with LazyRegistryReader(empty) as registry:
+        assert len(registry) == 0 and registry.slugs() == []
+
+    dupes = _write(tmp_path / "dupes.json", {"customModes": [{"slug": "a", "n": 1}, {"slug": "a", "n": 2}, {"n": 3}]})
+    with LazyRegistryReader(dupes) as registry:
+        assert len(registry) == 3
+        assert registry.slugs() == ["a"]
+        assert registry.get("a")["n"] == 1
+
+
+def test_lazy_reader_applies_journal(tmp_path, registry_data):
+    """Pending journal records are overlaid exactly as read_global_registry replays them."""
+    path = _write(tmp_path / "custom_modes.json", registry_data, indent=2)
+    registry_manager.append_registry_journal(path, [
+        {"op": "upsert", "mode": {"slug": "beta", "name": "Beta 2", "roleDefinition": "r", "groups": []}},
+        {"op": "delete", "slug": "alpha"},
+        {"op": "upsert", "mode": {"slug": "delta", "name": "Delta", "roleDefinition": "r", "groups": []}},
+    ])
+    expected = registry_manager.read_global_registry(path)["customModes"]
+
+    with LazyRegistryReader(path) as registry:
+        assert registry.slugs() == [mode["slug"] for mode in expected]
+        assert registry.get("alpha") is None
+        assert registry.get("beta")["name"] == "Beta 2"
+        assert list(registry.iter_modes()) == expected
+
+
+@pytest.mark.parametrize("content, message", [
+    ("", "file is empty"),
+    ('{"customModes": {"slug": "a"}}', "'customModes' is not a list"),
+    ('{"customModes": "a"}', "'customModes' is not a list"),
+    ('{"customModes": null, "x": []}', "'customModes' is not a list"),
+    ('{"other": []}', "missing 'customModes' list"),
+    ('{"customModes": [{"slug": "a"}', "unbalanced brackets"),
+    ('{"customModes": ["a]}', "unterminated string"),
+])
+def test_lazy_reader_rejects_invalid_files(tmp_path, content, message):
+    path = tmp_path / "custom_modes.json"
+    path.write_text(content, encoding='utf-8')
+    with pytest.raises(RegistryReadError, match=message):
+        LazyRegistryReader(path)
+
+
+def test_lazy_reader_missing_file(tmp_path):
+    with pytest.raises(RegistryReadError, match="Could not open registry file"):
+        LazyRegistryReader(tmp_path / "missing.json")
+
+
+def test_lazy_reader_reads_the_prompt_store(tmp_path, registry_data):
+    """With the prompt store enabled, the reader sees store writes, not the last materialized JSON."""
+    path = _write(tmp_path / "custom_modes.json", registry_data)
+    registry_manager.write_global_registry(registry_data, registry_path=path, use_prompt_store=True)
+    updated = json.loads(json.dumps(registry_data))
+    updated["customModes"][0]["roleDefinition"] = "New role"
+    registry_manager.write_global_registry(updated, registry_path=path)
+
+    with LazyRegistryReader(path) as registry:
+        assert registry.get("alpha")["roleDefinition"] == "New role"
+        assert list(registry.iter_modes()) == registry_manager.read_global_registry(path)["customModes"]
+        assert json.loads(registry.get_bytes("beta")) == updated["customModes"][1]
+
+    prompt_store.get_store_registry_path(path).write_text("{", encoding='utf-8')
+    with pytest.raises(RegistryReadError, match="prompt store"):
+        LazyRegistryReader(path)
@@ -0,0 +1,44 @@
+# tests/unit/test_startup_imports.py
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Modules only the compile path should pay for (see scripts/benchmark_startup.py)
+HEAVY_MODULES = ["yaml", "pydantic", "cli.models", "cli.compiler", "cli.registry_manager", "cli.daemon"]
+
+PROBE = """
+import sys
+sys.argv = ["rawr", *{args!r}]
+from cli.main import app
+try:
+    app()
+except SystemExit:
+    pass
+print("LOADED:" + ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def _loaded_heavy_modules(args):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(args=args, heavy=HEAVY_MODULES)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    line = [l for l in result.stdout.splitlines() if l.startswith("LOADED:")][-1]
+    return [name for name in line[len("LOADED:"):].split(",") if name]
+
+
+@pytest.mark.parametrize("args", [[], ["--help"], ["compile", "--help"], ["watch", "--help"]])
+def test_help_does_not_import_compiler_stack(args):
+    assert _loaded_heavy_modules(args) == []
+
+
+def test_config_is_resolved_lazily():
+    result = subprocess.run(
+        [sys.executable, "-c", "import cli.main, cli.config_loader as c; print('settings' in vars(c))"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,53 @@
+# tests/unit/test_yaml_io.py
+import yaml
+
+from cli import yaml_io
+
+CONFIG = {
+    "slug": "writer",
+    "name": "Writer – ünïcode",
+    "roleDefinition": "Line one.\nLine two.\n\nParagraph two.",
+    "groups": ["read", ["edit", {"fileRegex": "\\.md$"}], "command"],
+    "apiConfiguration": None,
+    "customInstructions": "1. First\n2. Second\n",
+    "count": 3,
+    "enabled": True,
+}
+
+
+def _legacy_dump(data):
+    """The representer setup previously inlined in scripts/generate_agent_configs.py."""
+    class LegacyDumper(yaml.Dumper):
+        pass
+    LegacyDumper.add_representer(str, yaml_io.represent_literal_block)
+    return yaml.dump(data, Dumper=LegacyDumper, sort_keys=False, allow_unicode=True, default_flow_style=False, width=1000)
+
+
+def test_dump_matches_the_legacy_literal_block_output():
+    text = yaml_io.dump(CONFIG, sort_keys=False, allow_unicode=True, default_flow_style=False, width=1000)
+
+    assert text == _legacy_dump(CONFIG)
+    assert "roleDefinition: |-\n  Line one.\n  Line two.\n\n  Paragraph two.\n" in text
+
+
+def test_load_round_trips_and_matches_safe_load():
+    text = yaml_io.dump(CONFIG, sort_keys=False)
+
+    assert yaml_io.load(text) == CONFIG == yaml.safe_load(text)
+
+
+def test_backend_matches_pyyaml_build():
+    assert yaml_io.BACKEND == ("libyaml" if yaml.__with_libyaml__ else "python")
+
+
+def test_load_with_marks_locates_values_from_one_parse():
+    text = yaml_io.dump(CONFIG, sort_keys=False)
+    data, marks = yaml_io.load_with_marks(text)
+
+    assert data == CONFIG
+    line = text.splitlines().index("groups:") + 1
+    assert marks.locate(("groups",)) == (line, 1)
+    assert marks.locate(("groups", 1, 1, "fileRegex")) == (line + 3, 5)
+    # Parts that name no key or index (e.g. pydantic union members) are skipped
+    assert marks.locate(("groups", "tuple[str, GroupRestriction]", 1)) == (line + 2, 3)
+    assert yaml_io.load_with_marks("")[1].locate(("groups",)) is None